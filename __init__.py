@@ -37,87 +37,100 @@ if "bpy" in locals():
     importlib.reload(utils)
     importlib.reload(metarig_menu)
     importlib.reload(rig_lists)
+    importlib.reload(startup_profile)
 else:
-    from . import utils, rig_lists, generate, ui, metarig_menu
+    from . import startup_profile
+    startup_profile.start()
+    try:
+        with startup_profile.phase("import"):
+            from . import utils, rig_lists, generate, ui, metarig_menu
+    except Exception:
+        # Don't leave the import hook of the profiler installed
+        startup_profile.abort()
+        raise
+
+# Also used in legacy mode, where utils is swapped for legacy.utils
+from .utils import add_rig_parameters, rig_parameter_names
 
 import bpy
+import importlib
 import sys
-import os
 from bpy.types import AddonPreferences
 from bpy.props import BoolProperty
 from bpy.props import StringProperty
 
 
-class RigifyPreferences(AddonPreferences):
-    # this must match the addon name, use '__package__'
-    # when defining this in a submodule of a python package.
-    bl_idname = __name__
+NAMESPACE_MODULES = ('utils', 'rig_lists', 'generate', 'ui', 'metarig_menu')
 
-    def update_legacy(self, context):
-        if self.legacy_mode:
+_namespaces = {}  # {legacy: {module name: module}}, see get_namespace()
 
-            if 'ui' in globals() and 'legacy' in str(globals()['ui']):    # already in legacy mode. needed when rigify is reloaded
-                return
-            else:
-                rigify_dir = os.path.dirname(os.path.realpath(__file__))
-                if rigify_dir not in sys.path:
-                    sys.path.append(rigify_dir)
 
-                unregister()
+def get_namespace(legacy):
+    """ Returns the modules of the current or the legacy feature set.  The
+        legacy modules are only imported the first time they are asked for.
+    """
+    namespace = _namespaces.get(legacy)
+    if namespace is None:
+        package = __name__ + ".legacy" if legacy else __name__
+        namespace = {name: importlib.import_module(package + "." + name) for name in NAMESPACE_MODULES}
+        _namespaces[legacy] = namespace
+    return namespace
 
-                globals().pop('utils')
-                globals().pop('rig_lists')
-                globals().pop('generate')
-                globals().pop('ui')
-                globals().pop('metarig_menu')
 
-                import legacy.utils
-                import legacy.rig_lists
-                import legacy.generate
-                import legacy.ui
-                import legacy.metarig_menu
+def is_legacy_active():
+    return ui.__name__.startswith(__name__ + ".legacy")
 
-                print("ENTERING RIGIFY LEGACY\r\n")
 
-                globals()['utils'] = legacy.utils
-                globals()['rig_lists'] = legacy.rig_lists
-                globals()['generate'] = legacy.generate
-                globals()['ui'] = legacy.ui
-                globals()['metarig_menu'] = legacy.metarig_menu
+def add_legacy_rig_parameters():
+    """ Adds the parameters of all the legacy rig types.  Legacy rig_lists
+        imports every rig module, so they are taken from sys.modules rather
+        than with legacy get_rig_type(), which reloads them.
+    """
+    for rig in rig_lists.rig_list:
+        if rig in rig_parameter_names:
+            continue
+        r = importlib.import_module("%s.%s.%s" % (utils.__package__, utils.RIG_DIR, rig))
+        add_rig_parameters(rig, r, bpy.types.RigifyParameters)
 
-                register()
 
-        else:
+def add_collection_property():
+    bpy.types.WindowManager.rigify_collection = bpy.props.EnumProperty(items=rig_lists.col_enum_list, default="All",
+                                                                       name="Rigify Active Collection",
+                                                                       description="The selected rig collection")
 
-            rigify_dir = os.path.dirname(os.path.realpath(__file__))
 
-            if rigify_dir in sys.path:
-                id = sys.path.index(rigify_dir)
-                sys.path.pop(id)
+def set_legacy_mode(legacy):
+    """ Switches between the current and the legacy feature set.  Only the
+        UI and metarig menu classes, and the rig parameters, are registered
+        again; everything else is shared by both.
+    """
+    if is_legacy_active() == legacy:
+        return
 
-            unregister()
+    metarig_menu.unregister()
+    ui.unregister()
 
-            globals().pop('utils')
-            globals().pop('rig_lists')
-            globals().pop('generate')
-            globals().pop('ui')
-            globals().pop('metarig_menu')
+    globals().update(get_namespace(legacy))
+    print("ENTERING RIGIFY LEGACY\r\n" if legacy else "EXIT RIGIFY LEGACY\r\n")
 
-            from . import utils
-            from . import rig_lists
-            from . import generate
-            from . import ui
-            from . import metarig_menu
+    ui.register()
+    metarig_menu.register()
+    add_collection_property()
 
-            print("EXIT RIGIFY LEGACY\r\n")
+    # Rig types of the two feature sets share names, so the parameters
+    # added for one are not valid for the other.
+    rig_parameter_names.clear()
+    if legacy:
+        add_legacy_rig_parameters()
 
-            globals()['utils'] = utils
-            globals()['rig_lists'] = rig_lists
-            globals()['generate'] = generate
-            globals()['ui'] = ui
-            globals()['metarig_menu'] = metarig_menu
 
-            register()
+class RigifyPreferences(AddonPreferences):
+    # this must match the addon name, use '__package__'
+    # when defining this in a submodule of a python package.
+    bl_idname = __name__
+
+    def update_legacy(self, context):
+        set_legacy_mode(self.legacy_mode)
 
     def update_external_rigs(self, context):
 
@@ -126,22 +139,16 @@ class RigifyPreferences(AddonPreferences):
 
         custom_rigs_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
 
-        if custom_rigs_folder == "" and 'external' in rig_lists.rigs_dict:
-            rig_lists.rigs_dict.pop('external')
+        if custom_rigs_folder == "":
+            rig_lists.clear_external_rigs()
             return
 
         if custom_rigs_folder not in sys.path:
             sys.path.append(bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder)
 
+        # External rig modules are imported, and their parameters added,
+        # on first use (see rig_lists.ensure_rig_parameters)
         rig_lists.get_external_rigs()
-        if 'external' in rig_lists.rigs_dict and rig_lists.rigs_dict['external']:
-            # Add external rig parameters
-            for rig in rig_lists.rigs_dict['external']['rig_list']:
-                r = utils.get_rig_type(rig, custom_rigs_folder)
-                try:
-                    r.add_parameters(RigifyParameters)
-                except AttributeError:
-                    pass
 
     legacy_mode = BoolProperty(
         name='Rigify Legacy Mode',
@@ -162,6 +169,13 @@ class RigifyPreferences(AddonPreferences):
 
     show_rigs_folder_expanded = BoolProperty()
 
+    profile_startup = BoolProperty(
+        name='Profile Startup',
+        description='Write a report of the time spent importing and registering the add-on '
+                    'to the user config folder the next time it is enabled',
+        default=False
+    )
+
     def draw(self, context):
         layout = self.layout
         column = layout.column()
@@ -206,6 +220,9 @@ class RigifyPreferences(AddonPreferences):
             split.label('Description:')
             split.label(text='When enabled the add-on will run in legacy mode using the old 2.76b feature set.')
 
+        box = column.box()
+        box.prop(self, 'profile_startup')
+
         row = layout.row()
         row.label("End of Rigify Preferences")
 
@@ -287,8 +304,18 @@ class RigifyArmatureLayer(bpy.types.PropertyGroup):
 ##### REGISTER #####
 
 def register():
-    ui.register()
-    metarig_menu.register()
+    try:
+        register_addon()
+    finally:
+        # Writes the profile, and removes the import hook of the profiler
+        startup_profile.finish()
+
+
+def register_addon():
+    with startup_profile.phase("ui.register"):
+        ui.register()
+    with startup_profile.phase("metarig_menu.register"):
+        metarig_menu.register()
 
     bpy.utils.register_class(RigifyName)
     bpy.utils.register_class(RigifyParameters)
@@ -331,11 +358,9 @@ def register():
                                                                           ('THEME20', 'THEME20', '')
                                                                            ), name='Theme')
 
-    IDStore = bpy.types.WindowManager
-    IDStore.rigify_collection = bpy.props.EnumProperty(items=rig_lists.col_enum_list, default="All",
-                                                       name="Rigify Active Collection",
-                                                       description="The selected rig collection")
+    add_collection_property()
 
+    IDStore = bpy.types.WindowManager
     IDStore.rigify_types = bpy.props.CollectionProperty(type=RigifyName)
     IDStore.rigify_active_type = bpy.props.IntProperty(name="Rigify Active Type", description="The selected rig type")
 
@@ -346,6 +371,7 @@ def register():
     def update_mode(self, context):
         if self.rigify_generate_mode == 'new':
             self.rigify_force_widget_update = False
+            self.rigify_reconcile_widgets = False
 
     IDStore.rigify_generate_mode = bpy.props.EnumProperty(name="Rigify Generate Rig Mode",
                                                           description="'Generate Rig' mode. In 'overwrite' mode the features of the target rig will be updated as defined by the metarig. In 'new' mode a new rig will be created as defined by the metarig. Current mode",
@@ -357,6 +383,14 @@ def register():
                                                                 description="Forces Rigify to delete and rebuild all the rig widgets. if unset, only missing widgets will be created",
                                                                 default=False)
 
+    IDStore.rigify_reconcile_widgets = bpy.props.BoolProperty(name="Update Changed Widgets",
+                                                              description="Rebuild the widgets whose shape changed, move the ones whose bone moved, and delete the ones no longer used. If unset, existing widgets are only moved",
+                                                              default=False)
+
+    IDStore.rigify_unlinked_widgets = bpy.props.BoolProperty(name="Keep Widgets Out of Scene",
+                                                             description="Keep the generated widgets in a WGTS group instead of linking them in the scene. Custom shapes don't need to be in the scene",
+                                                             default=False)
+
     IDStore.rigify_target_rigs = bpy.props.CollectionProperty(type=RigifyName)
     IDStore.rigify_target_rig = bpy.props.StringProperty(name="Rigify Target Rig",
                                                          description="Defines which rig to overwrite. If unset, a new one called 'rig' will be created.",
@@ -375,22 +409,21 @@ def register():
     IDStore.rigify_transfer_start_frame = bpy.props.IntProperty(name="Start Frame", description="First Frame to Transfer", default=0, min= 0)
     IDStore.rigify_transfer_end_frame = bpy.props.IntProperty(name="End Frame", description="Last Frame to Transfer", default=0, min= 0)
 
-    if (ui and 'legacy' in str(ui)) or bpy.context.user_preferences.addons['rigify'].preferences.legacy_mode:
+    if is_legacy_active() or bpy.context.user_preferences.addons['rigify'].preferences.legacy_mode:
         # update legacy on restart or reload
         bpy.context.user_preferences.addons['rigify'].preferences.legacy_mode = True
 
-    # Add rig parameters
-    for rig in rig_lists.rig_list:
-        r = utils.get_rig_type(rig)
-        try:
-            r.add_parameters(RigifyParameters)
-        except AttributeError:
-            pass
+    # Add rig parameters.  Rig types add theirs on first use (see
+    # rig_lists.ensure_rig_parameters), legacy ones are all added now.
+    with startup_profile.phase("add_parameters"):
+        if is_legacy_active():
+            add_legacy_rig_parameters()
 
-    external_rigs_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
-    if external_rigs_folder and not 'external' in rig_lists.rigs_dict:
-        #force update on reload
-        bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder = external_rigs_folder
+    with startup_profile.phase("external rigs"):
+        external_rigs_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
+        if external_rigs_folder and not 'external' in rig_lists.rigs_dict:
+            #force update on reload
+            bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder = external_rigs_folder
 
 
 def unregister():
@@ -405,6 +438,8 @@ def unregister():
     del IDStore.rigify_advanced_generation
     del IDStore.rigify_generate_mode
     del IDStore.rigify_force_widget_update
+    del IDStore.rigify_reconcile_widgets
+    del IDStore.rigify_unlinked_widgets
     del IDStore.rigify_target_rig
     del IDStore.rigify_target_rigs
     del IDStore.rigify_rig_uis
@@ -0,0 +1,54 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Times enabling the addon in background Blender, and counts the rig and
+    metarig modules imported by it.  Run it on two checkouts to compare
+    startup before and after a change.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/addon_startup.py
+"""
+
+import addon_utils
+import sys
+import time
+
+
+def count_modules(package):
+    return len([name for name in sys.modules if name.startswith(package + ".")])
+
+
+def main():
+    start = time.perf_counter()
+    addon_utils.enable("rigify")
+    elapsed = time.perf_counter() - start
+
+    print("Enable rigify:           %.3f s" % elapsed)
+    print("Rig modules imported:    %d" % count_modules("rigify.rigs"))
+    print("Metarig modules imported: %d" % count_modules("rigify.metarigs"))
+
+    # Enabling again, with the modules already imported
+    addon_utils.disable("rigify")
+    start = time.perf_counter()
+    addon_utils.enable("rigify")
+    print("Enable rigify again:     %.3f s" % (time.perf_counter() - start))
+
+
+main()
@@ -0,0 +1,183 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Checks that utils.copy_attributes(), which copies a cached per-type list of
+    properties, gives the same result as the old dir() based copy, and times
+    both.  The check covers every constraint type, and also driver F-Curves
+    with their variables, targets, modifiers and keyframes, including an
+    invalid driver.  Exits with an
+    error if any copied property differs.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/copy_attributes.py
+"""
+
+import bpy
+import addon_utils
+import sys
+import time
+
+addon_utils.enable("rigify")
+
+from rigify.utils import copy_attributes
+
+CONSTRAINT_TYPES = [item.identifier for item in
+                    bpy.types.Constraint.bl_rna.properties['type'].enum_items]
+
+
+def copy_attributes_dir(a, b):
+    """ The copy_attributes() rigify used before the copy plans.
+    """
+    keys = dir(a)
+    for key in keys:
+        if not key.startswith("_") \
+        and not key.startswith("error_") \
+        and key != "group" \
+        and key != "is_valid" \
+        and key != "rna_type" \
+        and key != "bl_rna":
+            try:
+                setattr(b, key, getattr(a, key))
+            except AttributeError:
+                pass
+
+
+def values(a):
+    """ Returns {name: value} for the non-collection RNA properties of a.
+    """
+    result = {}
+    for prop in a.bl_rna.properties:
+        if prop.type != 'COLLECTION' and prop.identifier != "rna_type":
+            value = getattr(a, prop.identifier)
+            if prop.type in {'BOOLEAN', 'INT', 'FLOAT'} and getattr(prop, "is_array", False):
+                value = tuple(value)
+            result[prop.identifier] = value
+    return result
+
+
+def make_armature(scene, name):
+    obj = bpy.data.objects.new(name, bpy.data.armatures.new(name))
+    scene.objects.link(obj)
+    scene.objects.active = obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    for con_type in CONSTRAINT_TYPES:
+        bone = obj.data.edit_bones.new(con_type)
+        bone.tail = (0, 1, 0)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return obj
+
+
+def make_source(scene):
+    source = make_armature(scene, "source")
+    for con_type in CONSTRAINT_TYPES:
+        con = source.pose.bones[con_type].constraints.new(type=con_type)
+        con.name = "test"
+        con.influence = 0.5
+        if hasattr(con, "target"):
+            con.target = source
+            if hasattr(con, "subtarget"):
+                con.subtarget = CONSTRAINT_TYPES[0]
+
+        fcurve = source.driver_add('pose.bones["%s"].constraints["test"].influence' % con_type)
+        var = fcurve.driver.variables.new()
+        var.name = "var"
+        var.targets[0].id = source
+        var.targets[0].data_path = 'pose.bones["%s"]["prop"]' % con_type
+        fcurve.driver.expression = "var * 2"
+        fcurve.modifiers.new(type='GENERATOR')
+        for i in range(10):
+            fcurve.keyframe_points.insert(i, i * 0.1)
+
+    # An invalid driver, whose flags must not be copied
+    fcurve = source.animation_data.drivers[0]
+    fcurve.is_valid = False
+    fcurve.driver.is_valid = False
+    return source
+
+
+def copy_all(source, target, copy):
+    """ Copies constraints and drivers of source onto target with the given
+        copy function, and returns the (source, copy) pairs that were made.
+    """
+    pairs = []
+    for con_type in CONSTRAINT_TYPES:
+        con1 = source.pose.bones[con_type].constraints["test"]
+        con2 = target.pose.bones[con_type].constraints.new(type=con_type)
+        copy(con1, con2)
+        pairs.append((con1, con2))
+
+    for d1 in source.animation_data.drivers:
+        d2 = target.driver_add(d1.data_path, d1.array_index)
+        copy(d1, d2)
+        copy(d1.driver, d2.driver)
+        pairs += [(d1, d2), (d1.driver, d2.driver)]
+
+        for m in d2.modifiers:
+            d2.modifiers.remove(m)
+        for m1 in d1.modifiers:
+            m2 = d2.modifiers.new(type=m1.type)
+            copy(m1, m2)
+            pairs.append((m1, m2))
+
+        for v in d2.driver.variables:
+            d2.driver.variables.remove(v)
+        for v1 in d1.driver.variables:
+            v2 = d2.driver.variables.new()
+            copy(v1, v2)
+            pairs.append((v1, v2))
+            for t1, t2 in zip(v1.targets, v2.targets):
+                copy(t1, t2)
+                pairs.append((t1, t2))
+
+        for k1 in d1.keyframe_points:
+            d2.keyframe_points.add()
+            k2 = d2.keyframe_points[-1]
+            copy(k1, k2)
+            pairs.append((k1, k2))
+    return pairs
+
+
+def main():
+    scene = bpy.context.scene
+    source = make_source(scene)
+
+    results = {}
+    for name, copy in (("dir", copy_attributes_dir), ("plan", copy_attributes)):
+        target = make_armature(scene, "target_" + name)
+        start = time.perf_counter()
+        pairs = copy_all(source, target, copy)
+        elapsed = time.perf_counter() - start
+        print("%-5s %5d copies in %.4f s" % (name, len(pairs), elapsed))
+        results[name] = [values(b) for a, b in pairs]
+
+    mismatches = 0
+    for old, new in zip(results["dir"], results["plan"]):
+        for key in old:
+            if old[key] != new[key]:
+                print("Mismatch: %s: %r != %r" % (key, old[key], new[key]))
+                mismatches += 1
+
+    if mismatches:
+        print("copy_attributes: %d mismatching properties" % mismatches)
+        sys.exit(1)
+    print("copy_attributes: results match")
+
+
+main()
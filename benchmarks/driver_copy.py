@@ -0,0 +1,151 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Times the copy of metarig drivers onto the rig on a synthetic metarig with
+    500 drivers of 50 keyframes each.  It compares the old per-keyframe copy
+    with utils.copy_driver() and generate.mark_property_targets(), and checks
+    that the copied keyframes match.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/driver_copy.py
+"""
+
+import bpy
+import addon_utils
+import re
+import sys
+import time
+
+addon_utils.enable("rigify")
+
+from rigify import generate
+from rigify.utils import copy_attributes, copy_driver
+
+DRIVERS = 500
+KEYS = 50
+
+
+def copy_driver_per_key(d1, obj, source):
+    """ The driver copy generate_rig() used before the bulk keyframe copy.
+    """
+    d2 = obj.driver_add(d1.data_path)
+    copy_attributes(d1, d2)
+    copy_attributes(d1.driver, d2.driver)
+
+    for m in d2.modifiers:
+        d2.modifiers.remove(m)
+    for v in d2.driver.variables:
+        d2.driver.variables.remove(v)
+
+    for m1 in d1.modifiers:
+        m2 = d2.modifiers.new(type=m1.type)
+        copy_attributes(m1, m2)
+
+    for v1 in d1.driver.variables:
+        v2 = d2.driver.variables.new()
+        copy_attributes(v1, v2)
+        for i in range(len(v1.targets)):
+            copy_attributes(v1.targets[i], v2.targets[i])
+            if v2.targets[i].id == source:
+                v2.targets[i].id = obj
+
+            tar = v2.targets[i]
+            if v2.type == 'SINGLE_PROP' \
+            and re.match('^pose.bones\["[^"\]]*"\]\["[^"\]]*"\]$', tar.data_path):
+                tar.data_path = "RIGIFY-" + tar.data_path
+
+    for i in range(len(d1.keyframe_points)):
+        d2.keyframe_points.add()
+        k1 = d1.keyframe_points[i]
+        k2 = d2.keyframe_points[i]
+        copy_attributes(k1, k2)
+    return d2
+
+
+def copy_driver_bulk(d1, obj, source):
+    d2 = copy_driver(d1, obj, source)
+    generate.mark_property_targets([d2])
+    return d2
+
+
+def make_armature(scene, name):
+    obj = bpy.data.objects.new(name, bpy.data.armatures.new(name))
+    scene.objects.link(obj)
+    scene.objects.active = obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(DRIVERS):
+        bone = obj.data.edit_bones.new("bone_%03d" % i)
+        bone.tail = (0, 1, 0)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    for pbone in obj.pose.bones:
+        pbone["prop"] = 0.0
+        pbone["driven"] = 0.0
+    return obj
+
+
+def make_metarig(scene):
+    metarig = make_armature(scene, "metarig")
+    for i, pbone in enumerate(metarig.pose.bones):
+        fcurve = metarig.driver_add('pose.bones["%s"]["driven"]' % pbone.name)
+        var = fcurve.driver.variables.new()
+        var.type = 'SINGLE_PROP'
+        var.targets[0].id = metarig
+        var.targets[0].data_path = 'pose.bones["%s"]["prop"]' % pbone.name
+
+        fcurve.keyframe_points.add(KEYS)
+        co = [0.0] * (KEYS * 2)
+        co[0::2] = range(KEYS)
+        co[1::2] = [(i + k) * 0.01 for k in range(KEYS)]
+        fcurve.keyframe_points.foreach_set("co", co)
+        fcurve.update()
+    return metarig
+
+
+def keyframes(obj):
+    result = []
+    for d in obj.animation_data.drivers:
+        co = [0.0] * (len(d.keyframe_points) * 2)
+        d.keyframe_points.foreach_get("co", co)
+        paths = [tar.data_path for v in d.driver.variables for tar in v.targets]
+        result.append((d.data_path, tuple(co), tuple(paths)))
+    return result
+
+
+def main():
+    scene = bpy.context.scene
+    metarig = make_metarig(scene)
+
+    results = {}
+    for name, copy in (("per-key", copy_driver_per_key), ("bulk", copy_driver_bulk)):
+        obj = make_armature(scene, "rig_" + name)
+        start = time.perf_counter()
+        for d1 in metarig.animation_data.drivers:
+            copy(d1, obj, metarig)
+        elapsed = time.perf_counter() - start
+        print("%-8s %d drivers x %d keys: %.3f s" % (name, DRIVERS, KEYS, elapsed))
+        results[name] = keyframes(obj)
+
+    if results["per-key"] != results["bulk"]:
+        print("driver copy: results differ")
+        sys.exit(1)
+    print("driver copy: results match")
+
+
+main()
@@ -0,0 +1,135 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Compares the old temp-rig join with generate.duplicate_metarig() for
+    every shipped metarig, reporting time and peak memory of each method.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/metarig_duplication.py
+"""
+
+import bpy
+import addon_utils
+import resource
+import time
+import tracemalloc
+
+addon_utils.enable("rigify")
+
+from rigify import generate, metarig_menu, utils
+
+
+def new_armature(scene, name):
+    obj = bpy.data.objects.new(name, bpy.data.armatures.new(name))
+    scene.objects.link(obj)
+    return obj
+
+
+def make_active(scene, obj):
+    for objt in scene.objects:
+        objt.select = False
+    obj.select = True
+    scene.objects.active = obj
+
+
+def join_metarig(scene, metarig, obj):
+    """ The duplication generate_rig() used to do: join a copy of the metarig
+        into the rig armature, then copy pose settings and drivers over.
+    """
+    temp_rig_1 = metarig.copy()
+    temp_rig_1.data = metarig.data.copy()
+    scene.objects.link(temp_rig_1)
+
+    temp_rig_2 = metarig.copy()
+    temp_rig_2.data = obj.data
+    scene.objects.link(temp_rig_2)
+
+    for objt in scene.objects:
+        objt.select = False
+    temp_rig_1.select = True
+    temp_rig_2.select = True
+    scene.objects.active = temp_rig_2
+
+    bpy.ops.object.join()
+    bpy.ops.object.delete()
+
+    make_active(scene, obj)
+    for bone in metarig.data.bones:
+        bone_gen = obj.data.bones[bone.name]
+        bone_gen.bbone_segments = bone.bbone_segments
+        bone_gen.bbone_easein = bone.bbone_easein
+        bone_gen.bbone_easeout = bone.bbone_easeout
+
+    generate.copy_metarig_pose(metarig, obj)
+
+
+def measure(func, *args):
+    """ Returns the time, peak Python memory and max RSS growth of a call.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+    return elapsed, peak, rss_growth
+
+
+def run_duplicate(scene, metarig, method):
+    obj = new_armature(scene, "rig")
+    make_active(scene, obj)
+    if method == 'join':
+        result = measure(join_metarig, scene, metarig, obj)
+    else:
+        result = measure(generate.duplicate_metarig, metarig, obj)
+    bones = len(obj.data.bones)
+
+    data = obj.data
+    bpy.data.objects.remove(obj, do_unlink=True)
+    bpy.data.armatures.remove(data)
+    return result, bones
+
+
+def main():
+    scene = bpy.context.scene
+    print("%-20s %-10s %6s %10s %12s %12s" % ("metarig", "method", "bones", "time (s)", "peak py (kB)", "rss +(kB)"))
+
+    for metarig_class, modules in sorted(metarig_menu.metarigs_dict.items()):
+        for name, package in modules:
+            module = utils.get_metarig_module(name, package)
+
+            metarig = new_armature(scene, "metarig")
+            make_active(scene, metarig)
+            bpy.ops.object.mode_set(mode='EDIT')
+            module.create(metarig)
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+            for method in ('join', 'data_api'):
+                (elapsed, peak, rss_growth), bones = run_duplicate(scene, metarig, method)
+                print("%-20s %-10s %6d %10.4f %12.1f %12d" % (name, method, bones, elapsed, peak / 1024, rss_growth))
+
+            data = metarig.data
+            bpy.data.objects.remove(metarig, do_unlink=True)
+            bpy.data.armatures.remove(data)
+
+
+main()
@@ -0,0 +1,92 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Enables the addon in background Blender with the startup profiler on, and
+    compares each phase with a recorded baseline.  Without a baseline file the
+    profile is saved as one.  Exits with an error if a phase is slower than
+    the baseline by more than the tolerance.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/startup_profile.py -- baseline.json [tolerance]
+
+    The tolerance is a ratio, 1.25 by default.
+"""
+
+import addon_utils
+import json
+import os
+import sys
+import tempfile
+
+TOLERANCE = 1.25
+MIN_TIME = 0.005  # Phases faster than this, in seconds, are not compared
+
+
+def get_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("usage: blender --background --factory-startup --python %s -- baseline.json [tolerance]" % __file__)
+        sys.exit(2)
+    return argv[0], float(argv[1]) if len(argv) > 1 else TOLERANCE
+
+
+def profile():
+    report_dir = tempfile.mkdtemp()
+    os.environ["RIGIFY_PROFILE_STARTUP"] = report_dir
+    addon_utils.enable("rigify")
+    with open(os.path.join(report_dir, "rigify_startup_profile.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    baseline_path, tolerance = get_args()
+    report = profile()
+
+    if not os.path.exists(baseline_path):
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print("Baseline saved to %r" % baseline_path)
+        return
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    baseline_phases = {phase['name']: phase for phase in baseline['phases']}
+
+    regressions = 0
+    print("%-30s %10s %10s %8s %8s" % ("Phase", "Base (s)", "Now (s)", "Imports", "Base"))
+    for phase in report['phases']:
+        base = baseline_phases.get(phase['name'])
+        if base is None:
+            print("%-30s %10s %10.4f %8d %8s" % (phase['name'], "-", phase['time'], phase['imports'], "-"))
+            continue
+        slower = phase['time'] > max(base['time'], MIN_TIME) * tolerance
+        print("%-30s %10.4f %10.4f %8d %8d%s" % (phase['name'], base['time'], phase['time'],
+                                                  phase['imports'], base['imports'],
+                                                  "  SLOWER" if slower else ""))
+        regressions += slower
+
+    print("%-30s %10.4f %10.4f" % ("Total", baseline['total_time'], report['total_time']))
+    if regressions:
+        print("startup profile: %d phases slower than the baseline" % regressions)
+        sys.exit(1)
+    print("startup profile: no phase slower than the baseline")
+
+
+main()
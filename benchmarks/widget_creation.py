@@ -0,0 +1,93 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Times filling 10k widget meshes with the old per-vertex tuple lists and
+    from_pydata(), against the precomputed arrays and utils.fill_widget_mesh().
+    Each mesh gets a different radius, as unshared widgets would.  Exits with
+    an error if the two meshes differ.
+
+    Run with:
+        blender --background --factory-startup --python benchmarks/widget_creation.py [-- count]
+"""
+
+import bpy
+import addon_utils
+import sys
+import time
+
+addon_utils.enable("rigify")
+
+from rigify import utils
+
+COUNT = 10000
+SHAPES = ("circle", "neck_tweak")
+
+
+def fill_from_pydata(mesh, shape, radius):
+    """ The tuple list construction rigify used before the widget arrays.
+    """
+    if shape == "circle":
+        verts = [(a[0] * radius, 0.5, a[2] * radius) for a in utils.CIRCLE_VERTS.tolist()]
+        edges = [tuple(e) for e in utils.CIRCLE_EDGES.tolist()]
+    else:
+        verts = [(a[0] * radius, a[1] * radius, a[2] * radius) for a in utils.NECK_TWEAK_VERTS.tolist()]
+        edges = [tuple(e) for e in utils.NECK_TWEAK_EDGES.tolist()]
+    mesh.from_pydata(verts, edges, [])
+    mesh.update()
+
+
+def fill_from_arrays(mesh, shape, radius):
+    if shape == "circle":
+        verts = utils.CIRCLE_VERTS * (radius, 0, radius) + (0, 0.5, 0)
+        utils.fill_widget_mesh(mesh, verts, utils.CIRCLE_EDGES)
+    else:
+        utils.fill_widget_mesh(mesh, utils.NECK_TWEAK_VERTS * radius, utils.NECK_TWEAK_EDGES)
+
+
+def run(name, fill, count):
+    meshes = [bpy.data.meshes.new("%s_%d" % (name, i)) for i in range(count)]
+    start = time.perf_counter()
+    for i, mesh in enumerate(meshes):
+        fill(mesh, SHAPES[i % len(SHAPES)], 1.0 + i * 1e-4)
+    elapsed = time.perf_counter() - start
+    print("%-10s %6d widgets in %.4f s" % (name, count, elapsed))
+    return meshes, elapsed
+
+
+def coords(mesh):
+    return [tuple(round(c, 5) for c in v.co) for v in mesh.vertices], [tuple(e.vertices) for e in mesh.edges]
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    count = int(argv[0]) if argv else COUNT
+
+    old_meshes, old_time = run("from_pydata", fill_from_pydata, count)
+    new_meshes, new_time = run("arrays", fill_from_arrays, count)
+    print("speedup: %.2fx" % (old_time / new_time))
+
+    for old, new in zip(old_meshes, new_meshes):
+        if coords(old) != coords(new):
+            print("widget_creation: mesh %r differs from %r" % (new.name, old.name))
+            sys.exit(1)
+    print("widget_creation: meshes match")
+
+
+main()
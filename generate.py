@@ -19,19 +19,24 @@
 # <pep8 compliant>
 
 import bpy
+import numpy as np
 import re
 import time
 import traceback
 import sys
 from rna_prop_ui import rna_idprop_ui_prop_get
 
-from .utils import MetarigError, new_bone, get_rig_type
+from .utils import MetarigError, new_bone, get_rig_type, get_rig_parameter_names
+from .utils import begin_session, end_session, abort_session, set_mode, BoneIndex
 from .utils import ORG_PREFIX, MCH_PREFIX, DEF_PREFIX, WGT_PREFIX, ROOT_NAME, make_original_name
-from .utils import RIG_DIR
-from .utils import create_root_widget
+from .utils import RIG_DIR, MODULE_NAME
+from .utils import create_root_widget, use_unlinked_widgets, get_widget_objects, remove_widgets
+from .utils import use_widget_reconciliation, remove_orphan_widgets
 from .utils import random_id
-from .utils import copy_attributes
+from .utils import copy_attributes, copy_driver, copy_rest_bone, get_copy_plan
 from .utils import gamma_correct
+from .rig_cache import RigCache
+from . import rig_lists
 from .rig_ui_template import UI_SLIDERS, layers_ui, UI_REGISTER
 
 
@@ -42,6 +47,27 @@ DEF_LAYER = [n == 29 for n in range(0, 32)]  # Armature layer that deformation b
 ROOT_LAYER = [n == 28 for n in range(0, 32)]  # Armature layer that root bone should be moved to.
 WGT_LAYERS = [x == 19 for x in range(0, 20)]  # Widgets go on the last scene layer.
 
+PROPERTY_TARGET = re.compile('^pose.bones\["([^"\]]*)"\]\["([^"\]]*)"\]$')  # Driver target path of a bone property
+TARGET_MARK = "RIGIFY-"  # Prefix of driver targets to alter after rig generation
+
+# Pose bone settings copy_metarig_pose() doesn't copy from the metarig: the
+# pose itself, and the rig type, copied with its parameters
+METARIG_POSE_EXCLUDED = {'name', 'location', 'rotation_euler', 'rotation_quaternion', 'rotation_axis_angle',
+                         'scale', 'matrix', 'matrix_basis', 'rigify_type'}
+
+# Stages of rig generation, in the order they are run across all rigs, and
+# the mode each of them needs.  Rigs opt in to staged generation by setting
+# STAGED_GENERATION = True, and take part in a stage by defining a method
+# with the stage's name.  The UI script is collected afterwards from
+# generate_ui().
+GENERATE_STAGES = (
+    ('generate_bones', 'EDIT'),         # Create and place bones
+    ('parent_bones', 'EDIT'),           # Parenting between bones
+    ('generate_constraints', 'OBJECT'), # Pose bone settings and constraints
+    ('generate_drivers', 'OBJECT'),     # Custom properties and drivers
+    ('generate_widgets', 'OBJECT'),     # Widgets for the controls
+)
+
 
 class Timer:
     def __init__(self):
@@ -57,6 +83,18 @@ class Timer:
 def generate_rig(context, metarig):
     """ Generates a rig from a metarig.
 
+    """
+    try:
+        generate_rig_session(context, metarig)
+    finally:
+        # Don't leave a session of a failed generation behind, it would
+        # affect mode switches and bone copies made afterwards
+        abort_session()
+
+
+def generate_rig_session(context, metarig):
+    """ Does the work of generate_rig(), which ends the generation session
+        whatever happens.
     """
     t = Timer()
 
@@ -73,6 +111,11 @@ def generate_rig(context, metarig):
 
     scene = context.scene
     id_store = context.window_manager
+
+    # Make sure the parameters of the rig types used are registered
+    for pbone in metarig.pose.bones:
+        rig_lists.ensure_rig_parameters(pbone.rigify_type)
+
     #------------------------------------------
     # Create/find the rig object and set it up
 
@@ -83,6 +126,7 @@ def generate_rig(context, metarig):
 
     rig_new_name = ""
     rig_old_name = ""
+    rig_exists = False
     if id_store.rigify_rig_basename:
         rig_new_name = id_store.rigify_rig_basename + "_rig"
 
@@ -91,6 +135,7 @@ def generate_rig(context, metarig):
         try:
             obj = scene.objects[name]
             rig_old_name = name
+            rig_exists = True
             obj.name = rig_new_name or name
         except KeyError:
             rig_old_name = name
@@ -107,6 +152,14 @@ def generate_rig(context, metarig):
     id_store.rigify_target_rig = obj.name
     obj.data.pose_position = 'POSE'
 
+    # Find the rigs that didn't change since the last generation, and keep
+    # the old rig around to restore their output from.  What rigs generate
+    # is only recorded when overwriting, for the next regeneration.
+    cache = RigCache(obj, metarig, recording=rig_exists)
+    cache.take_snapshot(id_store.rigify_generate_mode == 'overwrite' and not id_store.rigify_force_widget_update)
+    if cache.clean:
+        print("Reusing %d unchanged rigs." % len(cache.clean))
+
     # Get rid of anim data in case the rig already existed
     print("Clear rig animation data.")
     obj.animation_data_clear()
@@ -116,22 +169,18 @@ def generate_rig(context, metarig):
     obj.select = True
     scene.objects.active = obj
 
+    # From here on, mode switches of the rig go through the session
+    session = begin_session(obj)
+
     # Remove wgts if force update is set
     wgts_group_name = "WGTS_" + (rig_old_name or obj.name)
-    if wgts_group_name in scene.objects and id_store.rigify_force_widget_update:
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.select_all(action='DESELECT')
-        for i, lyr in enumerate(WGT_LAYERS):
-            if lyr:
-                context.scene.layers[i] = True
-        for wgt in bpy.data.objects[wgts_group_name].children:
-            wgt.select = True
-        bpy.ops.object.delete(use_global=False)
-        for i, lyr in enumerate(WGT_LAYERS):
-            if lyr:
-                context.scene.layers[i] = False
+    if id_store.rigify_force_widget_update:
+        remove_widgets(get_widget_objects(wgts_group_name))
         if rig_old_name:
-            bpy.data.objects[wgts_group_name].name = "WGTS_" + obj.name
+            if wgts_group_name in bpy.data.objects:
+                bpy.data.objects[wgts_group_name].name = "WGTS_" + obj.name
+            if wgts_group_name in bpy.data.groups:
+                bpy.data.groups[wgts_group_name].name = "WGTS_" + obj.name
 
     wgts_group_name = "WGTS_" + obj.name
 
@@ -141,130 +190,14 @@ def generate_rig(context, metarig):
         childs[child] = child.parent_bone
 
     # Remove all bones from the generated rig armature.
-    bpy.ops.object.mode_set(mode='EDIT')
+    session.set_mode('EDIT')
     for bone in obj.data.edit_bones:
         obj.data.edit_bones.remove(bone)
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # Create temporary duplicates for merging
-    temp_rig_1 = metarig.copy()
-    temp_rig_1.data = metarig.data.copy()
-    scene.objects.link(temp_rig_1)
-
-    temp_rig_2 = metarig.copy()
-    temp_rig_2.data = obj.data
-    scene.objects.link(temp_rig_2)
-
-    # Select the temp rigs for merging
-    for objt in scene.objects:
-        objt.select = False  # deselect all objects
-    temp_rig_1.select = True
-    temp_rig_2.select = True
-    scene.objects.active = temp_rig_2
-
-    # Merge the temporary rigs
-    bpy.ops.object.join()
-
-    # Delete the second temp rig
-    bpy.ops.object.delete()
-
-    # Select the generated rig
-    for objt in scene.objects:
-        objt.select = False  # deselect all objects
-    obj.select = True
-    scene.objects.active = obj
+    session.bones.clear()
+    session.set_mode('OBJECT')
 
-    # Copy over bone properties
-    for bone in metarig.data.bones:
-        bone_gen = obj.data.bones[bone.name]
-
-        # B-bone stuff
-        bone_gen.bbone_segments = bone.bbone_segments
-        bone_gen.bbone_easein = bone.bbone_easein
-        bone_gen.bbone_easeout = bone.bbone_easeout
-
-    # Copy over the pose_bone properties
-    for bone in metarig.pose.bones:
-        bone_gen = obj.pose.bones[bone.name]
-
-        # Rotation mode and transform locks
-        bone_gen.rotation_mode = bone.rotation_mode
-        bone_gen.lock_rotation = tuple(bone.lock_rotation)
-        bone_gen.lock_rotation_w = bone.lock_rotation_w
-        bone_gen.lock_rotations_4d = bone.lock_rotations_4d
-        bone_gen.lock_location = tuple(bone.lock_location)
-        bone_gen.lock_scale = tuple(bone.lock_scale)
-
-        # rigify_type and rigify_parameters
-        bone_gen.rigify_type = bone.rigify_type
-        for prop in dir(bone_gen.rigify_parameters):
-            if (not prop.startswith("_")) \
-            and (not prop.startswith("bl_")) \
-            and (prop != "rna_type"):
-                try:
-                    setattr(bone_gen.rigify_parameters, prop, \
-                            getattr(bone.rigify_parameters, prop))
-                except AttributeError:
-                    print("FAILED TO COPY PARAMETER: " + str(prop))
-
-        # Custom properties
-        for prop in bone.keys():
-            try:
-                bone_gen[prop] = bone[prop]
-            except KeyError:
-                pass
-
-        # Constraints
-        for con1 in bone.constraints:
-            con2 = bone_gen.constraints.new(type=con1.type)
-            copy_attributes(con1, con2)
-
-            # Set metarig target to rig target
-            if "target" in dir(con2):
-                if con2.target == metarig:
-                    con2.target = obj
-
-    # Copy drivers
-    if metarig.animation_data:
-        for d1 in metarig.animation_data.drivers:
-            d2 = obj.driver_add(d1.data_path)
-            copy_attributes(d1, d2)
-            copy_attributes(d1.driver, d2.driver)
-
-            # Remove default modifiers, variables, etc.
-            for m in d2.modifiers:
-                d2.modifiers.remove(m)
-            for v in d2.driver.variables:
-                d2.driver.variables.remove(v)
-
-            # Copy modifiers
-            for m1 in d1.modifiers:
-                m2 = d2.modifiers.new(type=m1.type)
-                copy_attributes(m1, m2)
-
-            # Copy variables
-            for v1 in d1.driver.variables:
-                v2 = d2.driver.variables.new()
-                copy_attributes(v1, v2)
-                for i in range(len(v1.targets)):
-                    copy_attributes(v1.targets[i], v2.targets[i])
-                    # Switch metarig targets to rig targets
-                    if v2.targets[i].id == metarig:
-                        v2.targets[i].id = obj
-
-                    # Mark targets that may need to be altered after rig generation
-                    tar = v2.targets[i]
-                    # If a custom property
-                    if v2.type == 'SINGLE_PROP' \
-                    and re.match('^pose.bones\["[^"\]]*"\]\["[^"\]]*"\]$', tar.data_path):
-                        tar.data_path = "RIGIFY-" + tar.data_path
-
-            # Copy key frames
-            for i in range(len(d1.keyframe_points)):
-                d2.keyframe_points.add()
-                k1 = d1.keyframe_points[i]
-                k2 = d2.keyframe_points[i]
-                copy_attributes(k1, k2)
+    # Copy the metarig into the rig
+    duplicate_metarig(metarig, obj)
 
     t.tick("Duplicate rig: ")
     #----------------------------------
@@ -272,7 +205,7 @@ def generate_rig(context, metarig):
     original_bones = [bone.name for bone in obj.data.bones]
 
     # Add the ORG_PREFIX to the original bones.
-    bpy.ops.object.mode_set(mode='OBJECT')
+    session.set_mode('OBJECT')
     for i in range(0, len(original_bones)):
         obj.data.bones[original_bones[i]].name = make_original_name(original_bones[i])
         original_bones[i] = make_original_name(original_bones[i])
@@ -280,16 +213,13 @@ def generate_rig(context, metarig):
     # Create a sorted list of the original bones, sorted in the order we're
     # going to traverse them for rigging.
     # (root-most -> leaf-most, alphabetical)
-    bones_sorted = []
-    for name in original_bones:
-        bones_sorted += [name]
-    bones_sorted.sort()  # first sort by names
-    bones_sorted.sort(key=lambda bone: len(obj.pose.bones[bone].parent_recursive))  # then parents before children
+    session.org_index = BoneIndex(obj.data.bones)
+    bones_sorted = session.org_index.breadth_first()
 
     t.tick("Make list of org bones: ")
     #----------------------------------
     # Create the root bone.
-    bpy.ops.object.mode_set(mode='EDIT')
+    session.set_mode('EDIT')
     root_bone = new_bone(obj, ROOT_NAME)
     spread = get_xy_spread(metarig.data.bones) or metarig.data.bones[0].length
     spread = float('%.3g' % spread)
@@ -297,7 +227,7 @@ def generate_rig(context, metarig):
     obj.data.edit_bones[root_bone].head = (0, 0, 0)
     obj.data.edit_bones[root_bone].tail = (0, scale, 0)
     obj.data.edit_bones[root_bone].roll = 0
-    bpy.ops.object.mode_set(mode='OBJECT')
+    session.set_mode('OBJECT')
     obj.data.bones[root_bone].layers = ROOT_LAYER
 
     # Put the rig_name in the armature custom properties
@@ -308,7 +238,7 @@ def generate_rig(context, metarig):
 
     # Create Group widget
     # wgts_group_name = "WGTS"
-    if wgts_group_name not in scene.objects:
+    if wgts_group_name not in scene.objects and not use_unlinked_widgets():
         if wgts_group_name in bpy.data.objects:
             bpy.data.objects[wgts_group_name].user_clear()
             bpy.data.objects.remove(bpy.data.objects[wgts_group_name])
@@ -333,36 +263,60 @@ def generate_rig(context, metarig):
     #----------------------------------
     try:
         # Collect/initialize all the rigs.
-        rigs = []
+        rigs = []  # [(bone, rig)]
+        session.set_mode('EDIT')
         for bone in bones_sorted:
-            bpy.ops.object.mode_set(mode='EDIT')
-            rigs += get_bone_rigs(obj, bone)
+            cached_rig = cache.cached_rig(bone)
+            if cached_rig is not None:
+                rigs += [(bone, cached_rig)]
+            else:
+                rigs += [(bone, rig) for rig in get_bone_rigs(obj, bone)]
         t.tick("Initialize rigs: ")
 
-        # Generate all the rigs.
+        # Generate all the rigs, one stage at a time.
+        rigs = [(bone, rig if is_staged_rig(rig) else LegacyRig(rig)) for bone, rig in rigs]
+        for stage, mode in GENERATE_STAGES:
+            for bone, rig in rigs:
+                method = getattr(rig, stage, None)
+                if method is None:
+                    continue
+                # Go into the stage's mode in the rig armature
+                if context.scene.objects.active != obj:
+                    bpy.ops.object.mode_set(mode='OBJECT')
+                    context.scene.objects.active = obj
+                    obj.select = True
+                session.set_mode(mode)
+                session.driving = drives_session_mode(rig)
+                if bone in cache.clean:
+                    method()
+                else:
+                    cache.begin()
+                    method()
+                    cache.end(bone)
+            t.tick("Generate rigs, %s: " % stage)
+        session.driving = True
+
         ui_scripts = []
-        for rig in rigs:
-            # Go into editmode in the rig armature
-            bpy.ops.object.mode_set(mode='OBJECT')
-            context.scene.objects.active = obj
-            obj.select = True
-            bpy.ops.object.mode_set(mode='EDIT')
-            scripts = rig.generate()
-            if scripts is not None:
-                ui_scripts += [scripts[0]]
-        t.tick("Generate rigs: ")
+        for bone, rig in rigs:
+            if hasattr(rig, 'generate_ui'):
+                script = rig.generate_ui()
+                if script is not None:
+                    ui_scripts += [script]
+                    cache.set_script(bone, script)
     except Exception as e:
         # Cleanup if something goes wrong
         print("Rigify: failed to generate rig.")
         metarig.data.pose_position = rest_backup
         obj.data.pose_position = 'POSE'
-        bpy.ops.object.mode_set(mode='OBJECT')
+        session.set_mode('OBJECT')
+        end_session()
+        cache.free_snapshot()
 
         # Continue the exception
         raise e
 
     #----------------------------------
-    bpy.ops.object.mode_set(mode='OBJECT')
+    session.set_mode('OBJECT')
 
     # Get a list of all the bones in the armature
     bones = [bone.name for bone in obj.data.bones]
@@ -387,7 +341,7 @@ def generate_rig(context, metarig):
             if bone in d:
                 noparent_bones += [bone]
 
-    bpy.ops.object.mode_set(mode='EDIT')
+    session.set_mode('EDIT')
     for bone in bones:
         if bone in noparent_bones:
             continue
@@ -395,76 +349,37 @@ def generate_rig(context, metarig):
             obj.data.edit_bones[bone].use_connect = False
             obj.data.edit_bones[bone].parent = obj.data.edit_bones[root_bone]
 
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # Lock transforms on all non-control bones
-    r = re.compile("[A-Z][A-Z][A-Z]-")
-    for bone in bones:
-        if r.match(bone):
-            pb = obj.pose.bones[bone]
-            pb.lock_location = (True, True, True)
-            pb.lock_rotation = (True, True, True)
-            pb.lock_rotation_w = True
-            pb.lock_scale = (True, True, True)
+    session.set_mode('OBJECT')
 
-    # Every bone that has a name starting with "DEF-" make deforming.  All the
-    # others make non-deforming.
-    for bone in bones:
-        if obj.data.bones[bone].name.startswith(DEF_PREFIX):
-            obj.data.bones[bone].use_deform = True
-        else:
-            obj.data.bones[bone].use_deform = False
+    # Lock transforms, deform flags and layers of the bones in one pass
+    vis_layers = finalize_bones(obj, original_bones)
+    obj.data.layers = vis_layers
 
     # Alter marked driver targets
     if obj.animation_data:
-        for d in obj.animation_data.drivers:
-            for v in d.driver.variables:
-                for tar in v.targets:
-                    if tar.data_path.startswith("RIGIFY-"):
-                        temp, bone, prop = tuple([x.strip('"]') for x in tar.data_path.split('["')])
-                        if bone in obj.data.bones \
-                        and prop in obj.pose.bones[bone].keys():
-                            tar.data_path = tar.data_path[7:]
-                        else:
-                            tar.data_path = 'pose.bones["%s"]["%s"]' % (make_original_name(bone), prop)
-
-    # Move all the original bones to their layer.
-    for bone in original_bones:
-        obj.data.bones[bone].layers = ORG_LAYER
-
-    # Move all the bones with names starting with "MCH-" to their layer.
-    for bone in bones:
-        if obj.data.bones[bone].name.startswith(MCH_PREFIX):
-            obj.data.bones[bone].layers = MCH_LAYER
-
-    # Move all the bones with names starting with "DEF-" to their layer.
-    for bone in bones:
-        if obj.data.bones[bone].name.startswith(DEF_PREFIX):
-            obj.data.bones[bone].layers = DEF_LAYER
+        resolve_property_targets(obj)
 
     # Create root bone widget
     create_root_widget(obj, "root")
 
+    # Move all the widgets to their bones
+    session.place_widgets()
+    t.tick("Place widgets: ")
+
+    # Delete the widgets of bones that are gone or no longer have one
+    if use_widget_reconciliation() and not id_store.rigify_force_widget_update:
+        print("Removed %d orphan widgets." % remove_orphan_widgets(obj, wgts_group_name, session.widgets))
+
     # Assign shapes to bones
     # Object's with name WGT-<bone_name> get used as that bone's shape.
-    for bone in bones:
-        wgt_name = (WGT_PREFIX + obj.name + '_' + obj.data.bones[bone].name)[:63]  # Object names are limited to 63 characters... arg
-        if wgt_name in context.scene.objects:
-            # Weird temp thing because it won't let me index by object name
-            for ob in context.scene.objects:
-                if ob.name == wgt_name:
-                    obj.pose.bones[bone].custom_shape = ob
-                    break
-            # This is what it should do:
-            # obj.pose.bones[bone].custom_shape = context.scene.objects[wgt_name]
-    # Reveal all the layers with control bones on them
-    vis_layers = [False for n in range(0, 32)]
-    for bone in bones:
-        for i in range(0, 32):
-            vis_layers[i] = vis_layers[i] or obj.data.bones[bone].layers[i]
-    for i in range(0, 32):
-        vis_layers[i] = vis_layers[i] and not (ORG_LAYER[i] or MCH_LAYER[i] or DEF_LAYER[i])
-    obj.data.layers = vis_layers
+    if use_unlinked_widgets():
+        widgets = get_widget_index(get_widget_objects(wgts_group_name), WGT_PREFIX + obj.name + '_')
+    else:
+        widgets = get_widget_index(context.scene.objects, WGT_PREFIX + obj.name + '_')
+    for pbone in obj.pose.bones:
+        wgt_name = (WGT_PREFIX + obj.name + '_' + pbone.name)[:63]  # Object names are limited to 63 characters... arg
+        if wgt_name in widgets:
+            pbone.custom_shape = widgets[wgt_name]
 
     # Ensure the collection of layer names exists
     for i in range(1 + len(metarig.data.rigify_layers), 29):
@@ -525,10 +440,13 @@ def generate_rig(context, metarig):
         ctrl.text = bpy.data.texts[script.name]
 
 
-    t.tick("The rest: ")
+    t.tick("The rest (%d mode switches): " % session.mode_switches)
     #----------------------------------
     # Deconfigure
-    bpy.ops.object.mode_set(mode='OBJECT')
+    session.set_mode('OBJECT')
+    end_session()
+    cache.save()
+    cache.free_snapshot()
     metarig.data.pose_position = rest_backup
     obj.data.pose_position = 'POSE'
 
@@ -539,6 +457,210 @@ def generate_rig(context, metarig):
             child.parent_bone = sub_parent
             child.matrix_world = mat
 
+
+def duplicate_metarig(metarig, obj):
+    """ Copies the bones of the metarig into the empty armature of obj, along
+        with their pose settings, rigify parameters, constraints and drivers.
+        obj must be the active object.
+    """
+    # Bones, in rest position
+    set_mode('EDIT')
+    for bone in metarig.data.bones:
+        copy_rest_bone(obj, bone)
+
+    edit_bones = obj.data.edit_bones
+    for bone in metarig.data.bones:
+        if bone.parent:
+            edit_bones[bone.name].parent = edit_bones[bone.parent.name]
+            edit_bones[bone.name].use_connect = bone.use_connect
+    set_mode('OBJECT')
+
+    copy_metarig_pose(metarig, obj)
+
+
+def copy_metarig_pose(metarig, obj):
+    """ Copies the pose settings, rigify parameters, constraints and drivers
+        of the metarig, and the custom properties of its bones, onto the
+        bones of the same name in obj.
+    """
+    pbones = obj.pose.bones
+    plan = None
+
+    # Copy over the pose_bone properties
+    for bone in metarig.pose.bones:
+        bone_gen = pbones[bone.name]
+
+        # Pose channel settings: rotation mode, locks, IK limits, custom
+        # shape, bbone values...  Bone pointers go to the bone of the same name.
+        if plan is None:
+            props = bone.bl_rna.properties
+            plan = [key for key in get_copy_plan(bone)
+                    if key not in METARIG_POSE_EXCLUDED and props[key].type != 'POINTER']
+        for key in plan:
+            try:
+                setattr(bone_gen, key, getattr(bone, key))
+            except AttributeError:
+                pass
+
+        bone_gen.custom_shape = bone.custom_shape
+        if bone.custom_shape_transform:
+            bone_gen.custom_shape_transform = pbones.get(bone.custom_shape_transform.name)
+        if bone.bone_group:
+            bone_gen.bone_group = copy_bone_group(bone.bone_group, obj)
+
+        # rigify_type and rigify_parameters
+        bone_gen.rigify_type = bone.rigify_type
+        if bone.rigify_type:
+            # Only the parameters of the bone's rig type, if they are known
+            params = get_rig_parameter_names(bone.rigify_type)
+            if params is None:
+                params = dir(bone_gen.rigify_parameters)
+            for prop in params:
+                if (not prop.startswith("_")) \
+                and (not prop.startswith("bl_")) \
+                and (prop != "rna_type"):
+                    try:
+                        setattr(bone_gen.rigify_parameters, prop, \
+                                getattr(bone.rigify_parameters, prop))
+                    except AttributeError:
+                        print("FAILED TO COPY PARAMETER: " + str(prop))
+
+        # Custom properties
+        for prop in bone.keys():
+            try:
+                bone_gen[prop] = bone[prop]
+            except KeyError:
+                pass
+
+        # Constraints
+        for con1 in bone.constraints:
+            con2 = bone_gen.constraints.new(type=con1.type)
+            copy_attributes(con1, con2)
+
+            # Set metarig target to rig target
+            if "target" in dir(con2):
+                if con2.target == metarig:
+                    con2.target = obj
+
+    # Custom properties of the bones themselves
+    bones = obj.data.bones
+    for bone in metarig.data.bones:
+        bone_gen = bones[bone.name]
+        for prop in bone.keys():
+            bone_gen[prop] = bone[prop]
+
+    # Copy drivers
+    if metarig.animation_data:
+        drivers = [copy_driver(d1, obj, metarig) for d1 in metarig.animation_data.drivers]
+
+        # Mark targets that may need to be altered after rig generation
+        mark_property_targets(drivers)
+
+
+def copy_bone_group(group, obj):
+    """ Returns the bone group of obj with the name of group, which is made
+        with the same colors if obj doesn't have it.
+    """
+    groups = obj.pose.bone_groups
+    group_gen = groups.get(group.name)
+    if group_gen is None:
+        group_gen = groups.new(group.name)
+        group_gen.color_set = group.color_set
+        if group.color_set == 'CUSTOM':
+            group_gen.colors.normal = group.colors.normal
+            group_gen.colors.select = group.colors.select
+            group_gen.colors.active = group.colors.active
+            group_gen.colors.show_colored_constraints = group.colors.show_colored_constraints
+    return group_gen
+
+
+def mark_property_targets(drivers):
+    """ Marks the driver targets that are custom properties of bones, as
+        the property may end up on a different bone once the rig is generated.
+    """
+    targets = [tar for d in drivers for v in d.driver.variables if v.type == 'SINGLE_PROP'
+               for tar in v.targets]
+    for tar in targets:
+        if PROPERTY_TARGET.match(tar.data_path):
+            tar.data_path = TARGET_MARK + tar.data_path
+
+
+def resolve_property_targets(obj):
+    """ Points the marked driver targets of obj at the generated bone that
+        has the property, or at the ORG bone if no bone of that name has it.
+    """
+    targets = [tar for d in obj.animation_data.drivers for v in d.driver.variables
+               for tar in v.targets if tar.data_path.startswith(TARGET_MARK)]
+    pbones = obj.pose.bones
+    for tar in targets:
+        data_path = tar.data_path[len(TARGET_MARK):]
+        match = PROPERTY_TARGET.match(data_path)
+        if match is None:
+            continue
+        bone, prop = match.groups()
+        if bone in pbones and prop in pbones[bone].keys():
+            tar.data_path = data_path
+        else:
+            tar.data_path = 'pose.bones["%s"]["%s"]' % (make_original_name(bone), prop)
+
+
+def get_widget_index(objects, prefix):
+    """ Returns {name: object} for the objects whose name starts with prefix.
+    """
+    return {ob.name: ob for ob in objects if ob.name.startswith(prefix)}
+
+
+def finalize_bones(obj, original_bones):
+    """ Locks the transforms of non-control bones, makes only DEF- bones
+        deforming, and moves ORG, MCH and DEF bones to their layers.
+        Each bone is classified once, and the settings are written in bulk.
+        Returns the layers with control bones on them.
+    """
+    bones = obj.data.bones
+    count = len(bones)
+    originals = set(original_bones)
+    is_org = np.zeros(count, dtype=bool)
+    is_mch = np.zeros(count, dtype=bool)
+    is_def = np.zeros(count, dtype=bool)
+    for i, bone in enumerate(bones):
+        name = bone.name
+        if name.startswith(DEF_PREFIX):
+            is_def[i] = True
+        elif name.startswith(MCH_PREFIX):
+            is_mch[i] = True
+        elif name in originals:
+            is_org[i] = True
+
+    # Every bone that has a name starting with "DEF-" make deforming.  All the
+    # others make non-deforming.
+    bones.foreach_set("use_deform", is_def)
+
+    # Move the original, mechanism and deformation bones to their layers.
+    layers = np.zeros(count * 32, dtype=bool)
+    bones.foreach_get("layers", layers)
+    layers = layers.reshape(count, 32)
+    layers[is_org] = ORG_LAYER
+    layers[is_mch] = MCH_LAYER
+    layers[is_def] = DEF_LAYER
+    bones.foreach_set("layers", layers.ravel())
+
+    # Lock transforms on all non-control bones
+    r = re.compile("[A-Z][A-Z][A-Z]-")
+    pbones = obj.pose.bones
+    locked = np.array([bool(r.match(pbone.name)) for pbone in pbones], dtype=bool)
+    for prop, size in (('lock_location', 3), ('lock_rotation', 3), ('lock_rotation_w', 1), ('lock_scale', 3)):
+        locks = np.zeros(len(pbones) * size, dtype=bool)
+        pbones.foreach_get(prop, locks)
+        locks = locks.reshape(len(pbones), size)
+        locks[locked] = True
+        pbones.foreach_set(prop, locks.ravel())
+
+    # Reveal all the layers with control bones on them
+    hidden = np.array(ORG_LAYER) | np.array(MCH_LAYER) | np.array(DEF_LAYER)
+    vis_layers = layers.any(axis=0) & ~hidden
+    return [bool(v) for v in vis_layers]
+
+
 def create_selection_sets(obj, metarig):
 
     # Check if selection sets addon is installed
@@ -546,7 +668,7 @@ def create_selection_sets(obj, metarig):
             and 'bone_selection_sets' not in bpy.context.user_preferences.addons:
         return
 
-    bpy.ops.object.mode_set(mode='POSE')
+    set_mode('POSE')
 
     bpy.context.scene.objects.active = obj
     obj.select = True
@@ -577,7 +699,7 @@ def create_selection_sets(obj, metarig):
 
 def create_bone_groups(obj, metarig):
 
-    bpy.ops.object.mode_set(mode='OBJECT')
+    set_mode('OBJECT')
     pb = obj.pose.bones
     layers = metarig.data.rigify_layers
     groups = metarig.data.rigify_colors
@@ -608,6 +730,43 @@ def create_bone_groups(obj, metarig):
             b.bone_group = obj.pose.bone_groups[name]
 
 
+def is_staged_rig(rig):
+    """ Returns True if the rig implements the staged generation protocol
+        (see GENERATE_STAGES) rather than a single generate() method.
+        Rigs have to opt in, since older rigs may have helper methods
+        named like a stage.
+    """
+    return getattr(rig, 'STAGED_GENERATION', False)
+
+
+def drives_session_mode(rig):
+    """ Returns True if the rig only switches modes through the generation
+        session, which is the case of the rigs shipped with rigify.  Other
+        rigs may call the mode_set operator, so the session must not hold
+        pose bone work back while they run.
+    """
+    if isinstance(rig, LegacyRig):
+        rig = rig.rig
+    return type(rig).__module__.startswith(MODULE_NAME + '.')
+
+
+class LegacyRig:
+    """ Adapter running a rig that only implements generate() as part of
+        the first generation stage.
+    """
+    def __init__(self, rig):
+        self.rig = rig
+        self.scripts = None
+
+    def generate_bones(self):
+        self.scripts = self.rig.generate()
+
+    def generate_ui(self):
+        if self.scripts is not None:
+            return self.scripts[0]
+        return None
+
+
 def get_bone_rigs(obj, bone_name, halt_on_missing=False):
     """ Fetch all the rigs specified on a bone.
     """
@@ -24,6 +24,7 @@ from string import capwords
 import bpy
 
 from . import utils
+from . import rig_lists
 
 
 class ArmatureSubMenu(bpy.types.Menu):
@@ -38,8 +39,8 @@ class ArmatureSubMenu(bpy.types.Menu):
 
 
 def get_metarig_list(path, depth=0):
-    """ Searches for metarig modules, and returns a list of the
-        imported modules.
+    """ Searches for metarig modules, and returns a list of
+        (module name, package) pairs.  The modules are not imported.
     """
     metarigs = []
     metarigs_dict = dict()
@@ -63,13 +64,10 @@ def get_metarig_list(path, depth=0):
             continue
         else:
             module_name = f[:-3]
-            try:
-                if depth == 1:
-                    metarigs += [utils.get_metarig_module(module_name, utils.METARIG_DIR + '.' + path)]
-                else:
-                    metarigs += [utils.get_metarig_module(module_name, utils.METARIG_DIR)]
-            except (ImportError):
-                pass
+            if depth == 1:
+                metarigs += [(module_name, utils.METARIG_DIR + '.' + path)]
+            else:
+                metarigs += [(module_name, utils.METARIG_DIR)]
 
     if depth == 1:
         return metarigs
@@ -78,10 +76,17 @@ def get_metarig_list(path, depth=0):
     return metarigs_dict
 
 
-def make_metarig_add_execute(m):
+def make_metarig_add_execute(module_name, package):
     """ Create an execute method for a metarig creation operator.
+        The metarig module is only imported when the operator runs.
     """
     def execute(self, context):
+        try:
+            m = utils.get_metarig_module(module_name, package)
+        except ImportError as e:
+            self.report({'ERROR'}, "Could not load metarig '%s': %s" % (module_name, e))
+            return {'CANCELLED'}
+
         # Add armature object
         bpy.ops.object.armature_add()
         obj = context.active_object
@@ -93,7 +98,8 @@ def make_metarig_add_execute(m):
         bones = context.active_object.data.edit_bones
         bones.remove(bones[0])
 
-        # Create metarig
+        # Create metarig, which may set the parameters of any rig type
+        rig_lists.ensure_all_rig_parameters()
         m.create(obj)
 
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -124,15 +130,13 @@ armature_submenus = []
 metarig_ops = {}
 for metarig_class in metarigs_dict:
     metarig_ops[metarig_class] = []
-    for m in metarigs_dict[metarig_class]:
-        name = m.__name__.rsplit('.', 1)[1]
-
+    for name, package in metarigs_dict[metarig_class]:
         # Dynamically construct an Operator
         T = type("Add_" + name + "_Metarig", (bpy.types.Operator,), {})
         T.bl_idname = "object.armature_" + name + "_metarig_add"
         T.bl_label = "Add " + name.replace("_", " ").capitalize() + " (metarig)"
         T.bl_options = {'REGISTER', 'UNDO'}
-        T.execute = make_metarig_add_execute(m)
+        T.execute = make_metarig_add_execute(name, package)
 
         metarig_ops[metarig_class].append((T, name))
 
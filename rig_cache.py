@@ -0,0 +1,376 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Incremental regeneration support.
+
+    Every rig instance is fingerprinted from its ORG subtree, rig type,
+    parameters and code.  The generated rig remembers the fingerprint and the
+    output (bones, constraints on ORG bones, UI script) of each rig instance,
+    when generating over an existing rig.  When regenerating in 'overwrite' mode, rigs whose fingerprint did not
+    change are not run again: their previous output is copied back from a
+    snapshot of the old rig instead.
+"""
+
+import bpy
+import hashlib
+import json
+import os
+
+from .utils import ORG_PREFIX, make_original_name, strip_org, BoneIndex
+from .utils import get_rig_type, copy_attributes, copy_driver, copy_rest_bone, set_rest_bone
+
+CACHE_PROP = "rigify_rig_cache"  # Armature property holding the per-rig records
+
+MODULE_DIR = os.path.dirname(__file__)
+CORE_FILES = ["generate.py", "utils.py", "rig_cache.py"]
+
+# Pose bone settings restored for cached bones
+POSE_BONE_PROPS = ['rotation_mode', 'lock_location', 'lock_rotation', 'lock_rotation_w',
+                   'lock_rotations_4d', 'lock_scale', 'custom_shape', 'use_custom_shape_bone_size',
+                   'ik_stretch', 'lock_ik_x', 'lock_ik_y', 'lock_ik_z']
+
+
+def _hash_files(h, paths):
+    for path in sorted(paths):
+        try:
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        except OSError:
+            pass
+
+
+def _py_files(directory):
+    try:
+        return [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".py")]
+    except OSError:
+        return []
+
+
+def _round(values):
+    return tuple(round(v, 5) for v in values)
+
+
+def _value(value):
+    """ Returns a hashable, printable copy of an RNA property value.
+    """
+    if isinstance(value, str):
+        return value
+    try:
+        return tuple(_value(v) for v in value)
+    except TypeError:
+        return value
+
+
+class RigCache:
+    """ Fingerprints the rigs of a metarig and keeps track of what each rig
+        generated, so that unchanged rigs can be restored instead of rebuilt.
+    """
+    def __init__(self, obj, metarig, recording=True):
+        self.obj = obj
+        self.metarig = metarig
+        self.recording = recording  # Whether begin()/end() record what rigs generate
+        self.code_hashes = {}
+        self.snapshot = None
+        self.old_records = {}
+        self.records = {}
+        self.clean = set()
+
+        # Bone name before/after counts of the rig call being recorded
+        self._bones = None
+        self._constraints = None
+
+        if CACHE_PROP in obj.data:
+            try:
+                self.old_records = json.loads(obj.data[CACHE_PROP])
+            except (TypeError, ValueError):
+                self.old_records = {}
+
+        # Fingerprint all the rigs of the metarig
+        self.index = BoneIndex(metarig.data.bones)
+        self.fingerprints = {}
+        for pbone in metarig.pose.bones:
+            rig_type = pbone.rigify_type.replace(" ", "")
+            if rig_type:
+                self.fingerprints[make_original_name(pbone.name)] = self.fingerprint(pbone, rig_type)
+
+    def code_hash(self, rig_type):
+        """ Hash of the code the output of a rig type depends on: the package of
+            the rig module, the shared rig modules and rigify's generation code.
+        """
+        if rig_type not in self.code_hashes:
+            h = hashlib.sha1()
+            _hash_files(h, [os.path.join(MODULE_DIR, f) for f in CORE_FILES])
+            try:
+                module_file = get_rig_type(rig_type).__file__
+            except ImportError:
+                module_file = None
+            if module_file:
+                rig_dir = os.path.dirname(module_file)
+                _hash_files(h, _py_files(rig_dir) + _py_files(os.path.dirname(rig_dir)))
+            self.code_hashes[rig_type] = h.hexdigest()
+        return self.code_hashes[rig_type]
+
+    def fingerprint(self, pbone, rig_type):
+        """ Returns a hash of the ORG subtree (head/tail/roll, parenting,
+            bone settings), rig type, parameters and code of a rig instance.
+        """
+        bones = self.metarig.data.bones
+        pbones = self.metarig.pose.bones
+        index = self.index
+        items = [self.code_hash(rig_type), rig_type, index.parent(pbone.name) or ""]
+
+        params = pbone.rigify_parameters
+        items += [(key, _value(getattr(params, key, None))) for key in sorted(params.keys())]
+
+        for name in [pbone.name] + index.children_recursive(pbone.name):
+            b = bones[name]
+            pb = pbones[name]
+            items.append((
+                name, index.parent(name) or "", b.use_connect,
+                _round(b.head_local), _round(b.tail_local), _round(b.matrix_local.to_3x3().col[0]),
+                tuple(b.layers), b.bbone_segments, pb.rotation_mode,
+                tuple(pb.lock_location), tuple(pb.lock_rotation), tuple(pb.lock_scale),
+                sorted((key, str(pb[key])) for key in pb.keys()), pb.rigify_type,
+            ))
+
+        return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+
+    #------------------------------------
+    # Snapshot of the old rig
+
+    def take_snapshot(self, use_cache=True):
+        """ Finds the rigs that didn't change since the last generation, and
+            keeps a copy of the old rig to restore their output from.
+            Must be called before the old rig is cleared.
+        """
+        if not use_cache:
+            return
+        for org_name, fingerprint in self.fingerprints.items():
+            record = self.old_records.get(org_name)
+            if record and record['hash'] == fingerprint:
+                self.clean.add(org_name)
+
+        if self.clean:
+            old_obj = self.obj.copy()
+            old_obj.data = self.obj.data.copy()
+            self.snapshot = old_obj
+
+    def free_snapshot(self):
+        if self.snapshot is not None:
+            data = self.snapshot.data
+            bpy.data.objects.remove(self.snapshot)
+            bpy.data.armatures.remove(data)
+            self.snapshot = None
+
+    def cached_rig(self, org_name):
+        """ Returns a stand-in for the rig on the given ORG bone if its output
+            can be restored from the snapshot, otherwise None.
+        """
+        if org_name in self.clean and self.snapshot is not None:
+            record = self.old_records[org_name]
+            self.records[org_name] = record
+            return CachedRig(self.obj, self.snapshot, org_name, record, self.org_bones(org_name))
+        return None
+
+    def org_bones(self, org_name):
+        """ Returns the ORG bones of the rig on org_name: its own bone and the
+            ORG subtree below it, down to (excluding) the bones of other rigs.
+        """
+        result = [org_name]
+        level = self.index.children[strip_org(org_name)]
+        while level:
+            level = [make_original_name(name) for name in level]
+            level = [name for name in level if name not in self.fingerprints]
+            result += level
+            level = [child for name in level for child in self.index.children[strip_org(name)]]
+        return result
+
+    #------------------------------------
+    # Recording of what rigs generate
+
+    def _bone_names(self):
+        arm = self.obj.data
+        if self.obj.mode == 'EDIT':
+            return set(arm.edit_bones.keys())
+        return set(arm.bones.keys())
+
+    def _org_constraint_counts(self):
+        return {pb.name: len(pb.constraints) for pb in self.obj.pose.bones if pb.name.startswith(ORG_PREFIX)}
+
+    def begin(self):
+        """ Call before running a generation stage of a rig.
+        """
+        if not self.recording:
+            return
+        self._bones = self._bone_names()
+        self._constraints = self._org_constraint_counts()
+
+    def end(self, org_name):
+        """ Call after running a generation stage of the rig on org_name.
+        """
+        if not self.recording:
+            return
+        record = self.records.setdefault(org_name, {
+            'hash': self.fingerprints.get(org_name, ""),
+            'bones': [],
+            'org_constraints': {},
+            'script': "",
+        })
+
+        record['bones'] += sorted(self._bone_names() - self._bones)
+
+        pbones = self.obj.pose.bones
+        for name, count in self._org_constraint_counts().items():
+            old_count = self._constraints.get(name, 0)
+            if count > old_count:
+                names = [con.name for con in pbones[name].constraints[old_count:]]
+                record['org_constraints'].setdefault(name, []).extend(names)
+
+    def set_script(self, org_name, script):
+        if org_name in self.records and script is not None:
+            self.records[org_name]['script'] = script
+
+    def save(self):
+        """ Stores the records of this generation in the rig.
+        """
+        self.obj.data[CACHE_PROP] = json.dumps(self.records)
+
+
+class CachedRig:
+    """ Stands in for a rig whose fingerprint didn't change, restoring its
+        previous output from a snapshot of the old rig.  Uses the staged
+        generation protocol (see generate.GENERATE_STAGES).
+    """
+    STAGED_GENERATION = True
+
+    def __init__(self, obj, snapshot, org_name, record, org_bones):
+        self.obj = obj
+        self.snapshot = snapshot
+        self.org_name = org_name
+        self.org_bones = org_bones
+        self.bones = [name for name in record['bones'] if name in snapshot.data.bones]
+        self.org_constraints = record['org_constraints']
+        self.script = record['script']
+        self.names = {}  # {old name: new name} of the restored bones
+
+    def new_name(self, name):
+        return self.names.get(name, name)
+
+    def generate_bones(self):
+        old_bones = self.snapshot.data.bones
+        for name in self.bones:
+            self.names[name] = copy_rest_bone(self.obj, old_bones[name])
+
+        # The rig may have moved or rolled its ORG bones
+        eb = self.obj.data.edit_bones
+        for name in self.org_bones:
+            if name in eb and name in old_bones:
+                set_rest_bone(eb[name], old_bones[name])
+
+    def parent_bones(self):
+        eb = self.obj.data.edit_bones
+        old_bones = self.snapshot.data.bones
+
+        # Generated bones, and the rig's ORG bones that may have been reparented
+        for name in self.bones + self.org_bones:
+            bone = old_bones.get(name)
+            new_name = self.new_name(name)
+            if bone is None or new_name not in eb:
+                continue
+            if bone.parent is None:
+                eb[new_name].parent = None
+            elif self.new_name(bone.parent.name) in eb:
+                eb[new_name].parent = eb[self.new_name(bone.parent.name)]
+                eb[new_name].use_connect = bone.use_connect
+
+    def _copy_constraints(self, pose_bone_1, pose_bone_2, names=None):
+        for con1 in pose_bone_1.constraints:
+            if names is not None and con1.name not in names:
+                continue
+            con2 = pose_bone_2.constraints.new(type=con1.type)
+            copy_attributes(con1, con2)
+
+            # Switch all the target-like pointers from the snapshot to the rig
+            for prop in con2.bl_rna.properties:
+                if prop.type == 'POINTER' and not prop.is_readonly \
+                and getattr(con2, prop.identifier) == self.snapshot:
+                    setattr(con2, prop.identifier, self.obj)
+
+    def generate_constraints(self):
+        pbones = self.obj.pose.bones
+        old_pbones = self.snapshot.pose.bones
+
+        for name in self.bones + self.org_bones:
+            new_name = self.new_name(name)
+            if new_name not in pbones or name not in old_pbones:
+                continue
+            pose_bone_1 = old_pbones[name]
+            pose_bone_2 = pbones[new_name]
+
+            for prop in POSE_BONE_PROPS:
+                setattr(pose_bone_2, prop, getattr(pose_bone_1, prop))
+            if pose_bone_1.custom_shape_transform:
+                pose_bone_2.custom_shape_transform = pbones.get(self.new_name(pose_bone_1.custom_shape_transform.name))
+
+            # Custom properties
+            for key in pose_bone_1.keys():
+                pose_bone_2[key] = pose_bone_1[key]
+
+            if name in self.names:
+                self._copy_constraints(pose_bone_1, pose_bone_2)
+
+        for org_name, names in self.org_constraints.items():
+            if org_name in pbones and org_name in old_pbones:
+                self._copy_constraints(old_pbones[org_name], pbones[org_name], names)
+
+    def _copy_drivers(self, anim_data, owner, prefixes):
+        """ Copies the drivers of the snapshot starting with one of the
+            prefixes onto owner, with the prefix replaced by its value.
+        """
+        if not anim_data:
+            return
+        starts = tuple(prefixes)
+        for d1 in anim_data.drivers:
+            if d1.data_path.startswith(starts):
+                prefix = next(p for p in starts if d1.data_path.startswith(p))
+                d2 = copy_driver(d1, owner, data_path=prefixes[prefix] + d1.data_path[len(prefix):])
+
+                # Switch targets from the snapshot to the rig
+                for var in d2.driver.variables:
+                    for target in var.targets:
+                        if target.id == self.snapshot:
+                            target.id = self.obj
+                        elif target.id == self.snapshot.data:
+                            target.id = self.obj.data
+
+    def generate_drivers(self):
+        # Drivers on renamed bones go on the new name
+        names = self.bones + self.org_bones
+        prefixes = {'pose.bones["%s"]' % name: 'pose.bones["%s"]' % self.new_name(name) for name in names}
+        for org_name, con_names in self.org_constraints.items():
+            prefixes.update(('pose.bones["%s"].constraints["%s"]' % (org_name, name),) * 2 for name in con_names)
+        self._copy_drivers(self.snapshot.animation_data, self.obj, prefixes)
+
+        # Drivers on bone settings, e.g. bbone easing or visibility
+        prefixes = {'bones["%s"]' % name: 'bones["%s"]' % self.new_name(name) for name in names}
+        self._copy_drivers(self.snapshot.data.animation_data, self.obj.data, prefixes)
+
+    def generate_ui(self):
+        return self.script or None
@@ -16,12 +16,128 @@
 #
 #======================= END GPL LICENSE BLOCK ========================
 
+import ast
+import json
 import os
 import bpy
 
 from . import utils
 
 
+_scan_cache = {}  # {source path: scan entry, see scan_rig_source()}
+
+EXTERNAL_INDEX_FILE = "rigify_external_rigs.json"  # Index of external rigs, in the user config directory
+
+_type_lists = {}  # {(collection name, implementation): rig types}, see get_type_list()
+
+
+def get_parameter_names(function):
+    """ Returns the names of the parameters an add_parameters() function
+        definition adds to its argument.
+    """
+    if not function.args.args:
+        return []
+    params = function.args.args[0].arg
+    names = []
+    for node in ast.walk(function):
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) \
+                and target.value.id == params:
+                    names.append(target.attr)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "setattr" \
+        and len(node.args) >= 2 and isinstance(node.args[0], ast.Name) and node.args[0].id == params:
+            try:
+                names.append(str(ast.literal_eval(node.args[1])))
+            except ValueError:
+                pass
+    return sorted(set(names))
+
+
+def scan_rig_source(path):
+    """ Returns a dict describing the source file of a rig module, from its
+        top level statements, without importing it:
+        'mtime', 'rig' (it defines or imports a Rig), 'implementation' (it
+        sets IMPLEMENTATION to a true value) and 'parameters' (the names its
+        add_parameters() adds).  Entries are cached per file and mtime.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {'mtime': None, 'rig': False, 'implementation': False, 'parameters': []}
+
+    cached = _scan_cache.get(path)
+    if cached is not None and cached['mtime'] == mtime:
+        return cached
+
+    entry = {'mtime': mtime, 'rig': False, 'implementation': False, 'parameters': []}
+    try:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), path)
+    except (OSError, SyntaxError, UnicodeDecodeError) as e:
+        print("Warning: could not scan rig module %r: %s" % (path, e))
+        return entry
+
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            entry['rig'] = entry['rig'] or node.name == "Rig"
+        elif isinstance(node, ast.FunctionDef) and node.name == "add_parameters":
+            entry['parameters'] = get_parameter_names(node)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            entry['rig'] = entry['rig'] or any((alias.asname or alias.name) == "Rig" for alias in node.names)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id == "Rig":
+                    entry['rig'] = True
+                elif isinstance(target, ast.Name) and target.id == "IMPLEMENTATION":
+                    try:
+                        entry['implementation'] = bool(ast.literal_eval(node.value))
+                    except ValueError:
+                        entry['implementation'] = True
+
+    _scan_cache[path] = entry
+    return entry
+
+
+def get_external_index_path():
+    return os.path.join(bpy.utils.user_resource('CONFIG', create=True), EXTERNAL_INDEX_FILE)
+
+
+def load_external_index(folder):
+    """ Loads the saved scan entries of the rig modules in folder into the
+        scan cache, so that only files changed since are scanned again.
+    """
+    try:
+        with open(get_external_index_path(), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return
+    for path, entry in index.get(folder, {}).items():
+        if path not in _scan_cache:
+            _scan_cache[path] = entry
+
+
+def save_external_index(folder):
+    """ Saves the scan entries of the rig modules in folder to the index
+        in the user config directory.
+    """
+    path = get_external_index_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    prefix = os.path.join(folder, "")  # Not matching sibling folders sharing the name's start
+    index[folder] = {p: entry for p, entry in _scan_cache.items()
+                     if p.startswith(prefix) and entry['mtime'] is not None}
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+    except OSError as e:
+        print("Warning: could not save the external rig index %r: %s" % (path, e))
+
+
 def get_rig_list(path, mode='relative'):
     """ Recursively searches for rig types, and returns a list.
 
@@ -32,12 +148,10 @@ def get_rig_list(path, mode='relative'):
     """
 
     if mode == 'relative':
-        base_path = ''
         MODULE_DIR = os.path.dirname(__file__)
         RIG_DIR_ABS = os.path.join(MODULE_DIR, utils.RIG_DIR)
         SEARCH_DIR_ABS = os.path.join(RIG_DIR_ABS, path)
     elif mode == 'absolute':
-        base_path = path
         SEARCH_DIR_ABS = path
     else:
         return
@@ -61,14 +175,8 @@ def get_rig_list(path, mode='relative'):
 
         if is_dir:
             # Check directories
-            if mode == 'relative':
-                module_name = os.path.join(path, f).replace(os.sep, ".")
-                rig = utils.get_rig_type(module_name, base_path=base_path)
-            else:
-                module_name = "__init__"
-                rig = utils.get_rig_type(module_name, base_path=base_path + f + os.sep)
             # Check if it's a rig itself
-            if hasattr(rig, "Rig"):
+            if scan_rig_source(os.path.join(SEARCH_DIR_ABS, f, "__init__.py"))['rig']:
                 rigs += [f]
             else:
                 # Check for sub-rigs
@@ -78,16 +186,10 @@ def get_rig_list(path, mode='relative'):
         elif f.endswith(".py"):
             # Check straight-up python files
             t = f[:-3]
-            if mode == 'relative':
-                module_name = os.path.join(path, t).replace(os.sep, ".")
-                rig = utils.get_rig_type(module_name, base_path=base_path)
-            else:
-                external_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
-                module_name = os.path.join(path, t).replace(external_folder, '').replace(os.sep, ".")
-                rig = utils.get_rig_type(module_name, base_path=external_folder)
-            if hasattr(rig, "Rig"):
+            entry = scan_rig_source(os.path.join(SEARCH_DIR_ABS, f))
+            if entry['rig']:
                 rigs += [t]
-            if hasattr(rig, 'IMPLEMENTATION') and rig.IMPLEMENTATION:
+            if entry['implementation']:
                 impl_rigs += [t]
     rigs.sort()
 
@@ -114,8 +216,87 @@ collection_list = get_collection_list(rig_list)
 col_enum_list = [("All", "All", ""), ("None", "None", "")] + [(c, c, "") for c in collection_list]
 
 
+rig_lists_version = 0  # Incremented whenever the rig lists change
+
+
+def rig_lists_changed():
+    global rig_lists_version
+    rig_lists_version += 1
+    _type_lists.clear()
+
+
 def get_external_rigs():
     external_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
     if external_folder:
+        load_external_index(external_folder)
         external_rigs_dict = get_rig_list(external_folder, mode='absolute')
-        rigs_dict['external'] = external_rigs_dict
\ No newline at end of file
+        rigs_dict['external'] = external_rigs_dict
+        save_external_index(external_folder)
+        rig_lists_changed()
+
+
+def clear_external_rigs():
+    if 'external' in rigs_dict:
+        rigs_dict.pop('external')
+        rig_lists_changed()
+
+
+def get_type_list(collection_name, implementation=True):
+    """ Returns the built-in and external rig types in a collection, or in
+        all of them ("All"), or in none ("None").  Implementation rigs are
+        left out unless implementation is True.  Lists are cached until
+        the rig lists change.
+    """
+    key = (collection_name, implementation)
+    types = _type_lists.get(key)
+    if types is None:
+        sources = [(rig_list, implementation_rigs)]
+        if rigs_dict.get('external'):
+            sources.append((rigs_dict['external']['rig_list'], rigs_dict['external']['implementation_rigs']))
+
+        types = []
+        for rigs, impl_rigs in sources:
+            for r in rigs:
+                if not implementation and r in impl_rigs:
+                    continue
+                if collection_name == "All" or r.startswith(collection_name + '.') \
+                or (collection_name == "None" and "." not in r):
+                    types.append(r)
+        _type_lists[key] = types
+    return types
+
+
+def get_rig_module(rig_type, check_source=True):
+    """ Imports the module of a built-in or external rig type, and returns it.
+        See utils.get_rig_type() for check_source.
+    """
+    rig_type = rig_type.replace(" ", "")
+    if 'external' in rigs_dict and rig_type in rigs_dict['external']['rig_list']:
+        external_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
+        return utils.get_rig_type(rig_type, external_folder, check_source)
+    return utils.get_rig_type(rig_type, check_source=check_source)
+
+
+def ensure_rig_parameters(rig_type):
+    """ Adds the parameters of a rig type to RigifyParameters, importing
+        its module, unless this was already done.  Rig modules are only
+        imported when a type is used, rather than at register time.
+    """
+    rig_type = rig_type.replace(" ", "")
+    if not rig_type or rig_type in utils.rig_parameter_names:
+        return
+    try:
+        rig = get_rig_module(rig_type)
+    except ImportError:
+        return
+    utils.add_rig_parameters(rig_type, rig, bpy.types.RigifyParameters)
+
+
+def ensure_all_rig_parameters():
+    """ Adds the parameters of all the known rig types.
+    """
+    for rig_type in rig_list:
+        ensure_rig_parameters(rig_type)
+    if 'external' in rigs_dict:
+        for rig_type in rigs_dict['external']['rig_list']:
+            ensure_rig_parameters(rig_type)
@@ -25,6 +25,7 @@ from ...utils import copy_bone
 from ...utils import connected_children_names
 from ...utils import strip_org, make_deformer_name
 from ...utils import create_bone_widget
+from ...utils import set_mode
 
 
 class Rig:
@@ -51,7 +52,7 @@ class Rig:
             The main armature should be selected and active before this is called.
 
         """
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
 
         # Create the deformation and control bone chains.
         # Just copies of the original chain.
@@ -62,12 +63,10 @@ class Rig:
 
             # Control bone
             if self.make_controls:
-                # Copy
-                ctrl_bone = copy_bone(self.obj, name)
+                # Copy, named so that the deferred pose copy finds it
+                ctrl_bone = copy_bone(self.obj, name, strip_org(name))
                 eb = self.obj.data.edit_bones
                 ctrl_bone_e = eb[ctrl_bone]
-                # Name
-                ctrl_bone_e.name = strip_org(name)
                 # Parenting
                 if i == 0:
                     # First bone
@@ -82,12 +81,10 @@ class Rig:
 
             # Deformation bone
             if self.make_deforms:
-                # Copy
-                def_bone = copy_bone(self.obj, name)
+                # Copy, named so that the deferred pose copy finds it
+                def_bone = copy_bone(self.obj, name, make_deformer_name(strip_org(name)))
                 eb = self.obj.data.edit_bones
                 def_bone_e = eb[def_bone]
-                # Name
-                def_bone_e.name = make_deformer_name(strip_org(name))
                 # Parenting
                 if i == 0:
                     # First bone
@@ -100,7 +97,7 @@ class Rig:
             else:
                 def_chain += [None]
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         # Constraints for org and def
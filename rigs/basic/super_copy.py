@@ -23,6 +23,7 @@ import bpy
 from ...utils import copy_bone
 from ...utils import strip_org, make_deformer_name
 from ...utils import create_bone_widget, create_circle_widget
+from ...utils import set_mode
 
 
 class Rig:
@@ -31,6 +32,8 @@ class Rig:
         This is a control and deformation rig.
 
     """
+    STAGED_GENERATION = True
+
     def __init__(self, obj, bone, params):
         """ Gather and validate data about the rig.
         """
@@ -42,36 +45,27 @@ class Rig:
         self.make_widget  = params.make_widget
         self.make_deform  = params.make_deform
 
-    def generate(self):
-        """ Generate the rig.
+    def generate_bones(self):
+        """ Create the control and deformation bones.
             Do NOT modify any of the original bones, except for adding constraints.
-            The main armature should be selected and active before this is called.
-
         """
-        bpy.ops.object.mode_set(mode='EDIT')
-
         # Make a control bone (copy of original).
         if self.make_control:
-            bone = copy_bone(self.obj, self.org_bone, self.org_name)
+            self.bone = copy_bone(self.obj, self.org_bone, self.org_name)
 
         # Make a deformation bone (copy of original, child of original).
         if self.make_deform:
-            def_bone = copy_bone(self.obj, self.org_bone, make_deformer_name(self.org_name))
+            self.def_bone = copy_bone(self.obj, self.org_bone, make_deformer_name(self.org_name))
 
-        # Get edit bones
+    def parent_bones(self):
         eb = self.obj.data.edit_bones
-        # UNUSED
-        # if self.make_control:
-        #     bone_e = eb[bone]
-        if self.make_deform:
-            def_bone_e = eb[def_bone]
 
-        # Parent
         if self.make_deform:
+            def_bone_e = eb[self.def_bone]
             def_bone_e.use_connect = False
             def_bone_e.parent = eb[self.org_bone]
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+    def generate_constraints(self):
         pb = self.obj.pose.bones
 
         if self.make_control:
@@ -79,13 +73,28 @@ class Rig:
             con = pb[self.org_bone].constraints.new('COPY_TRANSFORMS')
             con.name = "copy_transforms"
             con.target = self.obj
-            con.subtarget = bone
+            con.subtarget = self.bone
 
+    def generate_widgets(self):
+        if self.make_control:
             # Create control widget
             if self.make_widget:
-                create_circle_widget(self.obj, bone, radius=0.5)
+                create_circle_widget(self.obj, self.bone, radius=0.5)
             else:
-                create_bone_widget(self.obj, bone)
+                create_bone_widget(self.obj, self.bone)
+
+    def generate(self):
+        """ Generate the rig in one go, outside of the staged pipeline.
+            The main armature should be selected and active before this is called.
+
+        """
+        set_mode('EDIT')
+        self.generate_bones()
+        self.parent_bones()
+
+        set_mode('OBJECT')
+        self.generate_constraints()
+        self.generate_widgets()
 
 
 def add_parameters(params):
@@ -15,6 +15,7 @@ from ...utils import org, strip_org, strip_def, make_deformer_name, connected_ch
 from ...utils import create_circle_widget, create_sphere_widget, create_widget, create_cube_widget
 from ...utils import MetarigError
 from ...utils import make_constraints_from_string
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..widgets import create_face_widget, create_eye_widget, create_eyes_widget, create_ear_widget, create_jaw_widget, create_teeth_widget
 from .bendy_rig import BendyRig
@@ -40,7 +41,7 @@ class Rig(BendyRig):
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         for child in edit_bones[self.bones['org'][0]].children:
@@ -58,7 +59,7 @@ class Rig(BendyRig):
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         mouth_bones_dict = {'top': [], 'bottom': []}
@@ -91,7 +92,7 @@ class Rig(BendyRig):
         return mouth_bones_dict
 
     def create_mch(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         main_bone_name = strip_org(self.bones['org'][0])
@@ -120,7 +121,7 @@ class Rig(BendyRig):
         super(Rig, self).create_def()
 
     def create_controls(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         self.bones['jaw_ctrl'] = dict()
@@ -130,7 +131,6 @@ class Rig(BendyRig):
         jaw_ctrl = copy_bone(self.obj, self.main_mch, jaw_ctrl_name)
         self.bones['jaw_ctrl']['jaw'] = jaw_ctrl
 
-        bpy.ops.object.mode_set(mode='OBJECT')
         create_jaw_widget(self.obj, jaw_ctrl_name)
 
         super(Rig, self).create_controls()
@@ -141,7 +141,7 @@ class Rig(BendyRig):
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pose_bones = self.obj.pose.bones
 
         owner = pose_bones[self.bones['jaw_mch']['mouth_lock']]
@@ -168,7 +168,7 @@ class Rig(BendyRig):
         :return:
         """
 
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
         pose_bones = self.obj.pose.bones
 
         # Add mouth_lock property on jaw_master #
@@ -198,7 +198,7 @@ class Rig(BendyRig):
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         # Parenting to the jaw_master
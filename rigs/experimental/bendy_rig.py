@@ -11,6 +11,7 @@ from ...utils import org, strip_org, strip_def, make_deformer_name, connected_ch
 from ...utils import create_circle_widget, create_sphere_widget, create_widget, create_cube_widget
 from ...utils import MetarigError
 from ...utils import make_constraints_from_string
+from ...utils import set_mode, remove_edit_bone
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..widgets import create_face_widget, create_eye_widget, create_eyes_widget, create_ear_widget, create_jaw_widget, create_teeth_widget
 
@@ -52,7 +53,7 @@ class BendyRig:
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         start_bones = []
@@ -69,7 +70,7 @@ class BendyRig:
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pose_bones = self.obj.pose.bones
 
         glue_bones = []
@@ -97,7 +98,7 @@ class BendyRig:
         :rtype: list(str)
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         bones_in_range = []
@@ -122,7 +123,7 @@ class BendyRig:
         return bones_in_range
 
     def create_mch(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         for name in self.start_bones:
@@ -137,7 +138,7 @@ class BendyRig:
                 self.bones['mch'][strip_org(name)].append(mch)
 
     def create_def(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         for name in self.start_bones:
@@ -151,7 +152,7 @@ class BendyRig:
                 self.bones['def'][strip_org(name)].append(def_bone)
 
     def create_controls(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         for name in self.start_bones:
@@ -173,13 +174,12 @@ class BendyRig:
 
         self.aggregate_ctrls()
 
-        bpy.ops.object.mode_set(mode='OBJECT')
         for subchain in self.bones['ctrl']:
             for ctrl in self.bones['ctrl'][subchain]:
                 create_sphere_widget(self.obj, ctrl)
 
     def aggregate_ctrls(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         aggregates = []
@@ -211,7 +211,7 @@ class BendyRig:
             aggregate_ctrl = copy_bone(self.obj, aggregate[0], name)
             self.bones['ctrl']['aggregate'].append(aggregate_ctrl)
             for ctrl in aggregate:
-                edit_bones.remove(edit_bones[ctrl])
+                remove_edit_bone(self.obj, ctrl)
                 for subchain in self.start_bones:
                     if ctrl in self.bones['ctrl'][strip_org(subchain)]:
                         self.bones['ctrl'][strip_org(subchain)].remove(ctrl)
@@ -225,7 +225,7 @@ class BendyRig:
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pose_bones = self.obj.pose.bones
 
         ### Constrain DEF-bones ###
@@ -267,7 +267,7 @@ class BendyRig:
         :return:
         """
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         edit_bones = self.obj.data.edit_bones
 
         ### PARENT MCH-bones ###
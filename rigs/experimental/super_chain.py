@@ -5,6 +5,7 @@ from ...utils import copy_bone, flip_bone, put_bone, org, align_bone_y_axis, ali
 from ...utils import strip_org, make_deformer_name, connected_children_names
 from ...utils import create_circle_widget, create_sphere_widget, create_widget, create_chain_widget
 from ...utils import MetarigError, make_mechanism_name, create_cube_widget
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..limbs.limb_utils import get_bone_name
 
@@ -127,7 +128,7 @@ class Rig:
 
         org_bones  = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if not pivot:
@@ -180,7 +181,7 @@ class Rig:
         org_bones  = self.org_bones
         pivot_name = org_bones[pivot-1]
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create torso control bone
@@ -213,7 +214,7 @@ class Rig:
     def create_deform(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -222,7 +223,7 @@ class Rig:
             def_name = copy_bone(self.obj, o, def_name)
             def_bones.append(def_name)
 
-        bpy.ops.object.mode_set(mode='POSE')
+        set_mode('POSE')
         # Create bbone segments
         for bone in def_bones:
             self.obj.data.bones[bone].bbone_segments = self.bbones
@@ -233,14 +234,14 @@ class Rig:
         else:
             self.obj.data.bones[def_bones[0]].bbone_easein = 1.0
             self.obj.data.bones[def_bones[-1]].bbone_easeout = 1.0
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
 
         return def_bones
 
     def create_neck( self, neck_bones ):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create neck control
@@ -302,7 +303,7 @@ class Rig:
     def create_chest( self, chest_bones ):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # get total spine length
@@ -341,7 +342,7 @@ class Rig:
     def create_hips( self, hip_bones ):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create hips control bone
@@ -388,7 +389,7 @@ class Rig:
     def create_chain(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         twk, mch, mch_ctrl, ctrl = [], [], [], []
@@ -569,7 +570,7 @@ class Rig:
     def parent_bones(self, bones):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Parent deform bones
@@ -704,7 +705,7 @@ class Rig:
             eb[ org ].parent = eb[ twk ]
 
     def make_constraint(self, bone, constraint):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         owner_pb = pb[bone]
@@ -902,7 +903,7 @@ class Rig:
                 })
 
     def stick_to_bendy_bones(self, bones):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         deform = bones['def']
         pb = self.obj.pose.bones
 
@@ -925,7 +926,7 @@ class Rig:
             def_pb.use_bbone_custom_handles = True
 
     def create_drivers(self, bones):
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         # Setting the torso's props
@@ -968,7 +969,7 @@ class Rig:
             drv_modifier.coefficients[1] = -1.0
 
     def locks_and_widgets(self, bones):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         #Locks
@@ -1124,7 +1125,7 @@ class Rig:
 
         self.SINGLE_BONE = (len(self.org_bones) == 1)
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         bones = {}
@@ -1174,7 +1175,7 @@ class Rig:
         #Todo create pivot-like controls
 
             # # TEST
-            # bpy.ops.object.mode_set(mode ='EDIT')
+            # set_mode('EDIT')
             # eb = self.obj.data.edit_bones
             #
             # self.parent_bones(      bones )
@@ -2,8 +2,10 @@ import bpy, re
 from   mathutils      import Vector
 from   ...utils       import copy_bone, flip_bone
 from   ...utils       import org, strip_org, make_deformer_name, connected_children_names, make_mechanism_name
-from   ...utils       import create_circle_widget, create_sphere_widget, create_widget, create_cube_widget
+from   ...utils       import create_circle_widget, create_sphere_widget, create_widget, create_cube_widget, share_widget_mesh
+from   ...utils       import fill_widget_mesh
 from   ...utils       import MetarigError
+from   ...utils       import set_mode
 from   rna_prop_ui    import rna_idprop_ui_prop_get
 from   ..widgets import create_face_widget, create_eye_widget, create_eyes_widget, create_ear_widget, create_jaw_widget, create_teeth_widget
 
@@ -59,7 +61,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Adjust eye bones roll
@@ -82,7 +84,7 @@ class Rig:
     def create_deformation(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -120,7 +122,7 @@ class Rig:
         org_bones = self.org_bones
 
         ## create control bones
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         eyeL_ctrl_name = strip_org(bones['eyes'][0])
@@ -199,7 +201,7 @@ class Rig:
         flip_bone( self.obj, tongue_ctrl_name )
 
         ## Assign widgets
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
 
         # Assign each eye widgets
         create_eye_widget( self.obj, eyeL_ctrl_name )
@@ -246,7 +248,7 @@ class Rig:
         org_bones = self.org_bones
 
         ## create tweak bones
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         tweaks = []
@@ -296,7 +298,7 @@ class Rig:
 
                 tweaks.append( tweak_name )
 
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         primary_tweaks = [
@@ -367,7 +369,7 @@ class Rig:
 
     def create_mch(self, jaw_ctrl, tongue_ctrl):
         org_bones = self.org_bones
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create eyes mch bones
@@ -462,7 +464,7 @@ class Rig:
 
     def parent_bones(self, all_bones, tweak_unique):
         org_bones = self.org_bones
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         face_name = [ bone for bone in org_bones if 'face' in bone ].pop()
@@ -641,7 +643,7 @@ class Rig:
 
     def make_constraits(self, constraint_type, bone, subtarget, influence = 1):
         org_bones = self.org_bones
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         owner_pb = pb[bone]
@@ -922,7 +924,7 @@ class Rig:
 
     def drivers_and_props( self, all_bones ):
 
-        bpy.ops.object.mode_set(mode ='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         jaw_ctrl  = all_bones['ctrls']['jaw'][0]
@@ -974,7 +976,7 @@ class Rig:
 
     def create_bones(self):
         org_bones = self.org_bones
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Clear parents for org bones
@@ -2410,20 +2412,17 @@ def create_sample(obj):
 def create_square_widget(rig, bone_name, size=1.0, bone_transform_name=None):
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj is not None:
-        verts = [
-            (  0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
-            ( -0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
-            (  0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
-            ( -0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
-        ]
+        if not share_widget_mesh(obj, ('square', size)):
+            verts = [
+                (  0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
+                ( -0.5 * size, -2.9802322387695312e-08 * size,  0.5 * size ),
+                (  0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
+                ( -0.5 * size,  2.9802322387695312e-08 * size, -0.5 * size ),
+            ]
 
-        edges = [(0, 1), (2, 3), (0, 2), (3, 1) ]
-        faces = []
+            edges = [(0, 1), (2, 3), (0, 2), (3, 1) ]
 
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, faces)
-        mesh.update()
-        mesh.update()
+            fill_widget_mesh(obj.data, verts, edges)
         return obj
     else:
         return None
@@ -9,6 +9,7 @@ from ...utils       import create_circle_widget, create_sphere_widget, create_li
 from ...utils       import MetarigError, make_mechanism_name, org
 from ...utils       import create_limb_widget, connected_children_names
 from ...utils       import align_bone_y_axis, align_bone_x_axis, align_bone_z_axis
+from ...utils       import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..widgets import create_ikarrow_widget
 from math import trunc, pi
@@ -59,7 +60,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         thigh = self.org_bones[0]
@@ -91,7 +92,7 @@ class Rig:
 
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         name = get_bone_name( strip_org( org_bones[0] ), 'mch', 'parent' )
@@ -156,7 +157,7 @@ class Rig:
     def create_tweak(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         tweaks         = {}
@@ -274,7 +275,7 @@ class Rig:
     def create_def(self, tweaks):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -379,7 +380,7 @@ class Rig:
     def create_ik(self, parent):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrl = get_bone_name(org_bones[0], 'ctrl', 'ik')
@@ -508,7 +509,7 @@ class Rig:
     def create_fk(self, parent):
         org_bones = self.org_bones.copy()
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrls = []
@@ -554,7 +555,7 @@ class Rig:
         return {'ctrl': ctrls, 'mch': mch}
 
     def org_parenting_and_switch(self, org_bones, ik, fk, parent):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
         # re-parent ORGs in a connected chain
         for i, o in enumerate(org_bones):
@@ -563,7 +564,7 @@ class Rig:
                 if i <= len(org_bones)-1:
                     eb[o].use_connect = True
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
         pb_parent = pb[parent]
 
@@ -604,7 +605,7 @@ class Rig:
     def create_arm(self, bones):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         pole_target = get_bone_name(org_bones[0], 'ctrl', 'ik_target')
@@ -764,7 +765,7 @@ class Rig:
 
     def create_drivers(self, bones):
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         ctrl = pb[bones['ik']['mch_hand'][0]]
@@ -1029,7 +1030,7 @@ class Rig:
         return names
 
     def generate(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Adjust org-bones rotation
@@ -10,6 +10,7 @@ from ...utils import create_circle_widget, create_sphere_widget, create_line_wid
 from ...utils import MetarigError, make_mechanism_name, org
 from ...utils import create_limb_widget, connected_children_names
 from ...utils import align_bone_y_axis, align_bone_x_axis, align_bone_z_axis
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..widgets import create_ikarrow_widget
 from math import trunc, pi
@@ -60,7 +61,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         thigh = self.org_bones[0]
@@ -118,7 +119,7 @@ class Rig:
 
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         name = get_bone_name( strip_org( org_bones[0] ), 'mch', 'parent' )
@@ -183,7 +184,7 @@ class Rig:
     def create_tweak(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         tweaks         = {}
@@ -301,7 +302,7 @@ class Rig:
     def create_def(self, tweaks):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -406,7 +407,7 @@ class Rig:
     def create_ik(self, parent):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrl = get_bone_name(org_bones[0], 'ctrl', 'ik')
@@ -535,7 +536,7 @@ class Rig:
     def create_fk(self, parent):
         org_bones = self.org_bones.copy()
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrls = []
@@ -581,7 +582,7 @@ class Rig:
         return {'ctrl': ctrls, 'mch': mch}
 
     def org_parenting_and_switch(self, org_bones, ik, fk, parent):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
         # re-parent ORGs in a connected chain
         for i, o in enumerate(org_bones):
@@ -590,7 +591,7 @@ class Rig:
                 if i <= len(org_bones)-1:
                     eb[o].use_connect = True
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
         pb_parent = pb[parent]
 
@@ -635,7 +636,7 @@ class Rig:
 
         bones['ik']['ctrl']['terminal'] = []
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create toes def bone
@@ -1007,7 +1008,7 @@ class Rig:
         # Add ballsocket widget to heel
         create_ballsocket_widget(self.obj, heel, bone_transform_name=None)
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if len(org_bones) >= 4:
@@ -1084,7 +1085,7 @@ class Rig:
 
     def create_drivers(self, bones):
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         ctrl = pb[bones['ik']['mch_foot'][0]]
@@ -1352,7 +1353,7 @@ class Rig:
         return names
 
     def generate(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Adjust org-bones rotation
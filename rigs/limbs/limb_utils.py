@@ -2,6 +2,7 @@ import bpy, re
 from mathutils import Vector
 from ...utils import org, strip_org, make_mechanism_name, make_deformer_name
 from ...utils import MetarigError
+from ...utils import set_mode
 
 bilateral_suffixes = ['.L','.R']
 
@@ -21,7 +22,7 @@ def orient_bone( cls, eb, axis, scale = 1.0, reverse = False ):
     eb.roll = 0.0
 
 def make_constraint( cls, bone, constraint ):
-    bpy.ops.object.mode_set(mode = 'OBJECT')
+    set_mode('OBJECT')
     pb = cls.obj.pose.bones
 
     owner_pb = pb[bone]
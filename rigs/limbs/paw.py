@@ -8,6 +8,7 @@ from ...utils import create_circle_widget, create_sphere_widget, create_line_wid
 from ...utils import MetarigError, make_mechanism_name, org
 from ...utils import create_limb_widget, connected_children_names
 from ...utils import align_bone_y_axis, align_bone_x_axis, align_bone_z_axis
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 from ..widgets import create_ikarrow_widget, create_gear_widget
 from ..widgets import create_foot_widget, create_ballsocket_widget
@@ -59,7 +60,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         thigh = self.org_bones[0]
@@ -105,7 +106,7 @@ class Rig:
 
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         name = get_bone_name( strip_org( org_bones[0] ), 'mch', 'parent' )
@@ -170,7 +171,7 @@ class Rig:
     def create_tweak(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         tweaks         = {}
@@ -293,7 +294,7 @@ class Rig:
     def create_def(self, tweaks):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -398,7 +399,7 @@ class Rig:
     def create_ik(self, parent):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrl = get_bone_name(org_bones[0], 'ctrl', 'ik')
@@ -530,7 +531,7 @@ class Rig:
 
         org_bones.pop()
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         ctrls = []
@@ -576,7 +577,7 @@ class Rig:
         return {'ctrl': ctrls, 'mch': mch}
 
     def org_parenting_and_switch(self, org_bones, ik, fk, parent):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
         # re-parent ORGs in a connected chain
         for i, o in enumerate(org_bones):
@@ -585,7 +586,7 @@ class Rig:
                 if i <= len(org_bones)-1:
                     eb[o].use_connect = True
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
         pb_parent = pb[parent]
 
@@ -630,7 +631,7 @@ class Rig:
 
         bones['ik']['ctrl']['terminal'] = []
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         pole_target = get_bone_name(org_bones[0], 'ctrl', 'ik_target')
@@ -833,7 +834,7 @@ class Rig:
         # Add ballsocket widget to heel
         create_ballsocket_widget(self.obj, heel, bone_transform_name=None)
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if len( org_bones ) >= 4:
@@ -912,7 +913,7 @@ class Rig:
 
     def create_drivers(self, bones):
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         ctrl = pb[bones['ik']['mch_foot'][0]]
@@ -1180,7 +1181,7 @@ class Rig:
         return names
 
     def generate(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Adjust org-bones rotation
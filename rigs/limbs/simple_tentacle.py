@@ -4,6 +4,7 @@ from ...utils import strip_org, make_deformer_name, connected_children_names
 from ...utils import put_bone, create_sphere_widget
 from ...utils import create_circle_widget, align_bone_x_axis
 from ...utils import MetarigError
+from ...utils import set_mode
 
 
 class Rig:
@@ -27,7 +28,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if self.params.roll_alignment == "automatic":
@@ -48,7 +49,7 @@ class Rig:
 
     def make_controls(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         org_bones = self.org_bones
 
         ctrl_chain = []
@@ -64,8 +65,6 @@ class Rig:
             ctrl_chain.append(ctrl_bone)
 
         # Make widgets
-        bpy.ops.object.mode_set(mode='OBJECT')
-
         for ctrl in ctrl_chain:
             create_circle_widget(self.obj, ctrl, radius=0.3, head_tail=0.5)
 
@@ -73,7 +72,7 @@ class Rig:
 
     def make_tweaks(self):
 
-        bpy.ops.object.mode_set(mode ='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
         org_bones = self.org_bones
 
@@ -102,7 +101,7 @@ class Rig:
             tweak_chain.append(tweak_bone)
 
         # Make widgets
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
 
         for tweak in tweak_chain:
             create_sphere_widget(self.obj, tweak)
@@ -126,7 +125,7 @@ class Rig:
 
     def make_deform(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         org_bones = self.org_bones
 
         def_chain = []
@@ -145,7 +144,7 @@ class Rig:
 
     def parent_bones(self, all_bones):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         org_bones = self.org_bones
         eb = self.obj.data.edit_bones
 
@@ -178,7 +177,7 @@ class Rig:
 
     def make_constraints(self, all_bones):
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         # Deform bones' constraints
@@ -214,7 +213,7 @@ class Rig:
                 con.owner_space = 'LOCAL'
 
     def generate(self):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         self.orient_org_bones()
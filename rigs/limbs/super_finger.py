@@ -1,8 +1,9 @@
 import bpy
 from ...utils import copy_bone, flip_bone
 from ...utils import strip_org, make_deformer_name, connected_children_names, make_mechanism_name
-from ...utils import create_circle_widget, create_widget
+from ...utils import create_circle_widget, create_widget, share_widget_mesh, fill_widget_mesh
 from ...utils import MetarigError, align_bone_x_axis
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 
 script = """
@@ -25,7 +26,7 @@ class Rig:
 
     def orient_org_bones(self):
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if self.params.primary_rotation_axis == 'automatic':
@@ -47,7 +48,7 @@ class Rig:
     def generate(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         self.orient_org_bones()
@@ -161,7 +162,7 @@ class Rig:
 
         ctrl_bone_tip.parent = eb[ctrl_chain[-1]]
 
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
 
         pb = self.obj.pose.bones
 
@@ -301,17 +302,17 @@ class Rig:
         # Create ctrl master widget
         w = create_widget(self.obj, master_name)
         if w is not None:
-            mesh = w.data
-            verts = [(0, 0, 0), (0, 1, 0), (0.05, 1, 0), (0.05, 1.1, 0), (-0.05, 1.1, 0), (-0.05, 1, 0)]
-            if 'Z' in self.params.primary_rotation_axis:
-                # Flip x/z coordinates
-                temp = []
-                for v in verts:
-                    temp += [(v[2], v[1], v[0])]
-                verts = temp
-            edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 1)]
-            mesh.from_pydata(verts, edges, [])
-            mesh.update()
+            if not share_widget_mesh(w, ('super_finger', 'Z' in self.params.primary_rotation_axis)):
+                mesh = w.data
+                verts = [(0, 0, 0), (0, 1, 0), (0.05, 1, 0), (0.05, 1.1, 0), (-0.05, 1.1, 0), (-0.05, 1, 0)]
+                if 'Z' in self.params.primary_rotation_axis:
+                    # Flip x/z coordinates
+                    temp = []
+                    for v in verts:
+                        temp += [(v[2], v[1], v[0])]
+                    verts = temp
+                edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 1)]
+                fill_widget_mesh(mesh, verts, edges)
 
         # Create tip control widget
         create_circle_widget(self.obj, tip_name, radius=0.3, head_tail=0.0)
@@ -26,7 +26,8 @@ import bpy
 from ...utils import MetarigError
 from ...utils import copy_bone
 from ...utils import strip_org, deformer
-from ...utils import create_widget
+from ...utils import create_widget, share_widget_mesh, fill_widget_mesh
+from ...utils import set_mode
 
 
 def bone_siblings(obj, bone):
@@ -89,7 +90,7 @@ class Rig:
             The main armature should be selected and active before this is called.
 
         """
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
 
         # Figure out the name for the control bone (remove the last .##)
         last_bone = self.org_bones[-1:][0]
@@ -132,7 +133,7 @@ class Rig:
         eb[ctrl].parent = eb[parent_to]
 
         # Constraints
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         i = 0
@@ -177,41 +178,42 @@ class Rig:
         # Create control widget
         w = create_widget(self.obj, ctrl)
         if w is not None:
-            mesh = w.data
-            verts = [
-                (0.1578, 0.0, -0.3),
-                (0.1578, 1.0, -0.2),
-                (-0.1578, 1.0, -0.2),
-                (-0.1578, -0.0, -0.3),
-                (-0.1578, -0.0, 0.3),
-                (-0.1578, 1.0, 0.2),
-                (0.1578, 1.0, 0.2),
-                (0.1578, 0.0, 0.3),
-                (0.1578, 0.25, -0.275),
-                (-0.1578, 0.25, -0.275),
-                (0.1578, 0.75, -0.225),
-                (-0.1578, 0.75, -0.225),
-                (0.1578, 0.75, 0.225),
-                (0.1578, 0.25, 0.275),
-                (-0.1578, 0.25, 0.275),
-                (-0.1578, 0.75, 0.225),
-                ]
-
-            if 'Z' in self.palm_rotation_axis:
-                # Flip x/z coordinates
-                verts = [v[::-1] for v in verts]
-
-            edges = [
-                (1, 2), (0, 3), (4, 7), (5, 6),
-                (8, 0), (9, 3), (10, 1), (11, 2),
-                (12, 6), (13, 7), (4, 14), (15, 5),
-                (10, 8), (11, 9), (15, 14), (12, 13),
-                ]
-            mesh.from_pydata(verts, edges, [])
-            mesh.update()
-
-            mod = w.modifiers.new("subsurf", 'SUBSURF')
-            mod.levels = 2
+            if not share_widget_mesh(w, ('super_palm', 'Z' in self.palm_rotation_axis)):
+                mesh = w.data
+                verts = [
+                    (0.1578, 0.0, -0.3),
+                    (0.1578, 1.0, -0.2),
+                    (-0.1578, 1.0, -0.2),
+                    (-0.1578, -0.0, -0.3),
+                    (-0.1578, -0.0, 0.3),
+                    (-0.1578, 1.0, 0.2),
+                    (0.1578, 1.0, 0.2),
+                    (0.1578, 0.0, 0.3),
+                    (0.1578, 0.25, -0.275),
+                    (-0.1578, 0.25, -0.275),
+                    (0.1578, 0.75, -0.225),
+                    (-0.1578, 0.75, -0.225),
+                    (0.1578, 0.75, 0.225),
+                    (0.1578, 0.25, 0.275),
+                    (-0.1578, 0.25, 0.275),
+                    (-0.1578, 0.75, 0.225),
+                    ]
+
+                if 'Z' in self.palm_rotation_axis:
+                    # Flip x/z coordinates
+                    verts = [v[::-1] for v in verts]
+
+                edges = [
+                    (1, 2), (0, 3), (4, 7), (5, 6),
+                    (8, 0), (9, 3), (10, 1), (11, 2),
+                    (12, 6), (13, 7), (4, 14), (15, 5),
+                    (10, 8), (11, 9), (15, 14), (12, 13),
+                    ]
+                fill_widget_mesh(mesh, verts, edges)
+
+            if "subsurf" not in w.modifiers:
+                mod = w.modifiers.new("subsurf", 'SUBSURF')
+                mod.levels = 2
 
 
 def add_parameters(params):
@@ -5,6 +5,7 @@ from ...utils import strip_org, make_deformer_name, connected_children_names
 from ...utils import create_circle_widget, create_sphere_widget, create_neck_bend_widget, create_neck_tweak_widget
 from ..widgets import create_ballsocket_widget
 from ...utils import MetarigError, make_mechanism_name, create_cube_widget
+from ...utils import set_mode
 from rna_prop_ui import rna_idprop_ui_prop_get
 
 script = """
@@ -23,12 +24,15 @@ if is_selected( controls ):
 
 class Rig:
 
+    STAGED_GENERATION = True
+
     def __init__(self, obj, bone_name, params):
         """ Initialize torso rig and key rig properties """
 
         eb = obj.data.edit_bones
 
         self.obj = obj
+        self.bones = None  # Names of the generated bones, by part
         self.org_bones = [bone_name] + connected_children_names(obj, bone_name)
         self.params = params
         # self.spine_length = sum([eb[b].length for b in self.org_bones])
@@ -135,7 +139,7 @@ class Rig:
         org_bones = self.org_bones
         pivot_name = org_bones[pivot-1]
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create torso control bone
@@ -171,7 +175,7 @@ class Rig:
     def create_deform(self):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         def_bones = []
@@ -185,7 +189,7 @@ class Rig:
     def create_neck(self, neck_bones):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         if not self.use_head:
@@ -284,7 +288,7 @@ class Rig:
     def create_chest(self, chest_bones):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # get total spine length
@@ -323,7 +327,7 @@ class Rig:
     def create_hips(self, hip_bones):
         org_bones = self.org_bones
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Create hips control bone
@@ -365,7 +369,7 @@ class Rig:
         }
 
     def create_tail(self, tail_bones):
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
         org_bones = self.org_bones
 
@@ -430,9 +434,13 @@ class Rig:
             'original_names': tail_bones
         }
 
-    def parent_bones(self, bones):
+    def parent_bones(self):
+        bones = self.bones
+        if bones is None:
+            return
+
         org_bones = self.org_bones
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Parent deform bones
@@ -564,7 +572,7 @@ class Rig:
             eb[org_bones[-1]].parent = eb[bones['neck']['ctrl']]
 
     def make_constraint(self, bone, constraint):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         owner_pb = pb[bone]
@@ -750,7 +758,7 @@ class Rig:
                 pb[b].ik_stretch = 0.1
 
     def create_drivers(self, bones):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         # Setting the torso's props
@@ -803,7 +811,7 @@ class Rig:
             drv_modifier.coefficients[1] = -1.0
 
     def locks_and_widgets(self, bones):
-        bpy.ops.object.mode_set(mode='OBJECT')
+        set_mode('OBJECT')
         pb = self.obj.pose.bones
 
         # deform bones bbone segements
@@ -944,7 +952,7 @@ class Rig:
             if self.tweak_layers:
                 pb[bone].bone.layers = self.tweak_layers
 
-    def generate(self):
+    def generate_bones(self):
         # Torso Rig Anatomy:
         # Neck: all bones above neck point, last bone is head
         # Upper torso: all bones between pivot and neck start
@@ -953,7 +961,7 @@ class Rig:
 
         bone_chains = self.build_bone_structure()
 
-        bpy.ops.object.mode_set(mode='EDIT')
+        set_mode('EDIT')
         eb = self.obj.data.edit_bones
 
         # Clear parents for org bones
@@ -981,17 +989,24 @@ class Rig:
             if tail_bones:
                 bones['tail'] = self.create_tail(tail_bones)
 
-            # TEST
-            bpy.ops.object.mode_set(mode='EDIT')
-            eb = self.obj.data.edit_bones
+            self.bones = bones
 
-            self.parent_bones(bones)
-            self.constrain_bones(bones)
-            self.create_drivers(bones)
-            self.locks_and_widgets(bones)
+    def generate_constraints(self):
+        if self.bones is not None:
+            self.constrain_bones(self.bones)
 
-        else:
-            return
+    def generate_drivers(self):
+        if self.bones is not None:
+            self.create_drivers(self.bones)
+
+    def generate_widgets(self):
+        if self.bones is not None:
+            self.locks_and_widgets(self.bones)
+
+    def generate_ui(self):
+        bones = self.bones
+        if bones is None:
+            return None
 
         controls = [bones['neck']['ctrl'],  bones['neck']['ctrl_neck']]
         controls += [bones['chest']['ctrl'], bones['hips']['ctrl']]
@@ -1002,7 +1017,7 @@ class Rig:
 
         # Create UI
         controls_string = ", ".join(["'" + x + "'" for x in controls])
-        return [script % (
+        return script % (
             controls_string,
             bones['pivot']['ctrl'],
             'head_follow',
@@ -1011,7 +1026,20 @@ class Rig:
             'neck_follow',
             'tail_follow',
             'tail_follow',
-            )]
+            )
+
+    def generate(self):
+        """ Generate the rig in one go, outside of the staged pipeline.
+        """
+        self.generate_bones()
+        self.parent_bones()
+        self.generate_constraints()
+        self.generate_drivers()
+        self.generate_widgets()
+
+        ui_script = self.generate_ui()
+        if ui_script is not None:
+            return [ui_script]
 
 
 def add_parameters(params):
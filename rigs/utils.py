@@ -1,9 +1,13 @@
-from .limbs.super_limb import Rig as LimbRig
 from ..utils import connected_children_names
 import re
 
 
 def get_limb_generated_names(rig):
+    from .. import rig_lists
+    from .limbs.super_limb import Rig as LimbRig
+
+    # get_future_names() reads the limb parameters, registered on first use
+    rig_lists.ensure_rig_parameters('limbs.super_limb')
 
     pbones = rig.pose.bones
     names = dict()
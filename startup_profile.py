@@ -0,0 +1,204 @@
+#====================== BEGIN GPL LICENSE BLOCK ======================
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+#======================= END GPL LICENSE BLOCK ========================
+
+# <pep8 compliant>
+
+""" Startup profiler for the addon.
+
+    Enabled by the RIGIFY_PROFILE_STARTUP environment variable, or by the
+    'Profile Startup' preference.  It records the wall time and the number of
+    modules imported by each phase of the addon import and register(), and
+    the time spent executing each imported module.  When register() is done
+    a report is written as JSON and as text to the user config directory (or
+    to the directory the environment variable names), and the text is
+    printed.
+"""
+
+import bpy
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ENV_VAR = "RIGIFY_PROFILE_STARTUP"
+REPORT_NAME = "rigify_startup_profile"
+SLOWEST_MODULES = 15  # Number of modules listed in the text report
+
+
+class _TimingLoader:
+    """ Wraps a module loader to time the execution of the module.
+    """
+    def __init__(self, loader, module_times):
+        self.loader = loader
+        self.module_times = module_times
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.module_times[module.__name__] = time.perf_counter() - start
+
+
+class _TimingFinder:
+    """ Meta path finder that defers to the other finders, and wraps the
+        loaders they find in a _TimingLoader.
+    """
+    def __init__(self, module_times):
+        self.module_times = module_times
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self.module_times)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """ Records the phases of the addon startup.
+    """
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.phases = []        # [{'name', 'time', 'imports'}]
+        self.module_times = {}  # {module name: seconds executing it, including its imports}
+        self.finder = _TimingFinder(self.module_times)
+        sys.meta_path.insert(0, self.finder)
+
+    @contextmanager
+    def phase(self, name):
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'name': name,
+                'time': time.perf_counter() - start,
+                'imports': len(sys.modules) - modules,
+            })
+
+    def stop(self):
+        if self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+
+    def report(self):
+        slowest = sorted(self.module_times.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'total_time': time.perf_counter() - self.start_time,
+            'phases': self.phases,
+            'modules': [{'name': name, 'time': t} for name, t in slowest],
+        }
+
+
+def format_report(report):
+    lines = ["Rigify startup profile", "",
+             "%-40s %10s %8s" % ("Phase", "Time (s)", "Imports")]
+    for phase in report['phases']:
+        lines.append("%-40s %10.4f %8d" % (phase['name'], phase['time'], phase['imports']))
+    lines += ["%-40s %10.4f" % ("Total", report['total_time']), "",
+              "%-60s %10s" % ("Slowest modules", "Time (s)")]
+    for module in report['modules'][:SLOWEST_MODULES]:
+        lines.append("%-60s %10.4f" % (module['name'], module['time']))
+    return "\n".join(lines)
+
+
+_profiler = None
+
+
+def is_enabled():
+    if os.environ.get(ENV_VAR):
+        return True
+    addon = bpy.context.user_preferences.addons.get(__package__)
+    return bool(addon and getattr(addon.preferences, "profile_startup", False))
+
+
+def start():
+    """ Starts profiling if it is enabled.  Call before importing the rest
+        of the addon.
+    """
+    global _profiler
+    if _profiler is None and is_enabled():
+        _profiler = StartupProfiler()
+
+
+@contextmanager
+def _no_phase():
+    yield
+
+
+def phase(name):
+    """ Returns a context manager recording a phase of the startup.
+    """
+    if _profiler is None:
+        return _no_phase()
+    return _profiler.phase(name)
+
+
+def abort():
+    """ Stops profiling without writing a report, e.g. if the addon failed
+        to import.
+    """
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler = None
+
+
+def get_report_dir():
+    path = os.environ.get(ENV_VAR, "")
+    if os.path.isdir(path):
+        return path
+    return bpy.utils.user_resource('CONFIG', create=True)
+
+
+def finish():
+    """ Stops profiling and writes the report.  Returns the report, or None
+        if profiling is not enabled.
+    """
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler = _profiler
+    _profiler = None
+    profiler.stop()
+
+    report = profiler.report()
+    text = format_report(report)
+    print(text)
+
+    path = os.path.join(get_report_dir(), REPORT_NAME)
+    try:
+        with open(path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        with open(path + ".txt", 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    except OSError as e:
+        print("Warning: could not write the startup profile %r: %s" % (path, e))
+    return report
@@ -19,21 +19,190 @@
 # <pep8 compliant>
 
 import bpy
+from bpy.app.handlers import persistent
 from bpy.props import StringProperty
 from mathutils import Color
 
-from .utils import get_rig_type, MetarigError
+from .utils import get_rig_type, reload_rig_types, MetarigError
 from .utils import write_metarig, write_widget
 from .utils import unique_name
 from .utils import upgradeMetarigTypes, outdated_types
 from .utils import get_keyed_frames, bones_in_frame
 from .utils import overwrite_prop_animation
-from .rigs.utils import get_limb_generated_names
+from .utils import clear_widget_library
 from . import rig_lists
 from . import generate
 from . import rot_mode
 
 
+_rig_types_key = None  # What id_store.rigify_types holds, see fill_rig_types()
+
+
+def fill_rig_types(id_store, implementation):
+    """ Fills id_store.rigify_types with the rig types of the active
+        collection, unless it already holds them.  Panels draw on every
+        mouse move, so the list is only rebuilt when the collection or the
+        rig lists change.
+    """
+    global _rig_types_key
+    collection_name = str(id_store.rigify_collection).replace(" ", "")
+    types = rig_lists.get_type_list(collection_name, implementation)
+    key = (collection_name, implementation, rig_lists.rig_lists_version)
+    if key == _rig_types_key and len(id_store.rigify_types) == len(types):
+        return
+
+    id_store.rigify_types.clear()
+    for r in types:
+        a = id_store.rigify_types.add()
+        a.name = r
+    _rig_types_key = key
+
+
+WARNING_PROPS = {'IK_follow', 'root/parent', 'FK_limb_follow', 'IK_Stretch'}
+
+_armature_status = {}  # {object pointer: (object name, status)}, see get_armature_status()
+_metarig_status = None  # Status of all the armatures, see get_metarig_status()
+_armature_keys = None  # Pointers of the armature objects the status is for
+
+
+def get_armature_status(obj):
+    """ Returns (show_warning, updatable, not_updatable) for an armature:
+        whether it has bones on layer 31 with custom properties that may
+        change after generation, and bones of outdated rig types that can
+        or cannot be upgraded.  Cached until the armature is updated.
+    """
+    key = obj.as_pointer()
+    cached = _armature_status.get(key)
+    if cached is not None:
+        return cached[1]
+
+    show_warning = updatable = not_updatable = False
+    for bone in obj.pose.bones:
+        if not show_warning and bone.bone.layers[30] and not WARNING_PROPS.isdisjoint(bone.keys()):
+            show_warning = True
+        if bone.rigify_type in outdated_types:
+            if outdated_types[bone.rigify_type]:
+                updatable = True
+            else:
+                not_updatable = True
+
+    status = (show_warning, updatable, not_updatable)
+    _armature_status[key] = (obj.name, status)
+    return status
+
+
+def get_metarig_status():
+    """ Returns (show_warning, show_update_metarig, show_not_updatable) for
+        all the armatures in the file.
+    """
+    global _metarig_status
+    if _metarig_status is None:
+        statuses = [get_armature_status(obj) for obj in bpy.data.objects if obj.type == 'ARMATURE']
+        show_not_updatable = any(s[2] for s in statuses)
+        _metarig_status = (any(s[0] for s in statuses),
+                           any(s[1] for s in statuses) and not show_not_updatable,
+                           show_not_updatable)
+    return _metarig_status
+
+
+def clear_metarig_status():
+    global _metarig_status, _armature_keys
+    _armature_status.clear()
+    _metarig_status = None
+    _armature_keys = None
+
+
+@persistent
+def update_metarig_status(scene):
+    """ Drops the cached status of armatures that were updated, for example
+        by a change of the rigify type of one of their bones.
+    """
+    global _metarig_status, _armature_keys
+    keys = {obj.as_pointer() for obj in bpy.data.objects if obj.type == 'ARMATURE'}
+    if keys != _armature_keys:
+        # Armatures were added or removed
+        clear_metarig_status()
+        _armature_keys = keys
+        return
+
+    for key, (name, status) in list(_armature_status.items()):
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.as_pointer() != key or obj.is_updated or obj.is_updated_data:
+            del _armature_status[key]
+            _metarig_status = None
+
+
+@persistent
+def load_metarig_status(dummy):
+    clear_metarig_status()
+
+
+_pickers_key = None  # What the target rig and rig UI pickers hold, see update_generation_pickers()
+_picker_rigs = {}  # {object pointer: name} of the target rig candidates
+
+
+def sync_names(collection, names):
+    """ Makes a collection of RigifyName hold names, removing and adding
+        only the items that changed.
+    """
+    missing = set(names)
+    for i in reversed(range(len(collection))):
+        name = collection[i].name
+        if name in missing:
+            missing.remove(name)
+        else:
+            collection.remove(i)
+
+    for name in names:
+        if name in missing:
+            a = collection.add()
+            a.name = name
+
+
+def update_generation_pickers(scene, id_store):
+    """ Updates the candidates of the target rig and rig UI pickers, when
+        the scene changed or its objects or the texts were added, removed or
+        renamed since the last time.  A renamed target rig stays the target.
+    """
+    global _pickers_key, _picker_rigs
+    key = (scene.as_pointer(), tuple(scene.objects.keys()), tuple(bpy.data.texts.keys()))
+    if key == _pickers_key:
+        return
+
+    rigs = {ob.as_pointer(): ob.name for ob in scene.objects if ob.type == 'ARMATURE' and "rig_id" in ob.data}
+    target = id_store.rigify_target_rig
+    if target and target not in rigs.values():
+        for pointer, name in _picker_rigs.items():
+            if name == target and pointer in rigs:
+                id_store.rigify_target_rig = rigs[pointer]
+                break
+
+    sync_names(id_store.rigify_target_rigs, list(rigs.values()))
+    sync_names(id_store.rigify_rig_uis, [t.name for t in bpy.data.texts])
+    _pickers_key = key
+    _picker_rigs = rigs
+
+
+@persistent
+def update_generation_pickers_handler(scene):
+    global _pickers_key
+    if bpy.data.objects.is_updated or bpy.data.texts.is_updated:
+        _pickers_key = None
+
+
+@persistent
+def load_generation_pickers(dummy):
+    global _pickers_key, _picker_rigs
+    _pickers_key = None
+    _picker_rigs = {}
+
+
+@persistent
+def load_widget_library(dummy):
+    # The library index holds mesh names of the previous file
+    clear_widget_library()
+
+
 class DATA_PT_rigify_buttons(bpy.types.Panel):
     bl_label = "Rigify Buttons"
     bl_space_type = 'PROPERTIES'
@@ -53,27 +222,7 @@ class DATA_PT_rigify_buttons(bpy.types.Panel):
         if obj.mode in {'POSE', 'OBJECT'}:
 
             WARNING = "Warning: Some features may change after generation"
-            show_warning = False
-            show_update_metarig = False
-            show_not_updatable = False
-
-            check_props = ['IK_follow', 'root/parent', 'FK_limb_follow', 'IK_Stretch']
-
-            for obj in bpy.data.objects:
-                if type(obj.data) != bpy.types.Armature:
-                    continue
-                for bone in obj.pose.bones:
-                    if bone.bone.layers[30] and (list(set(bone.keys()) & set(check_props))):
-                        show_warning = True
-                        break
-                for b in obj.pose.bones:
-                    if b.rigify_type in outdated_types.keys():
-                        if outdated_types[b.rigify_type]:
-                            show_update_metarig = True
-                        else:
-                            show_update_metarig = False
-                            show_not_updatable = True
-                            break
+            show_warning, show_update_metarig, show_not_updatable = get_metarig_status()
 
             if show_warning:
                 layout.label(text=WARNING, icon='ERROR')
@@ -125,26 +274,13 @@ class DATA_PT_rigify_buttons(bpy.types.Panel):
                 row = col2.row(align=True)
                 row.prop(id_store, "rigify_rig_basename", text="", icon="SORTALPHA")
 
-                row = col2.row(align=True)
-                for i in range(0, len(id_store.rigify_target_rigs)):
-                    id_store.rigify_target_rigs.remove(0)
-
-                for ob in context.scene.objects:
-                    if type(ob.data) == bpy.types.Armature and "rig_id" in ob.data:
-                        id_store.rigify_target_rigs.add()
-                        id_store.rigify_target_rigs[-1].name = ob.name
+                update_generation_pickers(context.scene, id_store)
 
+                row = col2.row(align=True)
                 row.prop_search(id_store, "rigify_target_rig", id_store, "rigify_target_rigs", text="",
                                 icon='OUTLINER_OB_ARMATURE')
                 row.enabled = (id_store.rigify_generate_mode == "overwrite")
 
-                for i in range(0, len(id_store.rigify_rig_uis)):
-                    id_store.rigify_rig_uis.remove(0)
-
-                for t in bpy.data.texts:
-                    id_store.rigify_rig_uis.add()
-                    id_store.rigify_rig_uis[-1].name = t.name
-
                 row = col2.row()
                 row.prop_search(id_store, "rigify_rig_ui", id_store, "rigify_rig_uis", text="", icon='TEXT')
                 row.enabled = (id_store.rigify_generate_mode == "overwrite")
@@ -154,36 +290,17 @@ class DATA_PT_rigify_buttons(bpy.types.Panel):
                 if id_store.rigify_generate_mode == 'new':
                     row.enabled = False
 
+                row = col.row()
+                row.prop(id_store, "rigify_reconcile_widgets")
+                if id_store.rigify_generate_mode == 'new' or id_store.rigify_force_widget_update:
+                    row.enabled = False
+
+                row = col.row()
+                row.prop(id_store, "rigify_unlinked_widgets")
+
         elif obj.mode == 'EDIT':
             # Build types list
-            collection_name = str(id_store.rigify_collection).replace(" ", "")
-
-            for i in range(0, len(id_store.rigify_types)):
-                id_store.rigify_types.remove(0)
-
-            for r in rig_lists.rig_list:
-
-                if collection_name == "All":
-                    a = id_store.rigify_types.add()
-                    a.name = r
-                elif r.startswith(collection_name + '.'):
-                    a = id_store.rigify_types.add()
-                    a.name = r
-                elif (collection_name == "None") and ("." not in r):
-                    a = id_store.rigify_types.add()
-                    a.name = r
-
-            if 'external' in rig_lists.rigs_dict and rig_lists.rigs_dict['external']:
-                for r in rig_lists.rigs_dict['external']['rig_list']:
-                    if collection_name == "All":
-                        a = id_store.rigify_types.add()
-                        a.name = r
-                    elif r.startswith(collection_name + '.'):
-                        a = id_store.rigify_types.add()
-                        a.name = r
-                    elif (collection_name == "None") and ("." not in r):
-                        a = id_store.rigify_types.add()
-                        a.name = r
+            fill_rig_types(id_store, implementation=True)
 
             # Rig type list
             row = layout.row()
@@ -587,42 +704,12 @@ class BONE_PT_rigify_buttons(bpy.types.Panel):
         C = context
         id_store = C.window_manager
         bone = context.active_pose_bone
-        collection_name = str(id_store.rigify_collection).replace(" ", "")
         rig_name = str(context.active_pose_bone.rigify_type).replace(" ", "")
 
         layout = self.layout
 
         # Build types list
-        for i in range(0, len(id_store.rigify_types)):
-            id_store.rigify_types.remove(0)
-
-        for r in rig_lists.rig_list:
-            if r in rig_lists.implementation_rigs:
-                continue
-            # collection = r.split('.')[0]  # UNUSED
-            if collection_name == "All":
-                a = id_store.rigify_types.add()
-                a.name = r
-            elif r.startswith(collection_name + '.'):
-                a = id_store.rigify_types.add()
-                a.name = r
-            elif collection_name == "None" and len(r.split('.')) == 1:
-                a = id_store.rigify_types.add()
-                a.name = r
-
-        if 'external' in rig_lists.rigs_dict:
-            for r in rig_lists.rigs_dict['external']['rig_list']:
-                if r in rig_lists.rigs_dict['external']['implementation_rigs']:
-                    continue
-                if collection_name == "All":
-                    a = id_store.rigify_types.add()
-                    a.name = r
-                elif r.startswith(collection_name + '.'):
-                    a = id_store.rigify_types.add()
-                    a.name = r
-                elif collection_name == "None" and len(r.split('.')) == 1:
-                    a = id_store.rigify_types.add()
-                    a.name = r
+        fill_rig_types(id_store, implementation=False)
 
         # Rig type field
         row = layout.row()
@@ -631,11 +718,8 @@ class BONE_PT_rigify_buttons(bpy.types.Panel):
         # Rig type parameters / Rig type non-exist alert
         if rig_name != "":
             try:
-                if 'external' in rig_lists.rigs_dict and rig_name in rig_lists.rigs_dict['external']['rig_list']:
-                    custom_rigs_folder = bpy.context.user_preferences.addons['rigify'].preferences.custom_rigs_folder
-                    rig = get_rig_type(rig_name, custom_rigs_folder)
-                else:
-                    rig = get_rig_type(rig_name)
+                # Source changes are picked up on generation, or with Reload Rig Types
+                rig = rig_lists.get_rig_module(rig_name, check_source=False)
                 rig.Rig
             except (ImportError, AttributeError):
                 row = layout.row()
@@ -648,6 +732,7 @@ class BONE_PT_rigify_buttons(bpy.types.Panel):
                     col = layout.column()
                     col.label(text="No options")
                 else:
+                    rig_lists.ensure_rig_parameters(rig_name)
                     col = layout.column()
                     col.label(text="Options:")
                     box = layout.box()
@@ -672,6 +757,8 @@ class VIEW3D_PT_tools_rigify_dev(bpy.types.Panel):
                 r.operator("armature.rigify_encode_metarig", text="Encode Metarig to Python")
                 r = self.layout.row()
                 r.operator("armature.rigify_encode_metarig_sample", text="Encode Sample to Python")
+                r = self.layout.row()
+                r.operator("pose.rigify_reload_rig_types", text="Reload Rig Types")
 
             if context.mode == 'EDIT_MESH':
                 r = self.layout.row()
@@ -792,6 +879,19 @@ class Generate(bpy.types.Operator):
         return {'FINISHED'}
 
 
+class ReloadRigTypes(bpy.types.Operator):
+    """Executes the rig type modules again, to pick up changes to their code"""
+
+    bl_idname = "pose.rigify_reload_rig_types"
+    bl_label = "Rigify Reload Rig Types"
+    bl_description = 'Reloads the code of the rig types, for rig developers'
+
+    def execute(self, context):
+        count = reload_rig_types()
+        self.report({'INFO'}, "Reloaded %d rig types" % count)
+        return {'FINISHED'}
+
+
 class UpgradeMetarigTypes(bpy.types.Operator):
     """Upgrades metarig bones rigify_types"""
 
@@ -848,6 +948,7 @@ class Sample(bpy.types.Operator):
                 else:
                     rig = get_rig_type(self.metarig_type)
                 create_sample = rig.create_sample
+                rig_lists.ensure_rig_parameters(self.metarig_type)
             except (ImportError, AttributeError):
                 raise Exception("rig type '" + self.metarig_type + "' has no sample.")
             else:
@@ -964,6 +1065,7 @@ def FktoIk(rig, window='ALL'):
     rig_id = rig.data['rig_id']
     leg_ik2fk = eval('bpy.ops.pose.rigify_leg_ik2fk_' + rig_id)
     arm_ik2fk = eval('bpy.ops.pose.rigify_arm_ik2fk_' + rig_id)
+    from .rigs.utils import get_limb_generated_names
     limb_generated_names = get_limb_generated_names(rig)
 
     if window == 'ALL':
@@ -1042,6 +1144,7 @@ def IktoFk(rig, window='ALL'):
     rig_id = rig.data['rig_id']
     leg_fk2ik = eval('bpy.ops.pose.rigify_leg_fk2ik_' + rig_id)
     arm_fk2ik = eval('bpy.ops.pose.rigify_arm_fk2ik_' + rig_id)
+    from .rigs.utils import get_limb_generated_names
     limb_generated_names = get_limb_generated_names(rig)
 
     if window == 'ALL':
@@ -1155,6 +1258,7 @@ def rotPoleToggle(rig, window='ALL', value=False, toggle=False, bake=False):
     arm_fk2ik = eval('bpy.ops.pose.rigify_arm_fk2ik_' + rig_id)
     leg_ik2fk = eval('bpy.ops.pose.rigify_leg_ik2fk_' + rig_id)
     arm_ik2fk = eval('bpy.ops.pose.rigify_arm_ik2fk_' + rig_id)
+    from .rigs.utils import get_limb_generated_names
     limb_generated_names = get_limb_generated_names(rig)
 
     if window == 'ALL':
@@ -1320,6 +1424,7 @@ class OBJECT_OT_ClearAnimation(bpy.types.Operator):
             if not act:
                 return {'FINISHED'}
 
+            from .rigs.utils import get_limb_generated_names
             clearAnimation(act, self.type, names=get_limb_generated_names(rig))
         finally:
             context.user_preferences.edit.use_global_undo = use_global_undo
@@ -1366,6 +1471,7 @@ def register():
     bpy.utils.register_class(VIEW3D_PT_tools_rigify_dev)
     bpy.utils.register_class(LayerInit)
     bpy.utils.register_class(Generate)
+    bpy.utils.register_class(ReloadRigTypes)
     bpy.utils.register_class(UpgradeMetarigTypes)
     bpy.utils.register_class(SwitchToLegacy)
     bpy.utils.register_class(Sample)
@@ -1382,9 +1488,22 @@ def register():
 
     rot_mode.register()
 
+    bpy.app.handlers.scene_update_post.append(update_metarig_status)
+    bpy.app.handlers.load_post.append(load_metarig_status)
+    bpy.app.handlers.scene_update_post.append(update_generation_pickers_handler)
+    bpy.app.handlers.load_post.append(load_generation_pickers)
+    bpy.app.handlers.load_post.append(load_widget_library)
+
 
 def unregister():
 
+    bpy.app.handlers.scene_update_post.remove(update_metarig_status)
+    bpy.app.handlers.load_post.remove(load_metarig_status)
+    bpy.app.handlers.scene_update_post.remove(update_generation_pickers_handler)
+    bpy.app.handlers.load_post.remove(load_generation_pickers)
+    bpy.app.handlers.load_post.remove(load_widget_library)
+    clear_metarig_status()
+
     bpy.utils.unregister_class(DATA_OT_rigify_add_bone_groups)
     bpy.utils.unregister_class(DATA_OT_rigify_use_standard_colors)
     bpy.utils.unregister_class(DATA_OT_rigify_apply_selection_colors)
@@ -1402,6 +1521,7 @@ def unregister():
     bpy.utils.unregister_class(VIEW3D_PT_tools_rigify_dev)
     bpy.utils.unregister_class(LayerInit)
     bpy.utils.unregister_class(Generate)
+    bpy.utils.unregister_class(ReloadRigTypes)
     bpy.utils.unregister_class(UpgradeMetarigTypes)
     bpy.utils.unregister_class(SwitchToLegacy)
     bpy.utils.unregister_class(Sample)
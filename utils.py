@@ -19,14 +19,17 @@
 # <pep8 compliant>
 
 import bpy
+import hashlib
 import imp
 import importlib
 import importlib.util
 import math
+import numpy as np
 import random
 import time
 import re
 import os
+import sys
 from mathutils import Vector, Matrix, Color
 from rna_prop_ui import rna_idprop_ui_prop_get
 
@@ -178,6 +181,7 @@ def upgradeMetarigTypes(metarig, revert=False):
 
     :param revert: revert types to previous version (if old type available)
     """
+    from . import rig_lists  # Imports utils itself
 
     if revert:
         vals = list(outdated_types.values())
@@ -196,10 +200,346 @@ def upgradeMetarigTypes(metarig, revert=False):
             if 'paw' in rig_type:
                 bone.rigfy_parameters.limb_type = 'paw'
             if rig_type == "basic.copy":
+                rig_lists.ensure_rig_parameters(bone.rigify_type)
                 bone.rigify_parameters.make_widget = False
 
 
 
+#=======================
+# Generation session
+#=======================
+
+class GenerationSession:
+    """ Keeps track of the mode of the rig being generated, so that mode
+        switches only happen when a phase actually needs them.
+        Pose bone work requested while in edit mode (e.g. copying the pose
+        attributes of a freshly copied bone) is queued and run on the next
+        switch out of edit mode, when the pose bones exist.
+        This is only done while the session drives the mode switches: rigs
+        switching modes with the mode_set operator get the work done right
+        away, and a switch the session didn't make is caught up on by sync().
+        Widgets are likewise placed at their bones in one pass at the end.
+    """
+    def __init__(self, obj):
+        self.obj = obj
+        self.mode_switches = 0
+        self.pending = []
+        self._driving = True
+        self.known_mode = obj.mode  # Mode the session last set or saw
+        self.org_index = None  # BoneIndex of the original bones of the rig
+        self.bones = BoneLookup(obj)
+        self.widgets = set()  # Names of the widgets created or updated
+        self.widget_placements = []  # [(widget object name, bone name)], see place_widgets()
+
+    @property
+    def mode(self):
+        return self.obj.mode
+
+    @property
+    def driving(self):
+        """ False while running rigs that may call mode_set themselves.
+        """
+        return self._driving
+
+    @driving.setter
+    def driving(self, driving):
+        if driving == self._driving:
+            return
+        self.sync()
+        if not driving and self.pending:
+            # Run the queued work before the rig can touch the pose bones
+            mode = self.obj.mode
+            self.set_mode('OBJECT')
+            self.set_mode(mode)
+        # Handles may not survive the other rigs' mode switches
+        self.bones.clear()
+        self._driving = driving
+
+    def sync(self):
+        """ Catches up with a mode switch made behind the session's back:
+            drops the bone handles, and runs the queued work if the rig
+            left edit mode.
+        """
+        mode = self.obj.mode
+        if mode != self.known_mode:
+            self.known_mode = mode
+            self.bones.clear()
+            if mode != 'EDIT':
+                self.flush()
+
+    def set_mode(self, mode):
+        """ Switches the rig to the given mode, unless it is already in it.
+        """
+        self.sync()
+        if self.obj.mode != mode:
+            bpy.ops.object.mode_set(mode=mode)
+            self.mode_switches += 1
+            self.known_mode = mode
+            self.bones.clear()
+            if mode != 'EDIT':
+                self.flush()
+        elif mode == 'EDIT':
+            # Rig code may have removed edit bones without remove_edit_bone()
+            self.bones.clear()
+
+    def defer(self, func, *args):
+        """ Calls func(*args) once pose bones are up to date: right away
+            outside of edit mode, otherwise after leaving edit mode.
+            If the session isn't driving the mode switches, the rig is
+            taken out of edit mode and back for the call.
+        """
+        self.sync()
+        if self.obj.mode != 'EDIT':
+            func(*args)
+        elif self.driving:
+            self.pending.append((func, args))
+        else:
+            self.set_mode('OBJECT')
+            func(*args)
+            self.set_mode('EDIT')
+
+    def flush(self):
+        pending = self.pending
+        self.pending = []
+        for func, args in pending:
+            func(*args)
+
+    def place_widgets(self):
+        """ Moves the widgets created so far to their bones, in one pass.
+            Needs the rig out of edit mode.
+        """
+        placements = self.widget_placements
+        self.widget_placements = []
+        if placements:
+            # Look the objects up by name, in case a widget was replaced
+            objects = {obj.name: obj for obj in bpy.data.objects}
+            place_widgets(self.obj, [(objects[name], bone_name) for name, bone_name in placements
+                                     if name in objects])
+
+
+class BoneLookup:
+    """ Name to bone cache of an armature, for one mode session.
+        Edit bones and bones are found by a linear search of their name,
+        so rig code looking them up over and over scales quadratically
+        with the bone count.
+        Handles are never checked before being returned, since reading a
+        freed one crashes: the generation session drops them on every
+        mode switch it makes or sees, as leaving edit mode frees both edit
+        bones and bones, on every set_mode('EDIT'), and bone by bone in
+        remove_edit_bone().  The cache is only used while the session
+        drives the mode switches.  Handles are keyed by the name they were
+        looked up with, so bones are named when copied (see copy_bone())
+        rather than renamed afterwards.
+    """
+    def __init__(self, obj):
+        self.obj = obj
+        self.edit_bones = {}  # {name: EditBone}
+        self.pose_bones = {}  # {name: PoseBone}
+        self.data_bones = {}  # {name: Bone}
+
+    def clear(self):
+        self.edit_bones.clear()
+        self.pose_bones.clear()
+        self.data_bones.clear()
+
+    def _lookup(self, cache, collection, name):
+        bone = cache.get(name)
+        if bone is None:
+            bone = collection[name]
+            cache[name] = bone
+        return bone
+
+    def add_edit_bone(self, edit_bone):
+        """ Records an edit bone the session just created.
+        """
+        self.edit_bones[edit_bone.name] = edit_bone
+
+    def edit_bone(self, name):
+        return self._lookup(self.edit_bones, self.obj.data.edit_bones, name)
+
+    def pose_bone(self, name):
+        return self._lookup(self.pose_bones, self.obj.pose.bones, name)
+
+    def data_bone(self, name):
+        return self._lookup(self.data_bones, self.obj.data.bones, name)
+
+    def forget(self, name):
+        """ Drops the handles of a bone, which must be done before removing it.
+        """
+        self.edit_bones.pop(name, None)
+        self.pose_bones.pop(name, None)
+        self.data_bones.pop(name, None)
+
+
+_session = None
+
+
+def begin_session(obj):
+    """ Starts a generation session for the given rig object.
+    """
+    global _session
+    _session = GenerationSession(obj)
+    return _session
+
+
+def end_session():
+    """ Ends the current generation session and returns it.
+    """
+    global _session
+    session = _session
+    _session = None
+    if session is not None and session.mode != 'EDIT':
+        session.flush()
+        session.place_widgets()
+    return session
+
+
+def abort_session():
+    """ Drops the current generation session, if any, without running the
+        work queued on it.  For when generation failed.
+    """
+    global _session
+    _session = None
+
+
+def get_session(obj=None):
+    """ Returns the current generation session, or None.
+        If obj is given, only a session generating that object is returned.
+    """
+    if _session is not None and (obj is None or _session.obj == obj):
+        return _session
+    return None
+
+
+def set_mode(mode):
+    """ Switches mode through the generation session if there is one,
+        otherwise just calls the mode_set operator.
+    """
+    if _session is not None:
+        _session.set_mode(mode)
+    else:
+        bpy.ops.object.mode_set(mode=mode)
+
+
+def _get_bone_lookup(obj):
+    """ Returns the bone lookup of the generation session of obj, or None
+        if there is no session or it isn't driving the mode switches.
+    """
+    if _session is not None and _session.obj == obj:
+        _session.sync()
+        if _session.driving:
+            return _session.bones
+    return None
+
+
+def get_edit_bone(obj, bone_name):
+    """ Returns obj.data.edit_bones[bone_name], from the bone lookup of the
+        generation session if there is one.  Raises KeyError if there is no
+        such bone.
+    """
+    lookup = _get_bone_lookup(obj)
+    if lookup is not None:
+        return lookup.edit_bone(bone_name)
+    return obj.data.edit_bones[bone_name]
+
+
+def get_pose_bone(obj, bone_name):
+    """ Returns obj.pose.bones[bone_name], see get_edit_bone().
+    """
+    lookup = _get_bone_lookup(obj)
+    if lookup is not None:
+        return lookup.pose_bone(bone_name)
+    return obj.pose.bones[bone_name]
+
+
+def get_data_bone(obj, bone_name):
+    """ Returns obj.data.bones[bone_name], see get_edit_bone().
+    """
+    lookup = _get_bone_lookup(obj)
+    if lookup is not None:
+        return lookup.data_bone(bone_name)
+    return obj.data.bones[bone_name]
+
+
+def has_edit_bone(obj, bone_name):
+    try:
+        get_edit_bone(obj, bone_name)
+    except KeyError:
+        return False
+    return True
+
+
+def remove_edit_bone(obj, bone_name):
+    """ Removes an edit bone, dropping its cached handles first.
+    """
+    lookup = _get_bone_lookup(obj)
+    if lookup is not None:
+        lookup.forget(bone_name)
+    obj.data.edit_bones.remove(obj.data.edit_bones[bone_name])
+
+
+#=======================
+# Bone hierarchy
+#=======================
+
+class BoneIndex:
+    """ Parent/children index of the bones of an armature, built once from
+        the parent links of bones or edit bones.  Queries don't touch RNA.
+    """
+    def __init__(self, bones):
+        self.parents = {}   # {name: parent name or None}
+        self.children = {}  # {name: [child names, alphabetical]}
+        for bone in bones:
+            parent = bone.parent
+            self.parents[bone.name] = parent.name if parent else None
+            self.children[bone.name] = []
+        for name, parent in self.parents.items():
+            if parent is not None:
+                self.children[parent].append(name)
+        for children in self.children.values():
+            children.sort()
+
+    def __contains__(self, name):
+        return name in self.parents
+
+    def parent(self, name):
+        return self.parents[name]
+
+    def roots(self):
+        return sorted(name for name, parent in self.parents.items() if parent is None)
+
+    def parent_recursive(self, name):
+        """ Returns the ancestors of a bone, nearest first.
+        """
+        result = []
+        parent = self.parents[name]
+        while parent is not None:
+            result.append(parent)
+            parent = self.parents[parent]
+        return result
+
+    def children_recursive(self, name):
+        """ Returns the descendants of a bone, breadth first.
+        """
+        result = []
+        level = self.children[name]
+        while level:
+            result += level
+            level = [child for n in level for child in self.children[n]]
+        return result
+
+    def breadth_first(self):
+        """ Returns all the bone names, root-most to leaf-most, and
+            alphabetical among bones at the same depth.
+        """
+        order = []
+        level = self.roots()
+        while level:
+            order += level
+            level = sorted(child for name in level for child in self.children[name])
+        return order
+
+
 #=======================
 # Bone manipulation
 #=======================
@@ -214,8 +554,19 @@ def new_bone(obj, bone_name):
         edit_bone.head = (0, 0, 0)
         edit_bone.tail = (0, 1, 0)
         edit_bone.roll = 0
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.mode_set(mode='EDIT')
+        lookup = _get_bone_lookup(obj)
+        if lookup is not None:
+            # The session creates the pose bone on its next mode switch
+            lookup.add_edit_bone(edit_bone)
+        else:
+            # Sync so that the pose bone exists
+            session = get_session(obj)
+            if session is not None:
+                session.set_mode('OBJECT')
+                session.set_mode('EDIT')
+            else:
+                bpy.ops.object.mode_set(mode='OBJECT')
+                bpy.ops.object.mode_set(mode='EDIT')
         return name
     else:
         raise MetarigError("Can't add new bone '%s' outside of edit mode" % bone_name)
@@ -226,18 +577,21 @@ def copy_bone_simple(obj, bone_name, assign_name=''):
         but only copies head, tail positions and roll. Does not
         address parenting either.
     """
-    #if bone_name not in obj.data.bones:
-    if bone_name not in obj.data.edit_bones:
-        raise MetarigError("copy_bone(): bone '%s' not found, cannot copy it" % bone_name)
-
     if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
+        #if bone_name not in obj.data.bones:
+        if not has_edit_bone(obj, bone_name):
+            raise MetarigError("copy_bone(): bone '%s' not found, cannot copy it" % bone_name)
+
         if assign_name == '':
             assign_name = bone_name
         # Copy the edit bone
-        edit_bone_1 = obj.data.edit_bones[bone_name]
+        edit_bone_1 = get_edit_bone(obj, bone_name)
         edit_bone_2 = obj.data.edit_bones.new(assign_name)
         bone_name_1 = bone_name
         bone_name_2 = edit_bone_2.name
+        lookup = _get_bone_lookup(obj)
+        if lookup is not None:
+            lookup.add_edit_bone(edit_bone_2)
 
         # Copy edit bone attributes
         edit_bone_2.layers = list(edit_bone_1.layers)
@@ -251,22 +605,73 @@ def copy_bone_simple(obj, bone_name, assign_name=''):
         raise MetarigError("Cannot copy bones outside of edit mode")
 
 
+# Bone properties copy_rest_bone() sets itself rather than through the copy plan
+REST_BONE_EXCLUDED = {'name', 'head', 'tail', 'head_local', 'tail_local', 'matrix', 'matrix_local'}
+
+_rest_bone_settings = None  # Writable settings shared by Bone and EditBone, see get_rest_bone_settings()
+
+
+def get_rest_bone_settings(bone, edit_bone):
+    """ Returns the names of the settings copy_rest_bone() copies: the copy
+        plan of Bone, minus the transform and the bone pointers, limited to
+        what EditBone also has.
+    """
+    global _rest_bone_settings
+    if _rest_bone_settings is None:
+        edit_props = edit_bone.bl_rna.properties
+        _rest_bone_settings = [key for key in get_copy_plan(bone)
+                               if key not in REST_BONE_EXCLUDED and key in edit_props
+                               and edit_props[key].type != 'POINTER' and not edit_props[key].is_readonly]
+    return _rest_bone_settings
+
+
+def set_rest_bone(edit_bone, bone):
+    """ Gives an edit bone the rest position and settings of a Bone, which
+        may belong to any armature.  Does not address parenting.
+    """
+    for prop in get_rest_bone_settings(bone, edit_bone):
+        setattr(edit_bone, prop, getattr(bone, prop))
+
+    # The matrix gives the roll, head and tail are then set exactly
+    edit_bone.head = bone.head_local
+    edit_bone.tail = bone.tail_local
+    edit_bone.matrix = bone.matrix_local
+    edit_bone.head = bone.head_local
+    edit_bone.tail = bone.tail_local
+
+
+def copy_rest_bone(obj, bone, assign_name=''):
+    """ Makes an edit bone in the given armature object from the rest
+        position and settings of a Bone, which may belong to any armature.
+        Does not address parenting.  Returns the resulting bone's name.
+    """
+    if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
+        edit_bone = obj.data.edit_bones.new(assign_name or bone.name)
+        set_rest_bone(edit_bone, bone)
+        return edit_bone.name
+    else:
+        raise MetarigError("Cannot copy bones outside of edit mode")
+
+
 def copy_bone(obj, bone_name, assign_name=''):
     """ Makes a copy of the given bone in the given armature object.
         Returns the resulting bone's name.
     """
-    #if bone_name not in obj.data.bones:
-    if bone_name not in obj.data.edit_bones:
-        raise MetarigError("copy_bone(): bone '%s' not found, cannot copy it" % bone_name)
-
     if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
+        #if bone_name not in obj.data.bones:
+        if not has_edit_bone(obj, bone_name):
+            raise MetarigError("copy_bone(): bone '%s' not found, cannot copy it" % bone_name)
+
         if assign_name == '':
             assign_name = bone_name
         # Copy the edit bone
-        edit_bone_1 = obj.data.edit_bones[bone_name]
+        edit_bone_1 = get_edit_bone(obj, bone_name)
         edit_bone_2 = obj.data.edit_bones.new(assign_name)
         bone_name_1 = bone_name
         bone_name_2 = edit_bone_2.name
+        lookup = _get_bone_lookup(obj)
+        if lookup is not None:
+            lookup.add_edit_bone(edit_bone_2)
 
         edit_bone_2.parent = edit_bone_1.parent
         edit_bone_2.use_connect = edit_bone_1.use_connect
@@ -287,50 +692,64 @@ def copy_bone(obj, bone_name, assign_name=''):
         edit_bone_2.bbone_easein = edit_bone_1.bbone_easein
         edit_bone_2.bbone_easeout = edit_bone_1.bbone_easeout
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        # Get the pose bones
-        pose_bone_1 = obj.pose.bones[bone_name_1]
-        pose_bone_2 = obj.pose.bones[bone_name_2]
-
-        # Copy pose bone attributes
-        pose_bone_2.rotation_mode = pose_bone_1.rotation_mode
-        pose_bone_2.rotation_axis_angle = tuple(pose_bone_1.rotation_axis_angle)
-        pose_bone_2.rotation_euler = tuple(pose_bone_1.rotation_euler)
-        pose_bone_2.rotation_quaternion = tuple(pose_bone_1.rotation_quaternion)
-
-        pose_bone_2.lock_location = tuple(pose_bone_1.lock_location)
-        pose_bone_2.lock_scale = tuple(pose_bone_1.lock_scale)
-        pose_bone_2.lock_rotation = tuple(pose_bone_1.lock_rotation)
-        pose_bone_2.lock_rotation_w = pose_bone_1.lock_rotation_w
-        pose_bone_2.lock_rotations_4d = pose_bone_1.lock_rotations_4d
-
-        # Copy custom properties
-        for key in pose_bone_1.keys():
-            if key != "_RNA_UI" \
-            and key != "rigify_parameters" \
-            and key != "rigify_type":
-                prop1 = rna_idprop_ui_prop_get(pose_bone_1, key, create=False)
-                prop2 = rna_idprop_ui_prop_get(pose_bone_2, key, create=True)
-                pose_bone_2[key] = pose_bone_1[key]
-                for key in prop1.keys():
-                    prop2[key] = prop1[key]
-
-        bpy.ops.object.mode_set(mode='EDIT')
+        session = get_session(obj)
+        if session is not None:
+            session.defer(copy_pose_bone_attributes, obj, bone_name_1, bone_name_2)
+        else:
+            bpy.ops.object.mode_set(mode='OBJECT')
+            copy_pose_bone_attributes(obj, bone_name_1, bone_name_2)
+            bpy.ops.object.mode_set(mode='EDIT')
 
         return bone_name_2
     else:
         raise MetarigError("Cannot copy bones outside of edit mode")
 
 
+def copy_pose_bone_attributes(obj, bone_name_1, bone_name_2):
+    """ Copies rotation mode, locks and custom properties from one pose
+        bone to another.  Must not be called in edit mode.
+    """
+    try:
+        pose_bone_1 = get_pose_bone(obj, bone_name_1)
+        pose_bone_2 = get_pose_bone(obj, bone_name_2)
+    except KeyError as e:
+        # One of the bones was removed or renamed before its pose bone existed
+        print("Rigify: can't copy pose settings from '%s' to '%s', no pose bone %s" % (bone_name_1, bone_name_2, e))
+        return
+
+    # Copy pose bone attributes
+    pose_bone_2.rotation_mode = pose_bone_1.rotation_mode
+    pose_bone_2.rotation_axis_angle = tuple(pose_bone_1.rotation_axis_angle)
+    pose_bone_2.rotation_euler = tuple(pose_bone_1.rotation_euler)
+    pose_bone_2.rotation_quaternion = tuple(pose_bone_1.rotation_quaternion)
+
+    pose_bone_2.lock_location = tuple(pose_bone_1.lock_location)
+    pose_bone_2.lock_scale = tuple(pose_bone_1.lock_scale)
+    pose_bone_2.lock_rotation = tuple(pose_bone_1.lock_rotation)
+    pose_bone_2.lock_rotation_w = pose_bone_1.lock_rotation_w
+    pose_bone_2.lock_rotations_4d = pose_bone_1.lock_rotations_4d
+
+    # Copy custom properties
+    for key in pose_bone_1.keys():
+        if key != "_RNA_UI" \
+        and key != "rigify_parameters" \
+        and key != "rigify_type":
+            prop1 = rna_idprop_ui_prop_get(pose_bone_1, key, create=False)
+            prop2 = rna_idprop_ui_prop_get(pose_bone_2, key, create=True)
+            pose_bone_2[key] = pose_bone_1[key]
+            for key in prop1.keys():
+                prop2[key] = prop1[key]
+
+
 def flip_bone(obj, bone_name):
     """ Flips an edit bone.
     """
-    if bone_name not in obj.data.bones:
-        raise MetarigError("flip_bone(): bone '%s' not found, cannot copy it" % bone_name)
-
     if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
-        bone = obj.data.edit_bones[bone_name]
+        try:
+            bone = get_edit_bone(obj, bone_name)
+        except KeyError:
+            raise MetarigError("flip_bone(): bone '%s' not found, cannot copy it" % bone_name)
+
         head = Vector(bone.head)
         tail = Vector(bone.tail)
         bone.tail = head + tail
@@ -343,11 +762,11 @@ def flip_bone(obj, bone_name):
 def put_bone(obj, bone_name, pos):
     """ Places a bone at the given position.
     """
-    if bone_name not in obj.data.bones:
-        raise MetarigError("put_bone(): bone '%s' not found, cannot move it" % bone_name)
-
     if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
-        bone = obj.data.edit_bones[bone_name]
+        try:
+            bone = get_edit_bone(obj, bone_name)
+        except KeyError:
+            raise MetarigError("put_bone(): bone '%s' not found, cannot move it" % bone_name)
 
         delta = pos - bone.head
         bone.translate(delta)
@@ -364,10 +783,10 @@ def make_nonscaling_child(obj, bone_name, location, child_name_postfix=""):
         from scaling with their parents.  The named bone is assumed to be
         an ORG bone.
     """
-    if bone_name not in obj.data.bones:
-        raise MetarigError("make_nonscaling_child(): bone '%s' not found, cannot copy it" % bone_name)
-
     if obj == bpy.context.active_object and bpy.context.mode == 'EDIT_ARMATURE':
+        if bone_name not in obj.data.edit_bones:
+            raise MetarigError("make_nonscaling_child(): bone '%s' not found, cannot copy it" % bone_name)
+
         # Create desired names for bones
         name1 = make_mechanism_name(strip_org(insert_before_lr(bone_name, child_name_postfix + "_ns_ch")))
         name2 = make_mechanism_name(strip_org(insert_before_lr(bone_name, child_name_postfix + "_ns_intr")))
@@ -395,28 +814,34 @@ def make_nonscaling_child(obj, bone_name, location, child_name_postfix=""):
         put_bone(obj, child, location)
         put_bone(obj, intermediate_parent, location)
 
-        # Object mode
-        bpy.ops.object.mode_set(mode='OBJECT')
-        pb = obj.pose.bones
-
-        # Add constraints
-        con = pb[child].constraints.new('COPY_LOCATION')
-        con.name = "parent_loc"
-        con.target = obj
-        con.subtarget = intermediate_parent
-
-        con = pb[child].constraints.new('COPY_ROTATION')
-        con.name = "parent_loc"
-        con.target = obj
-        con.subtarget = intermediate_parent
-
-        bpy.ops.object.mode_set(mode='EDIT')
+        # Add constraints, once the pose bones exist
+        session = get_session(obj)
+        if session is not None:
+            session.defer(_make_nonscaling_constraints, obj, child, intermediate_parent)
+        else:
+            bpy.ops.object.mode_set(mode='OBJECT')
+            _make_nonscaling_constraints(obj, child, intermediate_parent)
+            bpy.ops.object.mode_set(mode='EDIT')
 
         return child
     else:
         raise MetarigError("Cannot make nonscaling child outside of edit mode")
 
 
+def _make_nonscaling_constraints(obj, child, intermediate_parent):
+    pb = obj.pose.bones
+
+    con = pb[child].constraints.new('COPY_LOCATION')
+    con.name = "parent_loc"
+    con.target = obj
+    con.subtarget = intermediate_parent
+
+    con = pb[child].constraints.new('COPY_ROTATION')
+    con.name = "parent_loc"
+    con.target = obj
+    con.subtarget = intermediate_parent
+
+
 #=============================================
 # Widget creation
 #=============================================
@@ -441,56 +866,290 @@ def obj_to_bone(obj, rig, bone_name):
     obj.scale = (bone.length * scl_avg), (bone.length * scl_avg), (bone.length * scl_avg)
 
 
+def use_unlinked_widgets():
+    """ Whether generated widgets are kept out of the scene, in a group.
+    """
+    return getattr(bpy.context.window_manager, "rigify_unlinked_widgets", False)
+
+
+def use_widget_reconciliation():
+    """ Whether existing widgets are updated in place: rebuilt if their shape
+        changed, moved if their bone moved, and deleted if no longer used.
+    """
+    return getattr(bpy.context.window_manager, "rigify_reconcile_widgets", False)
+
+
+def get_widget_matrices(rig, bone_names):
+    """ Returns the transforms obj_to_bone() gives the widgets of bones, as
+        an (n, 4, 4) array.  The matrices and lengths of all the bones are
+        read at once.
+    """
+    bones = rig.data.bones
+    count = len(bones)
+    matrices = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", matrices)
+    lengths = np.empty(count, dtype=np.float32)
+    bones.foreach_get("length", lengths)
+
+    index = {name: i for i, name in enumerate(bones.keys())}
+    rows = [index[name] for name in bone_names]
+
+    # Matrices are read column by column
+    local = matrices.reshape(count, 4, 4).transpose(0, 2, 1)[rows].astype(np.float64)
+    world = np.matmul(np.array(rig.matrix_world), local)
+
+    # Keep the rotation, and scale uniformly by the bone length times the
+    # average scale
+    rotation = world[:, :3, :3]
+    scale = np.linalg.norm(rotation, axis=1)
+    size = scale.mean(axis=1) * lengths[rows]
+    world[:, :3, :3] = rotation / scale[:, np.newaxis, :] * size[:, np.newaxis, np.newaxis]
+    return world
+
+
+def place_widgets(rig, placements):
+    """ Moves widget objects to their bones, like obj_to_bone(), for a list
+        of (object, bone name) pairs.  Widgets still where their bone is
+        are left alone, and so are widgets of bones that no longer exist.
+    """
+    placements = [(obj, bone_name) for obj, bone_name in placements if bone_name in rig.data.bones]
+    matrices = get_widget_matrices(rig, [bone_name for obj, bone_name in placements])
+    for (obj, bone_name), basis in zip(placements, matrices):
+        # Compared with where the widget actually is, it may have been moved by hand
+        if obj.rotation_mode != 'XYZ' or not np.allclose(obj.matrix_basis, basis, atol=1e-5):
+            obj.rotation_mode = 'XYZ'
+            obj.matrix_basis = Matrix(basis.tolist())
+
+
+def place_widget(obj, rig, bone_name):
+    """ Moves a widget object to its bone.  During generation the widget is
+        queued, and placed with all the others by the session at the end,
+        so widgets can be created in any mode.
+    """
+    session = get_session(rig)
+    if session is not None:
+        session.widget_placements.append((obj.name, bone_name))
+    elif bpy.context.mode == 'EDIT_ARMATURE':
+        raise MetarigError("place_widget(): does not work while in edit mode")
+    else:
+        place_widgets(rig, [(obj, bone_name)])
+
+
+def get_widget_objects(wgts_group_name):
+    """ Returns the widget objects of a rig: the objects of its widget group,
+        and the children of its widget parent object in the scene.
+    """
+    objects = {}
+    group = bpy.data.groups.get(wgts_group_name)
+    if group is not None:
+        objects.update((ob.name, ob) for ob in group.objects)
+    parent = bpy.data.objects.get(wgts_group_name)
+    if parent is not None:
+        objects.update((ob.name, ob) for ob in parent.children)
+    return list(objects.values())
+
+
+def remove_widgets(objects):
+    """ Deletes widget objects from the file, without going through the
+        selection and the delete operator.
+    """
+    for obj in objects:
+        bpy.data.objects.remove(obj, do_unlink=True)
+
+
+def remove_orphan_widgets(rig, wgts_group_name, keep):
+    """ Deletes the widgets of a rig that are not in keep (the names of the
+        widgets created or updated by this generation) and are not the
+        custom shape of a bone, e.g. of a rig restored from the rig cache.
+        Returns the number of widgets deleted.
+    """
+    shapes = {pbone.custom_shape.name for pbone in rig.pose.bones if pbone.custom_shape}
+    orphans = [obj for obj in get_widget_objects(wgts_group_name)
+               if obj.name not in keep and obj.name not in shapes]
+    remove_widgets(orphans)
+    return len(orphans)
+
+
 def create_widget(rig, bone_name, bone_transform_name=None):
     """ Creates an empty widget object for a bone, and returns the object.
+        Widgets are linked in the scene under the WGTS_ object of the rig,
+        or, with unlinked widgets, only put in the WGTS_ group of the rig.
+        Custom shapes don't need to be in the scene.
+        If the widget already exists it is moved to the bone, and None is
+        returned.  With widget reconciliation, an existing widget built by
+        share_widget_mesh() is returned instead, with an empty mesh to be
+        filled or shared again.
     """
     if bone_transform_name is None:
         bone_transform_name = bone_name
 
     obj_name = WGT_PREFIX + rig.name + '_' + bone_name
     scene = bpy.context.scene
-    id_store = bpy.context.window_manager
+    wgts_group_name = 'WGTS_' + rig.name
+    unlinked = use_unlinked_widgets()
 
-    # Check if it already exists in the scene
-    if obj_name in scene.objects:
-        # Move object to bone position, in case it changed
-        obj = scene.objects[obj_name]
-        obj_to_bone(obj, rig, bone_transform_name)
+    obj = bpy.data.objects.get(obj_name)
+    in_scene = obj is not None and obj_name in scene.objects
 
-        return None
+    reconcile = use_widget_reconciliation()
+    session = get_session(rig)
+
+    # Check if it already exists.  Without a shape key, a widget can't be
+    # reconciled, and is built again.
+    if obj is not None and (in_scene or unlinked) \
+    and (not reconcile or WIDGET_SHAPE_PROP in obj.data):
+        if unlinked:
+            if in_scene:
+                scene.objects.unlink(obj)
+            # The group may be missing the widget, e.g. if it wasn't saved
+            add_to_widget_group(obj, wgts_group_name)
+
+        # Move object to bone position, in case it changed
+        place_widget(obj, rig, bone_transform_name)
+        if session is not None:
+            session.widgets.add(obj.name)
+
+        if not reconcile:
+            return None
+        # The caller fills the mesh, and may not share it, so the object
+        # gets an empty mesh of its own.  share_widget_mesh() puts the
+        # library mesh back if the shape didn't change.
+        obj.data = bpy.data.meshes.new(obj_name)
+        return obj
     else:
         # Delete object if it exists in blend data but not scene data.
         # This is necessary so we can then create the object without
         # name conflicts.
-        if obj_name in bpy.data.objects:
-            bpy.data.objects[obj_name].user_clear()
-            bpy.data.objects.remove(bpy.data.objects[obj_name])
+        if obj is not None:
+            bpy.data.objects.remove(obj, do_unlink=True)
 
         # Create mesh object
         mesh = bpy.data.meshes.new(obj_name)
         obj = bpy.data.objects.new(obj_name, mesh)
-        scene.objects.link(obj)
+        if session is not None:
+            session.widgets.add(obj.name)
 
         # Move object to bone position and set layers
-        obj_to_bone(obj, rig, bone_transform_name)
-        wgts_group_name = 'WGTS_' + rig.name
-        if wgts_group_name in bpy.data.objects.keys():
-            obj.parent = bpy.data.objects[wgts_group_name]
-        obj.layers = WGT_LAYERS
+        place_widget(obj, rig, bone_transform_name)
+        if unlinked:
+            add_to_widget_group(obj, wgts_group_name)
+        else:
+            scene.objects.link(obj)
+            if wgts_group_name in bpy.data.objects:
+                obj.parent = bpy.data.objects[wgts_group_name]
+            obj.layers = WGT_LAYERS
 
         return obj
 
 
+def add_to_widget_group(obj, wgts_group_name):
+    """ Puts a widget in the WGTS_ group of the rig.  The group has a fake
+        user, otherwise unlinked widgets would be lost on save.
+    """
+    group = bpy.data.groups.get(wgts_group_name)
+    if group is None:
+        group = bpy.data.groups.new(wgts_group_name)
+    group.use_fake_user = True
+    if obj.name not in group.objects:
+        group.objects.link(obj)
+
+
+WIDGET_SHAPE_PROP = "rigify_widget_shape"  # Shape key of a library widget mesh
+
+_widget_meshes = {}  # {shape key: mesh name}, see share_widget_mesh()
+
+
+def get_widget_shape_key(shape):
+    """ Returns the string key of a widget shape, a tuple of the shape name
+        and its parameters.  Floats are rounded so that parameters computed
+        from bone sizes still match.
+    """
+    return repr(tuple(round(v, 6) if isinstance(v, float) else v for v in shape))
+
+
+def scan_widget_meshes():
+    """ Rebuilds the library index from the meshes of the file.
+    """
+    _widget_meshes.clear()
+    for m in bpy.data.meshes:
+        if WIDGET_SHAPE_PROP in m:
+            _widget_meshes[m[WIDGET_SHAPE_PROP]] = m.name
+
+
+def find_widget_mesh(key):
+    """ Returns the library mesh of a shape key, or None.  The index is
+        rescanned if the mesh it gives was removed or renamed since.
+    """
+    if not _widget_meshes:
+        # First use since startup, or since the library was cleared
+        scan_widget_meshes()
+    name = _widget_meshes.get(key)
+    if name is None:
+        return None
+    mesh = bpy.data.meshes.get(name)
+    if mesh is None or mesh.get(WIDGET_SHAPE_PROP) != key:
+        scan_widget_meshes()
+        name = _widget_meshes.get(key)
+        mesh = bpy.data.meshes.get(name) if name is not None else None
+    return mesh
+
+
+def share_widget_mesh(obj, shape):
+    """ Makes a new widget object use the library mesh of a shape, so that
+        all the widgets of the same shape share one mesh.  shape is a tuple
+        of the shape name and all the parameters its geometry depends on.
+        Returns True if the library already had the mesh.  Otherwise the
+        object's own mesh becomes the library mesh, and the caller fills it.
+    """
+    key = get_widget_shape_key(shape)
+    mesh = find_widget_mesh(key)
+    if mesh is not None:
+        own_mesh = obj.data
+        obj.data = mesh
+        if own_mesh.users == 0:
+            bpy.data.meshes.remove(own_mesh)
+        return True
+
+    obj.data.name = WGT_PREFIX + str(shape[0])
+    obj.data[WIDGET_SHAPE_PROP] = key
+    _widget_meshes[key] = obj.data.name
+    return False
+
+
+def clear_widget_library():
+    _widget_meshes.clear()
+
+
+def fill_widget_mesh(mesh, verts, edges):
+    """ Fills an empty widget mesh with vertices and edges, given as arrays
+        (or sequences) of shape (n, 3) and (n, 2), in bulk with foreach_set().
+    """
+    verts = np.asarray(verts, dtype=np.float32)
+    edges = np.asarray(edges, dtype=np.int32)
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    mesh.update()
+
+
 # Common Widgets
 
+LINE_VERTS = np.array([(0, 0, 0), (0, 1, 0)], dtype=np.float32)
+LINE_EDGES = np.array([(0, 1)], dtype=np.int32)
+
+
 def create_line_widget(rig, bone_name, bone_transform_name=None):
     """ Creates a basic line widget, a line that spans the length of the bone.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj is not None:
-        mesh = obj.data
-        mesh.from_pydata([(0, 0, 0), (0, 1, 0)], [(0, 1)], [])
-        mesh.update()
+    if obj is not None and not share_widget_mesh(obj, ('line',)):
+        fill_widget_mesh(obj.data, LINE_VERTS, LINE_EDGES)
+
+
+CIRCLE_VERTS = np.array([(0.7071068286895752, 2.980232238769531e-07, -0.7071065306663513), (0.8314696550369263, 2.980232238769531e-07, -0.5555699467658997), (0.9238795042037964, 2.682209014892578e-07, -0.3826831877231598), (0.9807852506637573, 2.5331974029541016e-07, -0.19509011507034302), (1.0, 2.365559055306221e-07, 1.6105803979371558e-07), (0.9807853698730469, 2.2351741790771484e-07, 0.19509044289588928), (0.9238796234130859, 2.086162567138672e-07, 0.38268351554870605), (0.8314696550369263, 1.7881393432617188e-07, 0.5555704236030579), (0.7071068286895752, 1.7881393432617188e-07, 0.7071070075035095), (0.5555702447891235, 1.7881393432617188e-07, 0.8314698934555054), (0.38268327713012695, 1.7881393432617188e-07, 0.923879861831665), (0.19509008526802063, 1.7881393432617188e-07, 0.9807855486869812), (-3.2584136988589307e-07, 1.1920928955078125e-07, 1.000000238418579), (-0.19509072601795197, 1.7881393432617188e-07, 0.9807854294776917), (-0.3826838731765747, 1.7881393432617188e-07, 0.9238795638084412), (-0.5555707216262817, 1.7881393432617188e-07, 0.8314695358276367), (-0.7071071863174438, 1.7881393432617188e-07, 0.7071065902709961), (-0.8314700126647949, 1.7881393432617188e-07, 0.5555698871612549), (-0.923879861831665, 2.086162567138672e-07, 0.3826829195022583), (-0.9807853698730469, 2.2351741790771484e-07, 0.1950896978378296), (-1.0, 2.365559907957504e-07, -7.290432222362142e-07), (-0.9807850122451782, 2.5331974029541016e-07, -0.195091113448143), (-0.9238790273666382, 2.682209014892578e-07, -0.38268423080444336), (-0.831468939781189, 2.980232238769531e-07, -0.5555710196495056), (-0.7071058750152588, 2.980232238769531e-07, -0.707107424736023), (-0.555569052696228, 2.980232238769531e-07, -0.8314701318740845), (-0.38268208503723145, 2.980232238769531e-07, -0.923879861831665), (-0.19508881866931915, 2.980232238769531e-07, -0.9807853102684021), (1.6053570561780361e-06, 2.980232238769531e-07, -0.9999997615814209), (0.19509197771549225, 2.980232238769531e-07, -0.9807847142219543), (0.3826850652694702, 2.980232238769531e-07, -0.9238786101341248), (0.5555717945098877, 2.980232238769531e-07, -0.8314683437347412)], dtype=np.float32)
+CIRCLE_EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (0, 31)], dtype=np.int32)
+CIRCLE_LINE_EDGES = np.vstack(((28, 12), CIRCLE_EDGES)).astype(np.int32)
 
 
 def create_circle_widget(rig, bone_name, radius=1.0, head_tail=0.0, with_line=False, bone_transform_name=None):
@@ -500,60 +1159,56 @@ def create_circle_widget(rig, bone_name, radius=1.0, head_tail=0.0, with_line=Fa
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
     if obj != None:
-        v = [(0.7071068286895752, 2.980232238769531e-07, -0.7071065306663513), (0.8314696550369263, 2.980232238769531e-07, -0.5555699467658997), (0.9238795042037964, 2.682209014892578e-07, -0.3826831877231598), (0.9807852506637573, 2.5331974029541016e-07, -0.19509011507034302), (1.0, 2.365559055306221e-07, 1.6105803979371558e-07), (0.9807853698730469, 2.2351741790771484e-07, 0.19509044289588928), (0.9238796234130859, 2.086162567138672e-07, 0.38268351554870605), (0.8314696550369263, 1.7881393432617188e-07, 0.5555704236030579), (0.7071068286895752, 1.7881393432617188e-07, 0.7071070075035095), (0.5555702447891235, 1.7881393432617188e-07, 0.8314698934555054), (0.38268327713012695, 1.7881393432617188e-07, 0.923879861831665), (0.19509008526802063, 1.7881393432617188e-07, 0.9807855486869812), (-3.2584136988589307e-07, 1.1920928955078125e-07, 1.000000238418579), (-0.19509072601795197, 1.7881393432617188e-07, 0.9807854294776917), (-0.3826838731765747, 1.7881393432617188e-07, 0.9238795638084412), (-0.5555707216262817, 1.7881393432617188e-07, 0.8314695358276367), (-0.7071071863174438, 1.7881393432617188e-07, 0.7071065902709961), (-0.8314700126647949, 1.7881393432617188e-07, 0.5555698871612549), (-0.923879861831665, 2.086162567138672e-07, 0.3826829195022583), (-0.9807853698730469, 2.2351741790771484e-07, 0.1950896978378296), (-1.0, 2.365559907957504e-07, -7.290432222362142e-07), (-0.9807850122451782, 2.5331974029541016e-07, -0.195091113448143), (-0.9238790273666382, 2.682209014892578e-07, -0.38268423080444336), (-0.831468939781189, 2.980232238769531e-07, -0.5555710196495056), (-0.7071058750152588, 2.980232238769531e-07, -0.707107424736023), (-0.555569052696228, 2.980232238769531e-07, -0.8314701318740845), (-0.38268208503723145, 2.980232238769531e-07, -0.923879861831665), (-0.19508881866931915, 2.980232238769531e-07, -0.9807853102684021), (1.6053570561780361e-06, 2.980232238769531e-07, -0.9999997615814209), (0.19509197771549225, 2.980232238769531e-07, -0.9807847142219543), (0.3826850652694702, 2.980232238769531e-07, -0.9238786101341248), (0.5555717945098877, 2.980232238769531e-07, -0.8314683437347412)]
-        verts = [(a[0] * radius, head_tail, a[2] * radius) for a in v]
-        if with_line:
-            edges = [(28, 12), (0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (0, 31)]
-        else:
-            edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (0, 31)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+        if not share_widget_mesh(obj, ('circle', radius, head_tail, with_line)):
+            verts = CIRCLE_VERTS * (radius, 0, radius) + (0, head_tail, 0)
+            edges = CIRCLE_LINE_EDGES if with_line else CIRCLE_EDGES
+            fill_widget_mesh(obj.data, verts, edges)
         return obj
     else:
         return None
 
 
+CUBE_VERTS = np.array([(1, 1, 1), (1, -1, 1), (-1, -1, 1), (-1, 1, 1),
+                       (1, 1, -1), (1, -1, -1), (-1, -1, -1), (-1, 1, -1)], dtype=np.float32)
+CUBE_EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)], dtype=np.int32)
+
+
 def create_cube_widget(rig, bone_name, radius=0.5, bone_transform_name=None):
     """ Creates a basic cube widget.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj is not None:
-        r = radius
-        verts = [(r, r, r), (r, -r, r), (-r, -r, r), (-r, r, r), (r, r, -r), (r, -r, -r), (-r, -r, -r), (-r, r, -r)]
-        edges = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj is not None and not share_widget_mesh(obj, ('cube', radius)):
+        fill_widget_mesh(obj.data, CUBE_VERTS * radius, CUBE_EDGES)
+
+
+CHAIN_VERTS = np.array([(1, 1, 1), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5), (-1, 1, 1),
+                        (1, 1, -1), (0.5, -0.5, -0.5), (-0.5, -0.5, -0.5), (-1, 1, -1)], dtype=np.float32)
+CHAIN_INVERT_VERTS = np.array([(0.5, 0.5, 0.5), (1, -1, 1), (-1, -1, 1), (-0.5, 0.5, 0.5),
+                               (0.5, 0.5, -0.5), (1, -1, -1), (-1, -1, -1), (-0.5, 0.5, -0.5)], dtype=np.float32)
 
 
 def create_chain_widget(rig, bone_name, radius=0.5, invert=False, bone_transform_name=None):
     """Creates a basic chain widget
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        r = radius
-        rh = radius/2
-        if invert:
-            verts = [(rh, rh, rh), (r, -r, r), (-r, -r, r), (-rh, rh, rh), (rh, rh, -rh), (r, -r, -r), (-r, -r, -r), (-rh, rh, -rh)]
-        else:
-            verts = [(r, r, r), (rh, -rh, rh), (-rh, -rh, rh), (-r, r, r), (r, r, -r), (rh, -rh, -rh), (-rh, -rh, -rh), (-r, r, -r)]
-        edges = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('chain', radius, invert)):
+        verts = (CHAIN_INVERT_VERTS if invert else CHAIN_VERTS) * radius
+        fill_widget_mesh(obj.data, verts, CUBE_EDGES)
+
+
+SPHERE_VERTS = np.array([(0.3535533845424652, 0.3535533845424652, 0.0), (0.4619397521018982, 0.19134171307086945, 0.0), (0.5, -2.1855694143368964e-08, 0.0), (0.4619397521018982, -0.19134175777435303, 0.0), (0.3535533845424652, -0.3535533845424652, 0.0), (0.19134174287319183, -0.4619397521018982, 0.0), (7.549790126404332e-08, -0.5, 0.0), (-0.1913416087627411, -0.46193981170654297, 0.0), (-0.35355329513549805, -0.35355350375175476, 0.0), (-0.4619397521018982, -0.19134178757667542, 0.0), (-0.5, 5.962440319251527e-09, 0.0), (-0.4619397222995758, 0.1913418024778366, 0.0), (-0.35355326533317566, 0.35355350375175476, 0.0), (-0.19134148955345154, 0.46193987131118774, 0.0), (3.2584136988589307e-07, 0.5, 0.0), (0.1913420855998993, 0.46193960309028625, 0.0), (7.450580596923828e-08, 0.46193960309028625, 0.19134199619293213), (5.9254205098113744e-08, 0.5, 2.323586443253589e-07), (4.470348358154297e-08, 0.46193987131118774, -0.1913415789604187), (2.9802322387695312e-08, 0.35355350375175476, -0.3535533547401428), (2.9802322387695312e-08, 0.19134178757667542, -0.46193981170654297), (5.960464477539063e-08, -1.1151834122813398e-08, -0.5000000596046448), (5.960464477539063e-08, -0.1913418024778366, -0.46193984150886536), (5.960464477539063e-08, -0.35355350375175476, -0.3535533845424652), (7.450580596923828e-08, -0.46193981170654297, -0.19134166836738586), (9.348272556053416e-08, -0.5, 1.624372103492533e-08), (1.043081283569336e-07, -0.4619397521018982, 0.19134168326854706), (1.1920928955078125e-07, -0.3535533845424652, 0.35355329513549805), (1.1920928955078125e-07, -0.19134174287319183, 0.46193966269493103), (1.1920928955078125e-07, -4.7414250303745575e-09, 0.49999991059303284), (1.1920928955078125e-07, 0.19134172797203064, 0.46193966269493103), (8.940696716308594e-08, 0.3535533845424652, 0.35355329513549805), (0.3535534739494324, 0.0, 0.35355329513549805), (0.1913418173789978, -2.9802322387695312e-08, 0.46193966269493103), (8.303572940349113e-08, -5.005858838558197e-08, 0.49999991059303284), (-0.19134165346622467, -5.960464477539063e-08, 0.46193966269493103), (-0.35355329513549805, -8.940696716308594e-08, 0.35355329513549805), (-0.46193963289260864, -5.960464477539063e-08, 0.19134168326854706), (-0.49999991059303284, -5.960464477539063e-08, 1.624372103492533e-08), (-0.4619397521018982, -2.9802322387695312e-08, -0.19134166836738586), (-0.3535534143447876, -2.9802322387695312e-08, -0.3535533845424652), (-0.19134171307086945, 0.0, -0.46193984150886536), (7.662531942287387e-08, 9.546055501630235e-09, -0.5000000596046448), (0.19134187698364258, 5.960464477539063e-08, -0.46193981170654297), (0.3535535931587219, 5.960464477539063e-08, -0.3535533547401428), (0.4619399905204773, 5.960464477539063e-08, -0.1913415789604187), (0.5000000596046448, 5.960464477539063e-08, 2.323586443253589e-07), (0.4619396924972534, 2.9802322387695312e-08, 0.19134199619293213)], dtype=np.float32)
+SPHERE_EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (0, 15), (16, 31), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (32, 33), (33, 34), (34, 35), (35, 36), (36, 37), (37, 38), (38, 39), (39, 40), (40, 41), (41, 42), (42, 43), (43, 44), (44, 45), (45, 46), (46, 47), (32, 47)], dtype=np.int32)
 
 
 def create_sphere_widget(rig, bone_name, bone_transform_name=None):
     """ Creates a basic sphere widget, three pependicular overlapping circles.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        verts = [(0.3535533845424652, 0.3535533845424652, 0.0), (0.4619397521018982, 0.19134171307086945, 0.0), (0.5, -2.1855694143368964e-08, 0.0), (0.4619397521018982, -0.19134175777435303, 0.0), (0.3535533845424652, -0.3535533845424652, 0.0), (0.19134174287319183, -0.4619397521018982, 0.0), (7.549790126404332e-08, -0.5, 0.0), (-0.1913416087627411, -0.46193981170654297, 0.0), (-0.35355329513549805, -0.35355350375175476, 0.0), (-0.4619397521018982, -0.19134178757667542, 0.0), (-0.5, 5.962440319251527e-09, 0.0), (-0.4619397222995758, 0.1913418024778366, 0.0), (-0.35355326533317566, 0.35355350375175476, 0.0), (-0.19134148955345154, 0.46193987131118774, 0.0), (3.2584136988589307e-07, 0.5, 0.0), (0.1913420855998993, 0.46193960309028625, 0.0), (7.450580596923828e-08, 0.46193960309028625, 0.19134199619293213), (5.9254205098113744e-08, 0.5, 2.323586443253589e-07), (4.470348358154297e-08, 0.46193987131118774, -0.1913415789604187), (2.9802322387695312e-08, 0.35355350375175476, -0.3535533547401428), (2.9802322387695312e-08, 0.19134178757667542, -0.46193981170654297), (5.960464477539063e-08, -1.1151834122813398e-08, -0.5000000596046448), (5.960464477539063e-08, -0.1913418024778366, -0.46193984150886536), (5.960464477539063e-08, -0.35355350375175476, -0.3535533845424652), (7.450580596923828e-08, -0.46193981170654297, -0.19134166836738586), (9.348272556053416e-08, -0.5, 1.624372103492533e-08), (1.043081283569336e-07, -0.4619397521018982, 0.19134168326854706), (1.1920928955078125e-07, -0.3535533845424652, 0.35355329513549805), (1.1920928955078125e-07, -0.19134174287319183, 0.46193966269493103), (1.1920928955078125e-07, -4.7414250303745575e-09, 0.49999991059303284), (1.1920928955078125e-07, 0.19134172797203064, 0.46193966269493103), (8.940696716308594e-08, 0.3535533845424652, 0.35355329513549805), (0.3535534739494324, 0.0, 0.35355329513549805), (0.1913418173789978, -2.9802322387695312e-08, 0.46193966269493103), (8.303572940349113e-08, -5.005858838558197e-08, 0.49999991059303284), (-0.19134165346622467, -5.960464477539063e-08, 0.46193966269493103), (-0.35355329513549805, -8.940696716308594e-08, 0.35355329513549805), (-0.46193963289260864, -5.960464477539063e-08, 0.19134168326854706), (-0.49999991059303284, -5.960464477539063e-08, 1.624372103492533e-08), (-0.4619397521018982, -2.9802322387695312e-08, -0.19134166836738586), (-0.3535534143447876, -2.9802322387695312e-08, -0.3535533845424652), (-0.19134171307086945, 0.0, -0.46193984150886536), (7.662531942287387e-08, 9.546055501630235e-09, -0.5000000596046448), (0.19134187698364258, 5.960464477539063e-08, -0.46193981170654297), (0.3535535931587219, 5.960464477539063e-08, -0.3535533547401428), (0.4619399905204773, 5.960464477539063e-08, -0.1913415789604187), (0.5000000596046448, 5.960464477539063e-08, 2.323586443253589e-07), (0.4619396924972534, 2.9802322387695312e-08, 0.19134199619293213)]
-        edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (0, 15), (16, 31), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (32, 33), (33, 34), (34, 35), (35, 36), (36, 37), (37, 38), (38, 39), (39, 40), (40, 41), (41, 42), (42, 43), (43, 44), (44, 45), (45, 46), (46, 47), (32, 47)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('sphere',)):
+        fill_widget_mesh(obj.data, SPHERE_VERTS, SPHERE_EDGES)
+
+
+_circle_polygons = {}  # {number_verts: (cos, sin, edges)} of unit circle polygons
 
 
 def create_circle_polygon(number_verts, axis, radius=1.0, head_tail=0.0):
@@ -563,32 +1218,29 @@ def create_circle_polygon(number_verts, axis, radius=1.0, head_tail=0.0):
         radius: the radius of the circle
         head_tail: where along the length of the bone the circle is (0.0=head, 1.0=tail)
     """
-    verts = []
-    edges = []
-    angle = 2 * math.pi / number_verts
-    i = 0
-
     assert(axis in 'XYZ')
 
-    while i < (number_verts):
-        a = math.cos(i * angle)
-        b = math.sin(i * angle)
-
-        if axis == 'X':
-            verts.append((head_tail, a * radius, b * radius))
-        elif axis == 'Y':
-            verts.append((a * radius, head_tail, b * radius))
-        elif axis == 'Z':
-            verts.append((a * radius, b * radius, head_tail))
-
-        if i < (number_verts - 1):
-            edges.append((i , i + 1))
+    unit = _circle_polygons.get(number_verts)
+    if unit is None:
+        angles = np.arange(number_verts) * (2 * math.pi / number_verts)
+        edges = [(i, i + 1) for i in range(number_verts - 1)] + [(0, number_verts - 1)]
+        unit = _circle_polygons[number_verts] = (np.cos(angles), np.sin(angles), edges)
+    a, b, edges = unit
+
+    h = np.full(number_verts, head_tail)
+    if axis == 'X':
+        columns = (h, a * radius, b * radius)
+    elif axis == 'Y':
+        columns = (a * radius, h, b * radius)
+    else:
+        columns = (a * radius, b * radius, h)
 
-        i += 1
+    verts = [tuple(v) for v in np.column_stack(columns).tolist()]
+    return verts, list(edges)
 
-    edges.append((0, number_verts - 1))
 
-    return verts, edges
+LIMB_VERTS = np.array([(-1.1920928955078125e-07, 1.7881393432617188e-07, 0.0), (3.5762786865234375e-07, 1.0000004768371582, 0.0), (0.1767769455909729, 0.5000001192092896, 0.17677664756774902), (0.20786768198013306, 0.5000001192092896, 0.1388925313949585), (0.23097014427185059, 0.5000001192092896, 0.09567084908485413), (0.24519658088684082, 0.5000001192092896, 0.048772573471069336), (0.2500002384185791, 0.5000001192092896, -2.545945676502015e-09), (0.24519658088684082, 0.5000001192092896, -0.048772573471069336), (0.23097014427185059, 0.5000001192092896, -0.09567084908485413), (0.20786768198013306, 0.5000001192092896, -0.13889259099960327), (0.1767769455909729, 0.5000001192092896, -0.1767767071723938), (0.13889282941818237, 0.5000001192092896, -0.20786744356155396), (0.09567105770111084, 0.5000001192092896, -0.23096990585327148), (0.04877278208732605, 0.5000001192092896, -0.24519634246826172), (1.7279069197684294e-07, 0.5000000596046448, -0.25), (-0.0487724244594574, 0.5000001192092896, -0.24519634246826172), (-0.09567070007324219, 0.5000001192092896, -0.2309698462486267), (-0.13889241218566895, 0.5000001192092896, -0.20786738395690918), (-0.17677652835845947, 0.5000001192092896, -0.17677664756774902), (-0.20786726474761963, 0.5000001192092896, -0.13889244198799133), (-0.23096972703933716, 0.5000001192092896, -0.09567070007324219), (-0.24519610404968262, 0.5000001192092896, -0.04877239465713501), (-0.2499997615814209, 0.5000001192092896, 2.1997936983098043e-07), (-0.24519598484039307, 0.5000001192092896, 0.04877282679080963), (-0.23096948862075806, 0.5000001192092896, 0.09567108750343323), (-0.20786696672439575, 0.5000001192092896, 0.1388927698135376), (-0.1767762303352356, 0.5000001192092896, 0.17677688598632812), (-0.13889199495315552, 0.5000001192092896, 0.2078675627708435), (-0.09567028284072876, 0.5000001192092896, 0.23097002506256104), (-0.048771947622299194, 0.5000001192092896, 0.24519634246826172), (6.555903269145347e-07, 0.5000001192092896, 0.25), (0.04877324402332306, 0.5000001192092896, 0.24519622325897217), (0.09567153453826904, 0.5000001192092896, 0.23096966743469238), (0.13889318704605103, 0.5000001192092896, 0.20786714553833008)], dtype=np.float32)
+LIMB_EDGES = np.array([(0, 1), (2, 3), (4, 3), (5, 4), (5, 6), (6, 7), (8, 7), (8, 9), (10, 9), (10, 11), (11, 12), (13, 12), (14, 13), (14, 15), (16, 15), (16, 17), (17, 18), (19, 18), (19, 20), (21, 20), (21, 22), (22, 23), (24, 23), (25, 24), (25, 26), (27, 26), (27, 28), (29, 28), (29, 30), (30, 31), (32, 31), (32, 33), (2, 33)], dtype=np.int32)
 
 
 def create_limb_widget(rig, bone_name, bone_transform_name=None):
@@ -596,198 +1248,192 @@ def create_limb_widget(rig, bone_name, bone_transform_name=None):
         bone, with a circle around the center.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        verts = [(-1.1920928955078125e-07, 1.7881393432617188e-07, 0.0), (3.5762786865234375e-07, 1.0000004768371582, 0.0), (0.1767769455909729, 0.5000001192092896, 0.17677664756774902), (0.20786768198013306, 0.5000001192092896, 0.1388925313949585), (0.23097014427185059, 0.5000001192092896, 0.09567084908485413), (0.24519658088684082, 0.5000001192092896, 0.048772573471069336), (0.2500002384185791, 0.5000001192092896, -2.545945676502015e-09), (0.24519658088684082, 0.5000001192092896, -0.048772573471069336), (0.23097014427185059, 0.5000001192092896, -0.09567084908485413), (0.20786768198013306, 0.5000001192092896, -0.13889259099960327), (0.1767769455909729, 0.5000001192092896, -0.1767767071723938), (0.13889282941818237, 0.5000001192092896, -0.20786744356155396), (0.09567105770111084, 0.5000001192092896, -0.23096990585327148), (0.04877278208732605, 0.5000001192092896, -0.24519634246826172), (1.7279069197684294e-07, 0.5000000596046448, -0.25), (-0.0487724244594574, 0.5000001192092896, -0.24519634246826172), (-0.09567070007324219, 0.5000001192092896, -0.2309698462486267), (-0.13889241218566895, 0.5000001192092896, -0.20786738395690918), (-0.17677652835845947, 0.5000001192092896, -0.17677664756774902), (-0.20786726474761963, 0.5000001192092896, -0.13889244198799133), (-0.23096972703933716, 0.5000001192092896, -0.09567070007324219), (-0.24519610404968262, 0.5000001192092896, -0.04877239465713501), (-0.2499997615814209, 0.5000001192092896, 2.1997936983098043e-07), (-0.24519598484039307, 0.5000001192092896, 0.04877282679080963), (-0.23096948862075806, 0.5000001192092896, 0.09567108750343323), (-0.20786696672439575, 0.5000001192092896, 0.1388927698135376), (-0.1767762303352356, 0.5000001192092896, 0.17677688598632812), (-0.13889199495315552, 0.5000001192092896, 0.2078675627708435), (-0.09567028284072876, 0.5000001192092896, 0.23097002506256104), (-0.048771947622299194, 0.5000001192092896, 0.24519634246826172), (6.555903269145347e-07, 0.5000001192092896, 0.25), (0.04877324402332306, 0.5000001192092896, 0.24519622325897217), (0.09567153453826904, 0.5000001192092896, 0.23096966743469238), (0.13889318704605103, 0.5000001192092896, 0.20786714553833008)]
-        edges = [(0, 1), (2, 3), (4, 3), (5, 4), (5, 6), (6, 7), (8, 7), (8, 9), (10, 9), (10, 11), (11, 12), (13, 12), (14, 13), (14, 15), (16, 15), (16, 17), (17, 18), (19, 18), (19, 20), (21, 20), (21, 22), (22, 23), (24, 23), (25, 24), (25, 26), (27, 26), (27, 28), (29, 28), (29, 30), (30, 31), (32, 31), (32, 33), (2, 33)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('limb',)):
+        fill_widget_mesh(obj.data, LIMB_VERTS, LIMB_EDGES)
+
+
+BONE_VERTS = np.array([(0.04, 1.0, -0.04), (0.1, 0.0, -0.1), (-0.1, 0.0, -0.1), (-0.04, 1.0, -0.04), (0.04, 1.0, 0.04), (0.1, 0.0, 0.1), (-0.1, 0.0, 0.1), (-0.04, 1.0, 0.04)], dtype=np.float32)
+BONE_EDGES = np.array([(1, 2), (0, 1), (0, 3), (2, 3), (4, 5), (5, 6), (6, 7), (4, 7), (1, 5), (0, 4), (2, 6), (3, 7)], dtype=np.int32)
 
 
 def create_bone_widget(rig, bone_name, bone_transform_name=None):
     """ Creates a basic bone widget, a simple obolisk-esk shape.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        verts = [(0.04, 1.0, -0.04), (0.1, 0.0, -0.1), (-0.1, 0.0, -0.1), (-0.04, 1.0, -0.04), (0.04, 1.0, 0.04), (0.1, 0.0, 0.1), (-0.1, 0.0, 0.1), (-0.04, 1.0, 0.04)]
-        edges = [(1, 2), (0, 1), (0, 3), (2, 3), (4, 5), (5, 6), (6, 7), (4, 7), (1, 5), (0, 4), (2, 6), (3, 7)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('bone',)):
+        fill_widget_mesh(obj.data, BONE_VERTS, BONE_EDGES)
+
+
+COMPASS_VERTS = np.array([(0.0, 1.2000000476837158, 0.0), (0.19509032368659973, 0.9807852506637573, 0.0), (0.3826834559440613, 0.9238795042037964, 0.0), (0.5555702447891235, 0.8314695954322815, 0.0), (0.7071067690849304, 0.7071067690849304, 0.0), (0.8314696550369263, 0.5555701851844788, 0.0), (0.9238795042037964, 0.3826834261417389, 0.0), (0.9807852506637573, 0.19509035348892212, 0.0), (1.2000000476837158, 7.549790126404332e-08, 0.0), (0.9807853102684021, -0.19509020447731018, 0.0), (0.9238795638084412, -0.38268327713012695, 0.0), (0.8314696550369263, -0.5555701851844788, 0.0), (0.7071067690849304, -0.7071067690849304, 0.0), (0.5555701851844788, -0.8314696550369263, 0.0), (0.38268327713012695, -0.9238796234130859, 0.0), (0.19509008526802063, -0.9807853102684021, 0.0), (-3.2584136988589307e-07, -1.2999999523162842, 0.0), (-0.19509072601795197, -0.9807851910591125, 0.0), (-0.3826838731765747, -0.9238793253898621, 0.0), (-0.5555707216262817, -0.8314692974090576, 0.0), (-0.7071072459220886, -0.707106351852417, 0.0), (-0.8314700126647949, -0.5555696487426758, 0.0), (-0.923879861831665, -0.3826826810836792, 0.0), (-0.9807854294776917, -0.1950894594192505, 0.0), (-1.2000000476837158, 9.655991561885457e-07, 0.0), (-0.980785071849823, 0.1950913518667221, 0.0), (-0.923879086971283, 0.38268446922302246, 0.0), (-0.831468939781189, 0.5555712580680847, 0.0), (-0.7071058750152588, 0.707107663154602, 0.0), (-0.5555691123008728, 0.8314703702926636, 0.0), (-0.38268208503723145, 0.9238801002502441, 0.0), (-0.19508881866931915, 0.9807855486869812, 0.0)], dtype=np.float32)
+COMPASS_EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (0, 31)], dtype=np.int32)
 
 
 def create_compass_widget(rig, bone_name, bone_transform_name=None):
     """ Creates a compass-shaped widget.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        verts = [(0.0, 1.2000000476837158, 0.0), (0.19509032368659973, 0.9807852506637573, 0.0), (0.3826834559440613, 0.9238795042037964, 0.0), (0.5555702447891235, 0.8314695954322815, 0.0), (0.7071067690849304, 0.7071067690849304, 0.0), (0.8314696550369263, 0.5555701851844788, 0.0), (0.9238795042037964, 0.3826834261417389, 0.0), (0.9807852506637573, 0.19509035348892212, 0.0), (1.2000000476837158, 7.549790126404332e-08, 0.0), (0.9807853102684021, -0.19509020447731018, 0.0), (0.9238795638084412, -0.38268327713012695, 0.0), (0.8314696550369263, -0.5555701851844788, 0.0), (0.7071067690849304, -0.7071067690849304, 0.0), (0.5555701851844788, -0.8314696550369263, 0.0), (0.38268327713012695, -0.9238796234130859, 0.0), (0.19509008526802063, -0.9807853102684021, 0.0), (-3.2584136988589307e-07, -1.2999999523162842, 0.0), (-0.19509072601795197, -0.9807851910591125, 0.0), (-0.3826838731765747, -0.9238793253898621, 0.0), (-0.5555707216262817, -0.8314692974090576, 0.0), (-0.7071072459220886, -0.707106351852417, 0.0), (-0.8314700126647949, -0.5555696487426758, 0.0), (-0.923879861831665, -0.3826826810836792, 0.0), (-0.9807854294776917, -0.1950894594192505, 0.0), (-1.2000000476837158, 9.655991561885457e-07, 0.0), (-0.980785071849823, 0.1950913518667221, 0.0), (-0.923879086971283, 0.38268446922302246, 0.0), (-0.831468939781189, 0.5555712580680847, 0.0), (-0.7071058750152588, 0.707107663154602, 0.0), (-0.5555691123008728, 0.8314703702926636, 0.0), (-0.38268208503723145, 0.9238801002502441, 0.0), (-0.19508881866931915, 0.9807855486869812, 0.0)]
-        edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11), (11, 12), (12, 13), (13, 14), (14, 15), (15, 16), (16, 17), (17, 18), (18, 19), (19, 20), (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30), (30, 31), (0, 31)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('compass',)):
+        fill_widget_mesh(obj.data, COMPASS_VERTS, COMPASS_EDGES)
+
+
+ROOT_VERTS = np.array([(0.7071067690849304, 0.7071067690849304, 0.0), (0.7071067690849304, -0.7071067690849304, 0.0), (-0.7071067690849304, 0.7071067690849304, 0.0), (-0.7071067690849304, -0.7071067690849304, 0.0), (0.8314696550369263, 0.5555701851844788, 0.0), (0.8314696550369263, -0.5555701851844788, 0.0), (-0.8314696550369263, 0.5555701851844788, 0.0), (-0.8314696550369263, -0.5555701851844788, 0.0), (0.9238795042037964, 0.3826834261417389, 0.0), (0.9238795042037964, -0.3826834261417389, 0.0), (-0.9238795042037964, 0.3826834261417389, 0.0), (-0.9238795042037964, -0.3826834261417389, 0.0), (0.9807852506637573, 0.19509035348892212, 0.0), (0.9807852506637573, -0.19509035348892212, 0.0), (-0.9807852506637573, 0.19509035348892212, 0.0), (-0.9807852506637573, -0.19509035348892212, 0.0), (0.19509197771549225, 0.9807849526405334, 0.0), (0.19509197771549225, -0.9807849526405334, 0.0), (-0.19509197771549225, 0.9807849526405334, 0.0), (-0.19509197771549225, -0.9807849526405334, 0.0), (0.3826850652694702, 0.9238788485527039, 0.0), (0.3826850652694702, -0.9238788485527039, 0.0), (-0.3826850652694702, 0.9238788485527039, 0.0), (-0.3826850652694702, -0.9238788485527039, 0.0), (0.5555717945098877, 0.8314685821533203, 0.0), (0.5555717945098877, -0.8314685821533203, 0.0), (-0.5555717945098877, 0.8314685821533203, 0.0), (-0.5555717945098877, -0.8314685821533203, 0.0), (0.19509197771549225, 1.2807848453521729, 0.0), (0.19509197771549225, -1.2807848453521729, 0.0), (-0.19509197771549225, 1.2807848453521729, 0.0), (-0.19509197771549225, -1.2807848453521729, 0.0), (1.280785322189331, 0.19509035348892212, 0.0), (1.280785322189331, -0.19509035348892212, 0.0), (-1.280785322189331, 0.19509035348892212, 0.0), (-1.280785322189331, -0.19509035348892212, 0.0), (0.3950919806957245, 1.2807848453521729, 0.0), (0.3950919806957245, -1.2807848453521729, 0.0), (-0.3950919806957245, 1.2807848453521729, 0.0), (-0.3950919806957245, -1.2807848453521729, 0.0), (1.280785322189331, 0.39509034156799316, 0.0), (1.280785322189331, -0.39509034156799316, 0.0), (-1.280785322189331, 0.39509034156799316, 0.0), (-1.280785322189331, -0.39509034156799316, 0.0), (0.0, 1.5807849168777466, 0.0), (0.0, -1.5807849168777466, 0.0), (1.5807852745056152, 0.0, 0.0), (-1.5807852745056152, 0.0, 0.0)], dtype=np.float32)
+ROOT_EDGES = np.array([(0, 4), (1, 5), (2, 6), (3, 7), (4, 8), (5, 9), (6, 10), (7, 11), (8, 12), (9, 13), (10, 14), (11, 15), (16, 20), (17, 21), (18, 22), (19, 23), (20, 24), (21, 25), (22, 26), (23, 27), (0, 24), (1, 25), (2, 26), (3, 27), (16, 28), (17, 29), (18, 30), (19, 31), (12, 32), (13, 33), (14, 34), (15, 35), (28, 36), (29, 37), (30, 38), (31, 39), (32, 40), (33, 41), (34, 42), (35, 43), (36, 44), (37, 45), (38, 44), (39, 45), (40, 46), (41, 46), (42, 47), (43, 47)], dtype=np.int32)
 
 
 def create_root_widget(rig, bone_name, bone_transform_name=None):
     """ Creates a widget for the root bone.
     """
     obj = create_widget(rig, bone_name, bone_transform_name)
-    if obj != None:
-        verts = [(0.7071067690849304, 0.7071067690849304, 0.0), (0.7071067690849304, -0.7071067690849304, 0.0), (-0.7071067690849304, 0.7071067690849304, 0.0), (-0.7071067690849304, -0.7071067690849304, 0.0), (0.8314696550369263, 0.5555701851844788, 0.0), (0.8314696550369263, -0.5555701851844788, 0.0), (-0.8314696550369263, 0.5555701851844788, 0.0), (-0.8314696550369263, -0.5555701851844788, 0.0), (0.9238795042037964, 0.3826834261417389, 0.0), (0.9238795042037964, -0.3826834261417389, 0.0), (-0.9238795042037964, 0.3826834261417389, 0.0), (-0.9238795042037964, -0.3826834261417389, 0.0), (0.9807852506637573, 0.19509035348892212, 0.0), (0.9807852506637573, -0.19509035348892212, 0.0), (-0.9807852506637573, 0.19509035348892212, 0.0), (-0.9807852506637573, -0.19509035348892212, 0.0), (0.19509197771549225, 0.9807849526405334, 0.0), (0.19509197771549225, -0.9807849526405334, 0.0), (-0.19509197771549225, 0.9807849526405334, 0.0), (-0.19509197771549225, -0.9807849526405334, 0.0), (0.3826850652694702, 0.9238788485527039, 0.0), (0.3826850652694702, -0.9238788485527039, 0.0), (-0.3826850652694702, 0.9238788485527039, 0.0), (-0.3826850652694702, -0.9238788485527039, 0.0), (0.5555717945098877, 0.8314685821533203, 0.0), (0.5555717945098877, -0.8314685821533203, 0.0), (-0.5555717945098877, 0.8314685821533203, 0.0), (-0.5555717945098877, -0.8314685821533203, 0.0), (0.19509197771549225, 1.2807848453521729, 0.0), (0.19509197771549225, -1.2807848453521729, 0.0), (-0.19509197771549225, 1.2807848453521729, 0.0), (-0.19509197771549225, -1.2807848453521729, 0.0), (1.280785322189331, 0.19509035348892212, 0.0), (1.280785322189331, -0.19509035348892212, 0.0), (-1.280785322189331, 0.19509035348892212, 0.0), (-1.280785322189331, -0.19509035348892212, 0.0), (0.3950919806957245, 1.2807848453521729, 0.0), (0.3950919806957245, -1.2807848453521729, 0.0), (-0.3950919806957245, 1.2807848453521729, 0.0), (-0.3950919806957245, -1.2807848453521729, 0.0), (1.280785322189331, 0.39509034156799316, 0.0), (1.280785322189331, -0.39509034156799316, 0.0), (-1.280785322189331, 0.39509034156799316, 0.0), (-1.280785322189331, -0.39509034156799316, 0.0), (0.0, 1.5807849168777466, 0.0), (0.0, -1.5807849168777466, 0.0), (1.5807852745056152, 0.0, 0.0), (-1.5807852745056152, 0.0, 0.0)]
-        edges = [(0, 4), (1, 5), (2, 6), (3, 7), (4, 8), (5, 9), (6, 10), (7, 11), (8, 12), (9, 13), (10, 14), (11, 15), (16, 20), (17, 21), (18, 22), (19, 23), (20, 24), (21, 25), (22, 26), (23, 27), (0, 24), (1, 25), (2, 26), (3, 27), (16, 28), (17, 29), (18, 30), (19, 31), (12, 32), (13, 33), (14, 34), (15, 35), (28, 36), (29, 37), (30, 38), (31, 39), (32, 40), (33, 41), (34, 42), (35, 43), (36, 44), (37, 45), (38, 44), (39, 45), (40, 46), (41, 46), (42, 47), (43, 47)]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('root',)):
+        fill_widget_mesh(obj.data, ROOT_VERTS, ROOT_EDGES)
+
+
+NECK_BEND_VERTS = np.array([(-0.08855080604553223, 0.7388765811920166, -0.3940150737762451),
+                            (0.08855044841766357, 0.7388765811920166, -0.3940150737762451),
+                            (0.17710095643997192, 0.5611097812652588, -0.6478927135467529),
+                            (-4.0892032870942785e-07, 0.4087378978729248, -0.865501880645752),
+                            (-0.17710143327713013, 0.5611097812652588, -0.6478922367095947),
+                            (0.08855026960372925, 0.5611097812652588, -0.6478924751281738),
+                            (-0.08855092525482178, 0.5611097812652588, -0.6478927135467529),
+                            (-0.6478927135467529, 0.5611097812652588, 0.08855098485946655),
+                            (-0.6478927135467529, 0.5611097812652588, -0.08855020999908447),
+                            (-0.6478924751281738, 0.5611097812652588, 0.17710155248641968),
+                            (-0.865501880645752, 0.4087378978729248, 4.6876743908796925e-07),
+                            (-0.647892951965332, 0.5611097812652588, -0.17710083723068237),
+                            (-0.39401543140411377, 0.7388765811920166, -0.08855029940605164),
+                            (-0.39401543140411377, 0.7388765811920166, 0.08855095505714417),
+                            (0.6478927135467529, 0.5611097812652588, -0.08855059742927551),
+                            (0.6478927135467529, 0.5611097812652588, 0.08855065703392029),
+                            (0.6478924751281738, 0.5611097812652588, -0.17710113525390625),
+                            (0.865501880645752, 0.4087378978729248, -3.264514703005261e-08),
+                            (0.647892951965332, 0.5611097812652588, 0.1771012544631958),
+                            (0.08855065703392029, 0.7388765811920166, 0.3940155506134033),
+                            (-0.08855056762695312, 0.7388765811920166, 0.3940155506134033),
+                            (-0.17710107564926147, 0.5611097812652588, 0.647892951965332),
+                            (2.244429140318971e-07, 0.4087378978729248, 0.865502119064331),
+                            (0.17710131406784058, 0.5611097812652588, 0.6478927135467529),
+                            (-0.08855044841766357, 0.5611097812652588, 0.647892951965332),
+                            (0.08855074644088745, 0.5611097812652588, 0.647892951965332),
+                            (0.3940153121948242, 0.7388765811920166, 0.08855071663856506),
+                            (0.39401519298553467, 0.7388765811920166, -0.08855047821998596),
+                            (-8.416645869147032e-08, 0.8255770206451416, -0.2656517028808594),
+                            (-0.06875583529472351, 0.8255770206451416, -0.2565997838973999),
+                            (-0.13282597064971924, 0.8255770206451416, -0.2300611138343811),
+                            (-0.18784427642822266, 0.8255770206451416, -0.18784409761428833),
+                            (-0.2300613522529602, 0.8255770206451416, -0.1328257918357849),
+                            (-0.256600022315979, 0.8255770206451416, -0.06875564157962799),
+                            (-0.2656519412994385, 0.8255770206451416, 9.328307726264029e-08),
+                            (-0.25660014152526855, 0.8255770206451416, 0.06875583529472351),
+                            (-0.2300613522529602, 0.8255770206451416, 0.13282597064971924),
+                            (-0.18784433603286743, 0.8255770206451416, 0.18784421682357788),
+                            (-0.1328260898590088, 0.8255770206451416, 0.23006129264831543),
+                            (-0.06875592470169067, 0.8255770206451416, 0.256600022315979),
+                            (-1.8761508613351907e-07, 0.8255770206451416, 0.2656519412994385),
+                            (0.06875556707382202, 0.8255770206451416, 0.2566000819206238),
+                            (0.13282573223114014, 0.8255770206451416, 0.23006141185760498),
+                            (0.18784403800964355, 0.8255770206451416, 0.1878443956375122),
+                            (0.23006105422973633, 0.8255770206451416, 0.1328260898590088),
+                            (0.25659990310668945, 0.8255770206451416, 0.06875596940517426),
+                            (0.2656517028808594, 0.8255770206451416, 2.3684407324253698e-07),
+                            (0.25659990310668945, 0.8255770206451416, -0.06875550746917725),
+                            (0.23006117343902588, 0.8255770206451416, -0.13282567262649536),
+                            (0.18784427642822266, 0.8255770206451416, -0.18784397840499878),
+                            (0.13282597064971924, 0.8255770206451416, -0.23006099462509155),
+                            (0.0687558501958847, 0.8255770206451416, -0.2565997838973999)], dtype=np.float32)
+NECK_BEND_EDGES = np.array([(1, 0), (3, 2), (5, 2), (4, 3), (6, 4), (1, 5), (0, 6), (13, 7), (12, 8), (7, 9), (9, 10), (8, 11),
+                            (27, 14), (26, 15), (14, 16), (16, 17), (15, 18), (17, 18), (10, 11), (12, 13), (20, 19), (22, 21),
+                            (24, 21), (23, 22), (29, 28), (30, 29), (31, 30), (32, 31), (33, 32), (34, 33), (35, 34), (36, 35),
+                            (37, 36), (38, 37), (39, 38), (40, 39), (41, 40), (42, 41), (43, 42), (44, 43), (45, 44), (46, 45),
+                            (47, 46), (48, 47), (49, 48), (50, 49), (51, 50), (28, 51), (26, 27), (25, 23), (20, 24),
+                            (19, 25)], dtype=np.int32)
 
 
 def create_neck_bend_widget(rig, bone_name, radius=1.0, head_tail=0.0, bone_transform_name=None):
     obj = create_widget(rig, bone_name, bone_transform_name)
     size = 2.0
-    if obj != None:
-        v = [(-0.08855080604553223 * size, 0.7388765811920166 * size, -0.3940150737762451 * size),
-                 (0.08855044841766357 * size, 0.7388765811920166 * size, -0.3940150737762451 * size),
-                 (0.17710095643997192 * size, 0.5611097812652588 * size, -0.6478927135467529 * size),
-                 (-4.0892032870942785e-07 * size, 0.4087378978729248 * size, -0.865501880645752 * size),
-                 (-0.17710143327713013 * size, 0.5611097812652588 * size, -0.6478922367095947 * size),
-                 (0.08855026960372925 * size, 0.5611097812652588 * size, -0.6478924751281738 * size),
-                 (-0.08855092525482178 * size, 0.5611097812652588 * size, -0.6478927135467529 * size),
-                 (-0.6478927135467529 * size, 0.5611097812652588 * size, 0.08855098485946655 * size),
-                 (-0.6478927135467529 * size, 0.5611097812652588 * size, -0.08855020999908447 * size),
-                 (-0.6478924751281738 * size, 0.5611097812652588 * size, 0.17710155248641968 * size),
-                 (-0.865501880645752 * size, 0.4087378978729248 * size, 4.6876743908796925e-07 * size),
-                 (-0.647892951965332 * size, 0.5611097812652588 * size, -0.17710083723068237 * size),
-                 (-0.39401543140411377 * size, 0.7388765811920166 * size, -0.08855029940605164 * size),
-                 (-0.39401543140411377 * size, 0.7388765811920166 * size, 0.08855095505714417 * size),
-                 (0.6478927135467529 * size, 0.5611097812652588 * size, -0.08855059742927551 * size),
-                 (0.6478927135467529 * size, 0.5611097812652588 * size, 0.08855065703392029 * size),
-                 (0.6478924751281738 * size, 0.5611097812652588 * size, -0.17710113525390625 * size),
-                 (0.865501880645752 * size, 0.4087378978729248 * size, -3.264514703005261e-08 * size),
-                 (0.647892951965332 * size, 0.5611097812652588 * size, 0.1771012544631958 * size),
-                 (0.08855065703392029 * size, 0.7388765811920166 * size, 0.3940155506134033 * size),
-                 (-0.08855056762695312 * size, 0.7388765811920166 * size, 0.3940155506134033 * size),
-                 (-0.17710107564926147 * size, 0.5611097812652588 * size, 0.647892951965332 * size),
-                 (2.244429140318971e-07 * size, 0.4087378978729248 * size, 0.865502119064331 * size),
-                 (0.17710131406784058 * size, 0.5611097812652588 * size, 0.6478927135467529 * size),
-                 (-0.08855044841766357 * size, 0.5611097812652588 * size, 0.647892951965332 * size),
-                 (0.08855074644088745 * size, 0.5611097812652588 * size, 0.647892951965332 * size),
-                 (0.3940153121948242 * size, 0.7388765811920166 * size, 0.08855071663856506 * size),
-                 (0.39401519298553467 * size, 0.7388765811920166 * size, -0.08855047821998596 * size),
-                 (-8.416645869147032e-08 * size, 0.8255770206451416 * size, -0.2656517028808594 * size),
-                 (-0.06875583529472351 * size, 0.8255770206451416 * size, -0.2565997838973999 * size),
-                 (-0.13282597064971924 * size, 0.8255770206451416 * size, -0.2300611138343811 * size),
-                 (-0.18784427642822266 * size, 0.8255770206451416 * size, -0.18784409761428833 * size),
-                 (-0.2300613522529602 * size, 0.8255770206451416 * size, -0.1328257918357849 * size),
-                 (-0.256600022315979 * size, 0.8255770206451416 * size, -0.06875564157962799 * size),
-                 (-0.2656519412994385 * size, 0.8255770206451416 * size, 9.328307726264029e-08 * size),
-                 (-0.25660014152526855 * size, 0.8255770206451416 * size, 0.06875583529472351 * size),
-                 (-0.2300613522529602 * size, 0.8255770206451416 * size, 0.13282597064971924 * size),
-                 (-0.18784433603286743 * size, 0.8255770206451416 * size, 0.18784421682357788 * size),
-                 (-0.1328260898590088 * size, 0.8255770206451416 * size, 0.23006129264831543 * size),
-                 (-0.06875592470169067 * size, 0.8255770206451416 * size, 0.256600022315979 * size),
-                 (-1.8761508613351907e-07 * size, 0.8255770206451416 * size, 0.2656519412994385 * size),
-                 (0.06875556707382202 * size, 0.8255770206451416 * size, 0.2566000819206238 * size),
-                 (0.13282573223114014 * size, 0.8255770206451416 * size, 0.23006141185760498 * size),
-                 (0.18784403800964355 * size, 0.8255770206451416 * size, 0.1878443956375122 * size),
-                 (0.23006105422973633 * size, 0.8255770206451416 * size, 0.1328260898590088 * size),
-                 (0.25659990310668945 * size, 0.8255770206451416 * size, 0.06875596940517426 * size),
-                 (0.2656517028808594 * size, 0.8255770206451416 * size, 2.3684407324253698e-07 * size),
-                 (0.25659990310668945 * size, 0.8255770206451416 * size, -0.06875550746917725 * size),
-                 (0.23006117343902588 * size, 0.8255770206451416 * size, -0.13282567262649536 * size),
-                 (0.18784427642822266 * size, 0.8255770206451416 * size, -0.18784397840499878 * size),
-                 (0.13282597064971924 * size, 0.8255770206451416 * size, -0.23006099462509155 * size),
-                 (0.0687558501958847 * size, 0.8255770206451416 * size, -0.2565997838973999 * size), ]
-        edges = [(1, 0), (3, 2), (5, 2), (4, 3), (6, 4), (1, 5), (0, 6), (13, 7), (12, 8), (7, 9), (9, 10), (8, 11),
-                 (27, 14), (26, 15), (14, 16), (16, 17), (15, 18), (17, 18), (10, 11), (12, 13), (20, 19), (22, 21),
-                 (24, 21), (23, 22), (29, 28), (30, 29), (31, 30), (32, 31), (33, 32), (34, 33), (35, 34), (36, 35),
-                 (37, 36), (38, 37), (39, 38), (40, 39), (41, 40), (42, 41), (43, 42), (44, 43), (45, 44), (46, 45),
-                 (47, 46), (48, 47), (49, 48), (50, 49), (51, 50), (28, 51), (26, 27), (25, 23), (20, 24),
-                 (19, 25), ]
-
-        verts = [(a[0] * radius, head_tail, a[2] * radius) for a in v]
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('neck_bend', radius, head_tail)):
+        verts = NECK_BEND_VERTS * (size * radius, 0, size * radius) + (0, head_tail, 0)
+        fill_widget_mesh(obj.data, verts, NECK_BEND_EDGES)
+
+
+NECK_TWEAK_VERTS = np.array([(0.3535533845424652, 0.3535533845424652, 0.0),
+                             (0.4619397521018982, 0.19134171307086945, 0.0),
+                             (0.5, -2.1855694143368964e-08, 0.0),
+                             (0.4619397521018982, -0.19134175777435303, 0.0),
+                             (0.3535533845424652, -0.3535533845424652, 0.0),
+                             (0.19134174287319183, -0.4619397521018982, 0.0),
+                             (7.549790126404332e-08, -0.5, 0.0),
+                             (-0.1913416087627411, -0.46193981170654297, 0.0),
+                             (-0.35355329513549805, -0.35355350375175476, 0.0),
+                             (-0.4619397521018982, -0.19134178757667542, 0.0),
+                             (-0.5, 5.962440319251527e-09, 0.0),
+                             (-0.4619397222995758, 0.1913418024778366, 0.0),
+                             (-0.35355326533317566, 0.35355350375175476, 0.0),
+                             (-0.19134148955345154, 0.46193987131118774, 0.0),
+                             (3.2584136988589307e-07, 0.5, 0.0),
+                             (0.1913420855998993, 0.46193960309028625, 0.0),
+                             (7.450580596923828e-08, 0.46193960309028625, 0.19134199619293213),
+                             (5.9254205098113744e-08, 0.5, 2.323586443253589e-07),
+                             (4.470348358154297e-08, 0.46193987131118774, -0.1913415789604187),
+                             (2.9802322387695312e-08, 0.35355350375175476, -0.3535533547401428),
+                             (2.9802322387695312e-08, 0.19134178757667542, -0.46193981170654297),
+                             (5.960464477539063e-08, -1.1151834122813398e-08, -0.5000000596046448),
+                             (5.960464477539063e-08, -0.1913418024778366, -0.46193984150886536),
+                             (5.960464477539063e-08, -0.35355350375175476, -0.3535533845424652),
+                             (7.450580596923828e-08, -0.46193981170654297, -0.19134166836738586),
+                             (9.348272556053416e-08, -0.5, 1.624372103492533e-08),
+                             (1.043081283569336e-07, -0.4619397521018982, 0.19134168326854706),
+                             (1.1920928955078125e-07, -0.3535533845424652, 0.35355329513549805),
+                             (1.1920928955078125e-07, -0.19134174287319183, 0.46193966269493103),
+                             (1.1920928955078125e-07, -4.7414250303745575e-09, 0.49999991059303284),
+                             (1.1920928955078125e-07, 0.19134172797203064, 0.46193966269493103),
+                             (8.940696716308594e-08, 0.3535533845424652, 0.35355329513549805),
+                             (0.3535534739494324, 0.0, 0.35355329513549805),
+                             (0.1913418173789978, -2.9802322387695312e-08, 0.46193966269493103),
+                             (8.303572940349113e-08, -5.005858838558197e-08, 0.49999991059303284),
+                             (-0.19134165346622467, -5.960464477539063e-08, 0.46193966269493103),
+                             (-0.35355329513549805, -8.940696716308594e-08, 0.35355329513549805),
+                             (-0.46193963289260864, -5.960464477539063e-08, 0.19134168326854706),
+                             (-0.49999991059303284, -5.960464477539063e-08, 1.624372103492533e-08),
+                             (-0.4619397521018982, -2.9802322387695312e-08, -0.19134166836738586),
+                             (-0.3535534143447876, -2.9802322387695312e-08, -0.3535533845424652),
+                             (-0.19134171307086945, 0.0, -0.46193984150886536),
+                             (7.662531942287387e-08, 9.546055501630235e-09, -0.5000000596046448),
+                             (0.19134187698364258, 5.960464477539063e-08, -0.46193981170654297),
+                             (0.3535535931587219, 5.960464477539063e-08, -0.3535533547401428),
+                             (0.4619399905204773, 5.960464477539063e-08, -0.1913415789604187),
+                             (0.5000000596046448, 5.960464477539063e-08, 2.323586443253589e-07),
+                             (0.4619396924972534, 2.9802322387695312e-08, 0.19134199619293213),
+                             (1.563460111618042, 2.778762819843905e-08, 1.5634593963623047),
+                             (0.8461387157440186, -1.0400220418205208e-07, 2.0427582263946533),
+                             (7.321979467178608e-08, -1.9357810288056498e-07, 2.2110657691955566),
+                             (-0.8461385369300842, -2.3579201524626114e-07, 2.0427582263946533),
+                             (-1.5634597539901733, -3.67581861837607e-07, 1.5634593963623047),
+                             (-2.0427584648132324, -2.3579204366797057e-07, 0.8461383581161499),
+                             (-2.211066246032715, -2.3579204366797057e-07, 9.972505665700737e-08),
+                             (-2.0427589416503906, -1.0400223260376151e-07, -0.8461381196975708),
+                             (-1.5634604692459106, -1.040022183929068e-07, -1.563459873199463),
+                             (-0.8461387753486633, 2.77876033294433e-08, -2.042759418487549),
+                             (4.4872678017782164e-08, 7.00015263532805e-08, -2.211066484451294),
+                             (0.8461388349533081, 2.913672290105751e-07, -2.0427591800689697),
+                             (1.5634608268737793, 2.9136725743228453e-07, -1.563459873199463),
+                             (2.042759895324707, 2.9136725743228453e-07, -0.8461377024650574),
+                             (2.211066722869873, 2.9136725743228453e-07, 1.0554133496043505e-06),
+                             (2.0427587032318115, 1.5957746768435754e-07, 0.8461397886276245)], dtype=np.float32)
+NECK_TWEAK_EDGES = np.array([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11),
+                             (11, 12), (12, 13), (13, 14), (14, 15), (0, 15), (16, 31), (16, 17), (17, 18), (18, 19), (19, 20),
+                             (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30),
+                             (30, 31), (32, 33), (33, 34), (34, 35), (35, 36), (36, 37), (37, 38), (38, 39), (39, 40), (40, 41),
+                             (41, 42), (42, 43), (43, 44), (44, 45), (45, 46), (46, 47), (32, 47), (48, 49), (49, 50), (50, 51),
+                             (51, 52), (52, 53), (53, 54), (54, 55), (55, 56), (56, 57), (57, 58), (58, 59), (59, 60), (60, 61),
+                             (61, 62), (62, 63), (48, 63), (21, 58), (10, 54), (29, 50), (2, 62)], dtype=np.int32)
 
 
 def create_neck_tweak_widget(rig, bone_name, size=1.0, bone_transform_name=None):
     obj = create_widget(rig, bone_name, bone_transform_name)
 
-    if obj != None:
-        verts = [(0.3535533845424652 * size, 0.3535533845424652 * size, 0.0 * size),
-                 (0.4619397521018982 * size, 0.19134171307086945 * size, 0.0 * size),
-                 (0.5 * size, -2.1855694143368964e-08 * size, 0.0 * size),
-                 (0.4619397521018982 * size, -0.19134175777435303 * size, 0.0 * size),
-                 (0.3535533845424652 * size, -0.3535533845424652 * size, 0.0 * size),
-                 (0.19134174287319183 * size, -0.4619397521018982 * size, 0.0 * size),
-                 (7.549790126404332e-08 * size, -0.5 * size, 0.0 * size),
-                 (-0.1913416087627411 * size, -0.46193981170654297 * size, 0.0 * size),
-                 (-0.35355329513549805 * size, -0.35355350375175476 * size, 0.0 * size),
-                 (-0.4619397521018982 * size, -0.19134178757667542 * size, 0.0 * size),
-                 (-0.5 * size, 5.962440319251527e-09 * size, 0.0 * size),
-                 (-0.4619397222995758 * size, 0.1913418024778366 * size, 0.0 * size),
-                 (-0.35355326533317566 * size, 0.35355350375175476 * size, 0.0 * size),
-                 (-0.19134148955345154 * size, 0.46193987131118774 * size, 0.0 * size),
-                 (3.2584136988589307e-07 * size, 0.5 * size, 0.0 * size),
-                 (0.1913420855998993 * size, 0.46193960309028625 * size, 0.0 * size),
-                 (7.450580596923828e-08 * size, 0.46193960309028625 * size, 0.19134199619293213 * size),
-                 (5.9254205098113744e-08 * size, 0.5 * size, 2.323586443253589e-07 * size),
-                 (4.470348358154297e-08 * size, 0.46193987131118774 * size, -0.1913415789604187 * size),
-                 (2.9802322387695312e-08 * size, 0.35355350375175476 * size, -0.3535533547401428 * size),
-                 (2.9802322387695312e-08 * size, 0.19134178757667542 * size, -0.46193981170654297 * size),
-                 (5.960464477539063e-08 * size, -1.1151834122813398e-08 * size, -0.5000000596046448 * size),
-                 (5.960464477539063e-08 * size, -0.1913418024778366 * size, -0.46193984150886536 * size),
-                 (5.960464477539063e-08 * size, -0.35355350375175476 * size, -0.3535533845424652 * size),
-                 (7.450580596923828e-08 * size, -0.46193981170654297 * size, -0.19134166836738586 * size),
-                 (9.348272556053416e-08 * size, -0.5 * size, 1.624372103492533e-08 * size),
-                 (1.043081283569336e-07 * size, -0.4619397521018982 * size, 0.19134168326854706 * size),
-                 (1.1920928955078125e-07 * size, -0.3535533845424652 * size, 0.35355329513549805 * size),
-                 (1.1920928955078125e-07 * size, -0.19134174287319183 * size, 0.46193966269493103 * size),
-                 (1.1920928955078125e-07 * size, -4.7414250303745575e-09 * size, 0.49999991059303284 * size),
-                 (1.1920928955078125e-07 * size, 0.19134172797203064 * size, 0.46193966269493103 * size),
-                 (8.940696716308594e-08 * size, 0.3535533845424652 * size, 0.35355329513549805 * size),
-                 (0.3535534739494324 * size, 0.0 * size, 0.35355329513549805 * size),
-                 (0.1913418173789978 * size, -2.9802322387695312e-08 * size, 0.46193966269493103 * size),
-                 (8.303572940349113e-08 * size, -5.005858838558197e-08 * size, 0.49999991059303284 * size),
-                 (-0.19134165346622467 * size, -5.960464477539063e-08 * size, 0.46193966269493103 * size),
-                 (-0.35355329513549805 * size, -8.940696716308594e-08 * size, 0.35355329513549805 * size),
-                 (-0.46193963289260864 * size, -5.960464477539063e-08 * size, 0.19134168326854706 * size),
-                 (-0.49999991059303284 * size, -5.960464477539063e-08 * size, 1.624372103492533e-08 * size),
-                 (-0.4619397521018982 * size, -2.9802322387695312e-08 * size, -0.19134166836738586 * size),
-                 (-0.3535534143447876 * size, -2.9802322387695312e-08 * size, -0.3535533845424652 * size),
-                 (-0.19134171307086945 * size, 0.0 * size, -0.46193984150886536 * size),
-                 (7.662531942287387e-08 * size, 9.546055501630235e-09 * size, -0.5000000596046448 * size),
-                 (0.19134187698364258 * size, 5.960464477539063e-08 * size, -0.46193981170654297 * size),
-                 (0.3535535931587219 * size, 5.960464477539063e-08 * size, -0.3535533547401428 * size),
-                 (0.4619399905204773 * size, 5.960464477539063e-08 * size, -0.1913415789604187 * size),
-                 (0.5000000596046448 * size, 5.960464477539063e-08 * size, 2.323586443253589e-07 * size),
-                 (0.4619396924972534 * size, 2.9802322387695312e-08 * size, 0.19134199619293213 * size),
-                 (1.563460111618042 * size, 2.778762819843905e-08 * size, 1.5634593963623047 * size),
-                 (0.8461387157440186 * size, -1.0400220418205208e-07 * size, 2.0427582263946533 * size),
-                 (7.321979467178608e-08 * size, -1.9357810288056498e-07 * size, 2.2110657691955566 * size),
-                 (-0.8461385369300842 * size, -2.3579201524626114e-07 * size, 2.0427582263946533 * size),
-                 (-1.5634597539901733 * size, -3.67581861837607e-07 * size, 1.5634593963623047 * size),
-                 (-2.0427584648132324 * size, -2.3579204366797057e-07 * size, 0.8461383581161499 * size),
-                 (-2.211066246032715 * size, -2.3579204366797057e-07 * size, 9.972505665700737e-08 * size),
-                 (-2.0427589416503906 * size, -1.0400223260376151e-07 * size, -0.8461381196975708 * size),
-                 (-1.5634604692459106 * size, -1.040022183929068e-07 * size, -1.563459873199463 * size),
-                 (-0.8461387753486633 * size, 2.77876033294433e-08 * size, -2.042759418487549 * size),
-                 (4.4872678017782164e-08 * size, 7.00015263532805e-08 * size, -2.211066484451294 * size),
-                 (0.8461388349533081 * size, 2.913672290105751e-07 * size, -2.0427591800689697 * size),
-                 (1.5634608268737793 * size, 2.9136725743228453e-07 * size, -1.563459873199463 * size),
-                 (2.042759895324707 * size, 2.9136725743228453e-07 * size, -0.8461377024650574 * size),
-                 (2.211066722869873 * size, 2.9136725743228453e-07 * size, 1.0554133496043505e-06 * size),
-                 (2.0427587032318115 * size, 1.5957746768435754e-07 * size, 0.8461397886276245 * size), ]
-        edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 10), (10, 11),
-                 (11, 12), (12, 13), (13, 14), (14, 15), (0, 15), (16, 31), (16, 17), (17, 18), (18, 19), (19, 20),
-                 (20, 21), (21, 22), (22, 23), (23, 24), (24, 25), (25, 26), (26, 27), (27, 28), (28, 29), (29, 30),
-                 (30, 31), (32, 33), (33, 34), (34, 35), (35, 36), (36, 37), (37, 38), (38, 39), (39, 40), (40, 41),
-                 (41, 42), (42, 43), (43, 44), (44, 45), (45, 46), (46, 47), (32, 47), (48, 49), (49, 50), (50, 51),
-                 (51, 52), (52, 53), (53, 54), (54, 55), (55, 56), (56, 57), (57, 58), (58, 59), (59, 60), (60, 61),
-                 (61, 62), (62, 63), (48, 63), (21, 58), (10, 54), (29, 50), (2, 62), ]
-
-        mesh = obj.data
-        mesh.from_pydata(verts, edges, [])
-        mesh.update()
+    if obj != None and not share_widget_mesh(obj, ('neck_tweak', size)):
+        fill_widget_mesh(obj.data, NECK_TWEAK_VERTS * size, NECK_TWEAK_EDGES)
 
 
 #=============================================
@@ -824,8 +1470,8 @@ def angle_on_plane(plane, vec1, vec2):
 def align_bone_roll(obj, bone1, bone2):
     """ Aligns the roll of two bones.
     """
-    bone1_e = obj.data.edit_bones[bone1]
-    bone2_e = obj.data.edit_bones[bone2]
+    bone1_e = get_edit_bone(obj, bone1)
+    bone2_e = get_edit_bone(obj, bone2)
 
     bone1_e.roll = 0.0
 
@@ -871,7 +1517,7 @@ def align_bone_x_axis(obj, bone, vec):
         the given vector.
         Must be in edit mode.
     """
-    bone_e = obj.data.edit_bones[bone]
+    bone_e = get_edit_bone(obj, bone)
 
     vec = vec.cross(bone_e.y_axis)
     vec.normalize()
@@ -896,7 +1542,7 @@ def align_bone_z_axis(obj, bone, vec):
         the given vector.
         Must be in edit mode.
     """
-    bone_e = obj.data.edit_bones[bone]
+    bone_e = get_edit_bone(obj, bone)
 
     vec = bone_e.y_axis.cross(vec)
     vec.normalize()
@@ -922,7 +1568,7 @@ def align_bone_y_axis(obj, bone, vec):
         Must be in edit mode.
     """
 
-    bone_e = obj.data.edit_bones[bone]
+    bone_e = get_edit_bone(obj, bone)
     vec.normalize()
     vec = vec * bone_e.length
 
@@ -933,28 +1579,146 @@ def align_bone_y_axis(obj, bone, vec):
 # Misc
 #=============================================
 
+_copy_plans = {}  # {RNA struct identifier: names of the properties to copy}
+
+
+def get_copy_plan(a):
+    """ Returns the names of the properties copy_attributes() copies from a:
+        the writable, non-collection RNA properties of its type, in the
+        alphabetical order dir() would give.  Cached by RNA type.
+    """
+    rna = a.bl_rna
+    plan = _copy_plans.get(rna.identifier)
+    if plan is None:
+        plan = sorted(
+            prop.identifier for prop in rna.properties
+            if not prop.is_readonly
+            and prop.type != 'COLLECTION'
+            and not prop.identifier.startswith("error_")
+            and prop.identifier not in ("group", "is_valid", "rna_type")
+        )
+        _copy_plans[rna.identifier] = plan
+    return plan
+
+
 def copy_attributes(a, b):
-    keys = dir(a)
-    for key in keys:
-        if not key.startswith("_") \
-        and not key.startswith("error_") \
-        and key != "group" \
-        and key != "is_valid" \
-        and key != "rna_type" \
-        and key != "bl_rna":
-            try:
-                setattr(b, key, getattr(a, key))
-            except AttributeError:
-                pass
+    """ Copies the writable RNA properties of a onto b.
+        Array properties are assigned whole.
+    """
+    for key in get_copy_plan(a):
+        try:
+            setattr(b, key, getattr(a, key))
+        except AttributeError:
+            pass
 
 
-def get_rig_type(rig_type, base_path=''):
-    """ Fetches a rig module by name, and returns it.
+def copy_driver(d1, obj, source=None, data_path=None):
+    """ Copies the driver F-Curve d1 onto obj, and returns the new F-Curve.
+        An existing driver F-Curve on the same path is replaced.
+        Variable targets pointing at source are switched to obj.  The
+        driver is added on data_path if given, otherwise on d1's path.
+    """
+    d2 = obj.driver_add(data_path or d1.data_path, d1.array_index)
+    copy_attributes(d1, d2)
+    copy_attributes(d1.driver, d2.driver)
+
+    # Remove default modifiers, variables, etc., and the keyframes of an
+    # F-Curve that was already there
+    points = d2.keyframe_points
+    while points:
+        points.remove(points[-1], fast=True)
+    for m in list(d2.modifiers):
+        d2.modifiers.remove(m)
+    for v in list(d2.driver.variables):
+        d2.driver.variables.remove(v)
+
+    # Copy modifiers
+    for m1 in d1.modifiers:
+        m2 = d2.modifiers.new(type=m1.type)
+        copy_attributes(m1, m2)
+
+    # Copy variables
+    for v1 in d1.driver.variables:
+        v2 = d2.driver.variables.new()
+        copy_attributes(v1, v2)
+        for i in range(len(v1.targets)):
+            copy_attributes(v1.targets[i], v2.targets[i])
+            # Switch source targets to obj targets
+            if source is not None and v2.targets[i].id == source:
+                v2.targets[i].id = obj
+
+    # Copy key frames
+    copy_keyframes(d1, d2)
+
+    return d2
+
+
+# Keyframe settings that can't go through foreach_get/foreach_set
+KEYFRAME_ENUMS = ['type', 'interpolation', 'easing', 'handle_left_type', 'handle_right_type']
+
+# Keyframe settings copied in bulk, with the number of values per keyframe
+KEYFRAME_ARRAYS = [('co', 2), ('handle_left', 2), ('handle_right', 2),
+                   ('amplitude', 1), ('back', 1), ('period', 1),
+                   ('select_control_point', 1), ('select_left_handle', 1), ('select_right_handle', 1)]
+
+
+def copy_keyframes(fcurve_1, fcurve_2):
+    """ Appends the keyframes of fcurve_1 to fcurve_2, adding them all at
+        once and copying their coordinates and handles in bulk.
+    """
+    points_1 = fcurve_1.keyframe_points
+    points_2 = fcurve_2.keyframe_points
+    count = len(points_1)
+    if count == 0:
+        return
+
+    start = len(points_2)
+    points_2.add(count)
+    new_points = points_2[start:]
+
+    # Enum settings first, so that handle types don't override copied handles
+    for k1, k2 in zip(points_1, new_points):
+        for prop in KEYFRAME_ENUMS:
+            setattr(k2, prop, getattr(k1, prop))
+
+    if start == 0:
+        for prop, size in KEYFRAME_ARRAYS:
+            values = [0] * (count * size)
+            points_1.foreach_get(prop, values)
+            points_2.foreach_set(prop, values)
+    else:
+        for k1, k2 in zip(points_1, new_points):
+            for prop, size in KEYFRAME_ARRAYS:
+                setattr(k2, prop, getattr(k1, prop))
+
+
+_rig_types = {}  # {(base_path, rig_type): (module, source mtime, source hash)}
+
+
+def _source_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def _source_hash(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (OSError, TypeError):
+        return None
+
+
+def _load_rig_type(rig_type, base_path='', reload=False):
+    """ Executes a rig module, or returns it from sys.modules if it was
+        already imported and reload is False.
     """
     if not base_path:
         name = ".%s.%s" % (RIG_DIR, rig_type)
         submod = importlib.import_module(name, package=MODULE_NAME)
-        importlib.reload(submod)
+        if reload:
+            importlib.reload(submod)
     else:
         if '.' in rig_type:
             module_subpath = str.join(os.sep, rig_type.split('.'))
@@ -972,14 +1736,106 @@ def get_rig_type(rig_type, base_path=''):
     return submod
 
 
+def get_rig_type(rig_type, base_path='', check_source=True):
+    """ Fetches a rig module by name, and returns it.
+        Modules are cached, and only executed again when their source file
+        changed since they were loaded.  With check_source False a cached
+        module is returned without looking at its source file.
+    """
+    key = (base_path, rig_type)
+    cached = _rig_types.get(key)
+    if cached is not None:
+        submod, mtime, digest = cached
+        if not check_source:
+            return submod
+        path = getattr(submod, "__file__", None)
+        new_mtime = _source_mtime(path)
+        if new_mtime == mtime:
+            return submod
+        if _source_hash(path) == digest:
+            # Touched but not changed
+            _rig_types[key] = (submod, new_mtime, digest)
+            return submod
+
+    submod = _load_rig_type(rig_type, base_path, reload=cached is not None)
+    path = getattr(submod, "__file__", None)
+    _rig_types[key] = (submod, _source_mtime(path), _source_hash(path))
+    return submod
+
+
+def reload_rig_types():
+    """ Executes all the loaded rig modules again, along with the other
+        modules of the rigs package they may import, and adds the parameters
+        of the reloaded rig types again.  Returns the number of rig types.
+    """
+    # Helper modules of the rigs package first, so rigs import the new ones
+    rig_modules = set(id(submod) for submod, mtime, digest in _rig_types.values())
+    prefix = "%s.%s." % (MODULE_NAME, RIG_DIR)
+    for name in sorted(sys.modules.keys()):
+        submod = sys.modules[name]
+        if name.startswith(prefix) and submod is not None and id(submod) not in rig_modules:
+            importlib.reload(submod)
+
+    keys = list(_rig_types.keys())
+    _rig_types.clear()
+    for base_path, rig_type in keys:
+        submod = _load_rig_type(rig_type, base_path, reload=True)
+        path = getattr(submod, "__file__", None)
+        _rig_types[(base_path, rig_type)] = (submod, _source_mtime(path), _source_hash(path))
+
+        if hasattr(bpy.types, "RigifyParameters"):
+            add_rig_parameters(rig_type, submod, bpy.types.RigifyParameters)
+    return len(keys)
+
+
+rig_parameter_names = {}  # {rig type: names of the rigify_parameters its add_parameters() adds}
+
+
+class ParameterRecorder:
+    """ Stands in for the RigifyParameters class passed to add_parameters(),
+        recording the names of the parameters a rig type adds.
+    """
+    def __init__(self, params):
+        object.__setattr__(self, "params", params)
+        object.__setattr__(self, "names", [])
+
+    def __getattr__(self, name):
+        return getattr(self.params, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.params, name, value)
+        if name not in self.names:
+            self.names.append(name)
+
+
+def add_rig_parameters(rig_type, rig_module, params):
+    """ Adds the parameters of a rig module to the RigifyParameters class,
+        and records their names in rig_parameter_names.
+    """
+    recorder = ParameterRecorder(params)
+    try:
+        rig_module.add_parameters(recorder)
+    except AttributeError:
+        pass
+    rig_parameter_names[rig_type] = recorder.names
+
+
+def get_rig_parameter_names(rig_type):
+    """ Returns the names of the parameters of a rig type, or None if the
+        rig type's parameters were never added.
+    """
+    return rig_parameter_names.get(rig_type.replace(" ", ""))
+
+
 def get_metarig_module(metarig_name, path=METARIG_DIR):
     """ Fetches a rig module by name, and returns it.
     """
 
     name = ".%s.%s" % (path, metarig_name)
-    submod = importlib.import_module(name, package=MODULE_NAME)
-    importlib.reload(submod)
-    return submod
+    if MODULE_NAME + name in sys.modules:
+        # Already imported, reload it in case it was edited since
+        return importlib.reload(sys.modules[MODULE_NAME + name])
+    return importlib.import_module(name, package=MODULE_NAME)
 
 
 def connected_children_names(obj, bone_name):
@@ -987,21 +1843,14 @@ def connected_children_names(obj, bone_name):
         connected chain starting with the given bone as a parent.
         If there is a connected branch, the list stops there.
     """
-    bone = obj.data.bones[bone_name]
+    bone = get_data_bone(obj, bone_name)
     names = []
 
     while True:
-        connects = 0
-        con_name = ""
-
-        for child in bone.children:
-            if child.use_connect:
-                connects += 1
-                con_name = child.name
-
-        if connects == 1:
-            names += [con_name]
-            bone = obj.data.bones[con_name]
+        connected = [child for child in bone.children if child.use_connect]
+        if len(connected) == 1:
+            bone = connected[0]
+            names += [bone.name]
         else:
             break
 
@@ -1047,6 +1896,8 @@ def write_metarig(obj, layers=False, func_name="create", groups=False):
     Write a metarig as a python script, this rig is to have all info needed for
     generating the real rig with rigify.
     """
+    from . import rig_lists  # Imports utils itself
+
     code = []
 
     code.append("import bpy\n\n")
@@ -1127,9 +1978,12 @@ def write_metarig(obj, layers=False, func_name="create", groups=False):
         code.append("    pbone.rotation_mode = %r" % pbone.rotation_mode)
         if layers:
             code.append("    pbone.bone.layers = %s" % str(list(pbone.bone.layers)))
-        # Rig type parameters
+        # Rig type parameters, registered on first use
+        rig_lists.ensure_rig_parameters(pbone.rigify_type)
         for param_name in pbone.rigify_parameters.keys():
-            param = getattr(pbone.rigify_parameters, param_name, '')
+            if not hasattr(pbone.rigify_parameters, param_name):
+                continue  # Left over from another rig type
+            param = getattr(pbone.rigify_parameters, param_name)
             if str(type(param)) == "<class 'bpy_prop_array'>":
                 param = list(param)
             if type(param) == str: